@@ -8,17 +8,32 @@
 для различных модулей приложения.
 """
 
+# Замер времени импортов (см. flask startup-report)
+from utils.startup import import_timer, StartupTimer, LazyGroup, defer_until_first_request, startup_report_command, \
+    format_startup_report, running_cli_command
+import_timer.start()
+
 # Третьесторонние библиотеки
 from flask import Flask, render_template, redirect, url_for, request
-from flask_admin import Admin
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_wtf import CSRFProtect
 
 # Локальные импорты
-from app.db import db
+from app.db import db, configure_engine, init_migrate
 from app.config.development import DevelopmentConfig
 from utils.logging import configure_logging, log_and_flash
+from utils.request_timing import init_request_timing
+from utils.lazy_loads import init_lazy_load_detection
+from utils.metrics import init_metrics
+from utils.profiler import init_profiler
+from utils.query_plans import check_query_plans_command
+from utils.bulk_import import import_data_command
+from utils.data_versions import init_data_versions
+from utils.fragment_cache import init_fragment_cache
+from utils.templates import configure_templates, precompile_templates
+from utils.assets import init_assets, build_assets_command
+from utils.seed import seed_command
+from utils.benchmark import benchmark_command
 
 # Импортируем функцию для регистрации обработчиков ошибок
 from app.modules.error.views import register_error_handlers
@@ -28,13 +43,13 @@ from app.modules.user.models import User
 from app.modules.staff.models import Staff
 from app.modules.team.models import Team
 from app.modules.team_set.models import TeamSet
+from app.modules.team_set.summary import rebuild_allocation_summary_command, check_allocation_summary_command
+from app.modules.user.identity import init_identity_cache, load_identity
+from app.modules.user.passwords import init_password_hasher, benchmark_password_hash_command
+from app.modules.login.throttle import init_login_throttle
 
-# Вьюхи админки
-from app.modules.admin.views import MyModelView, MyAdminIndexView
-from app.modules.admin.user_views import UserAdmin
-from app.modules.admin.staff_views import StaffAdmin
-from app.modules.admin.team_views import TeamAdmin
-from app.modules.admin.team_set_views import TeamSetAdmin
+# Админка (представления импортируются при ее инициализации)
+from app.modules.admin.setup import init_admin
 
 from app.modules.index.views import blueprint as index_bp
 from app.modules.profile.views import blueprint as profile_bp
@@ -43,8 +58,13 @@ from app.modules.user.views import blueprint as user_bp
 from app.modules.staff.views import blueprint as staff_bp
 from app.modules.team.views import blueprint as team_bp
 from app.modules.team_set.views import blueprint as team_set_bp
+from app.modules.analytics.views import blueprint as analytics_bp
+from app.modules.api.views import blueprint as api_v1_bp
+from app.modules.metrics.views import blueprint as metrics_bp
 from app.modules.error.views import blueprint as error_bp
 
+import_timer.stop()
+
 csrf = CSRFProtect()
 
 
@@ -52,24 +72,40 @@ def create_app(config_class=DevelopmentConfig):
     """
     Создает и конфигурирует экземпляр Flask-приложения.
 
-    :param config_class: Класс конфигурации, который будет использоваться для настройки приложения.
-    :type config_class: class
+    :param config_class: Класс конфигурации (или путь для импорта к нему), который будет использоваться
+        для настройки приложения.
+    :type config_class: class or str
 
     :return: Настроенный экземпляр Flask-приложения.
     :rtype: Flask
     """
+    timer = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.extensions['startup_timer'] = timer
+    timer.mark('Flask и конфигурация')
 
     # Инициализация CSRF-защиты
     csrf.init_app(app)
 
     # Инициализация расширений
     db.init_app(app)
-    migrate = Migrate(app, db)
+    configure_engine(app)
+    init_data_versions(app)
+    init_fragment_cache(app)
+    configure_templates(app)
+    init_assets(app)
+    # Flask-Migrate (вместе с Alembic) загружается только при вызове команд flask db
+    app.cli.add_command(LazyGroup('db', lambda: init_migrate(app), help='Perform database migrations.'))
+    timer.mark('расширения и база данных')
 
     # Настройка логирования
     configure_logging(app)
+    # Замеры SQL, шаблонов и логирования в каждом запросе (заголовок Server-Timing и журнал медленных запросов)
+    init_request_timing(app)
+    # Обнаружение повторных ленивых загрузок отношений (N+1)
+    init_lazy_load_detection(app)
+    timer.mark('логирование')
 
     # Настройка Flask-Login
     # Поскольку Flask-Login ничего не знает о базах данных, ему нужна помощь приложения при загрузке пользователя.
@@ -77,6 +113,13 @@ def create_app(config_class=DevelopmentConfig):
     # которую можно вызвать для загрузки пользователя с идентификатором.
     login_manager = LoginManager()
     login_manager.init_app(app)
+    init_identity_cache(app)
+    init_password_hasher(app)
+    init_login_throttle(app)
+    # Метрики (после компонентов, показатели которых в них выводятся)
+    init_metrics(app)
+    # Профилирование запросов администратора по требованию (?_profile=1)
+    init_profiler(app)
     login_manager.login_view = 'login.login'
 
     # Отключаем стандартное сообщение о доступе
@@ -100,15 +143,18 @@ def create_app(config_class=DevelopmentConfig):
         Загружает пользователя по его идентификатору.
 
         Flask-Login использует эту функцию для получения данных о пользователе
-        на основе его идентификатора.
+        на основе его идентификатора. Запись о пользователе берется из кэша идентичности,
+        поэтому на большинстве запросов обращения к базе данных не происходит.
 
         :param id: Идентификатор пользователя.
         :type id: int
 
-        :return: Объект пользователя, если пользователь с таким идентификатором существует.
-        :rtype: User or None
+        :return: Запись о пользователе, если пользователь с таким идентификатором существует.
+        :rtype: UserIdentity or None
         """
-        return User.query.get(id)
+        return load_identity(id)
+
+    timer.mark('Flask-Login')
 
     # Регистрация blueprints
     app.register_blueprint(index_bp)
@@ -118,17 +164,22 @@ def create_app(config_class=DevelopmentConfig):
     app.register_blueprint(staff_bp)
     app.register_blueprint(team_bp)
     app.register_blueprint(team_set_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(api_v1_bp)
+    app.register_blueprint(metrics_bp)
     app.register_blueprint(error_bp)
 
     # Регистрация обработчиков ошибок
     register_error_handlers(app)
+    timer.mark('blueprints')
 
-    # Создание и регистрация Flask-Admin
-    admin = Admin(app, name='Admin', template_mode='bootstrap4', base_template='admin/base.html', index_view=MyAdminIndexView())
-    admin.add_view(UserAdmin(User, db.session, endpoint='users_admin', name='User'))
-    admin.add_view(TeamAdmin(Team, db.session, endpoint='team_admin', name='Team'))
-    admin.add_view(StaffAdmin(Staff, db.session, endpoint='staff_admin', name='Staff'))
-    admin.add_view(TeamSetAdmin(TeamSet, db.session, endpoint='team_set_admin', name='TeamSet'))
+    # Создание и регистрация Flask-Admin (при ADMIN_LAZY_INIT - при первом запросе к приложению).
+    # Под CLI админка откладывается всегда, поэтому команды, например flask db upgrade, ее не инициализируют
+    if app.config['ADMIN_LAZY_INIT'] or running_cli_command():
+        defer_until_first_request(app, 'Flask-Admin', init_admin)
+    else:
+        init_admin(app)
+        timer.mark('Flask-Admin')
 
     @app.route('/')
     def root():
@@ -140,4 +191,22 @@ def create_app(config_class=DevelopmentConfig):
         """
         return redirect(url_for('index.index'))
 
+    # Регистрация CLI-команд
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(rebuild_allocation_summary_command)
+    app.cli.add_command(check_allocation_summary_command)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(startup_report_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(benchmark_password_hash_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(benchmark_command)
+
+    # Загрузка шаблонов до первого запроса (после регистрации blueprints и админки)
+    precompile_templates(app)
+    timer.mark('загрузка шаблонов')
+
+    if app.config['STARTUP_REPORT']:
+        app.logger.info('Время запуска приложения:\n%s', format_startup_report(import_timer.timings, timer.steps))
+
     return app
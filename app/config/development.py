@@ -30,6 +30,61 @@ class DevelopmentConfig:
     :cvar LOGS_DIR: Директория для хранения логов.
     :cvar LOG_FILE: Путь к файлу логов.
     :cvar LOGGING_LEVEL: Уровень логирования для приложения.
+    :cvar LOG_QUEUE_ENABLED: Флаг записи логов через очередь и фоновый поток.
+    :cvar LOG_QUEUE_SIZE: Максимальное количество записей в очереди логов.
+    :cvar LOG_QUEUE_POLICY: Политика при переполнении очереди логов ('drop' или 'block').
+    :cvar LOG_QUEUE_TIMEOUT: Максимальное время ожидания места в очереди для политики 'block' (в секундах).
+    :cvar LOG_FORMAT: Формат файла логов ('text' или 'json').
+    :cvar LOG_SAMPLE_RATES: Доли записываемых записей по логгерам и уровням (ниже WARNING).
+    :cvar REQUEST_TIMING_ENABLED: Флаг замеров SQL, шаблонов и логирования в каждом запросе.
+    :cvar SERVER_TIMING_HEADER: Флаг добавления заголовка Server-Timing к ответам.
+    :cvar SLOW_REQUEST_THRESHOLD_MS: Длительность запроса (в мс), начиная с которой он записывается как медленный.
+    :cvar SLOW_REQUEST_MAX_QUERIES: Количество SQL-запросов, больше которого запрос записывается как медленный.
+    :cvar SLOW_REQUEST_MAX_STATEMENTS: Количество самых долгих SQL-запросов в записи о медленном запросе.
+    :cvar SLOW_REQUEST_LOG_FILE: Путь к файлу записей о медленных запросах (JSON Lines).
+    :cvar LAZY_LOAD_DETECTION: Режим обнаружения повторных ленивых загрузок отношений (None, 'warn' или 'raise').
+    :cvar LAZY_LOAD_THRESHOLD: Количество ленивых загрузок одного отношения в запросе, начиная с которого оно считается N+1.
+    :cvar METRICS_ENABLED: Флаг сбора метрик и маршрута /metrics.
+    :cvar METRICS_DIR: Директория файлов метрик процессов для суммирования по воркерам (None - только текущий процесс).
+    :cvar METRICS_FLUSH_INTERVAL: Минимальный интервал записи метрик процесса в файл (в секундах).
+    :cvar METRICS_TOKEN: Токен сборщика метрик для заголовка Authorization: Bearer (None - только администраторы).
+    :cvar PROFILER_ENABLED: Флаг профилирования запросов администратора по параметру ?_profile=1.
+    :cvar PROFILER_DIR: Директория сохраненных профилей запросов.
+    :cvar PROFILER_MAX_PROFILES: Максимальное количество хранимых профилей (старые удаляются).
+    :cvar MEMBER_PAGE_SIZE: Количество записей на странице списков в кабинете.
+    :cvar MEMBER_STREAM_CHUNK_SIZE: Размер порции строк, читаемых из базы в потоковом режиме.
+    :cvar MEMBER_STREAM_BUFFER_SIZE: Минимальный размер блока HTML, отправляемого клиенту в потоковом режиме.
+    :cvar SQLITE_PRAGMAS: PRAGMA-настройки, применяемые к каждому новому соединению SQLite.
+    :cvar IDENTITY_CACHE_SIZE: Максимальное количество пользователей в кэше идентичности.
+    :cvar IDENTITY_CACHE_TTL: Время жизни записи в кэше идентичности (в секундах).
+    :cvar ANALYTICS_TARGET_FTE: Целевая суммарная загрузка сотрудника для аналитики FTE.
+    :cvar ANALYTICS_FTE_TOLERANCE: Допустимое отклонение загрузки от целевой.
+    :cvar ANALYTICS_LIST_LIMIT: Максимальная длина списков пере- и недогруженных сотрудников.
+    :cvar ANALYTICS_TEAM_LIMIT: Количество команд с наибольшим FTE на графике команд.
+    :cvar API_PAGE_SIZE: Количество записей на странице JSON API по умолчанию.
+    :cvar API_MAX_PAGE_SIZE: Максимальное количество записей на странице и в выборке по ids в JSON API.
+    :cvar EXPORT_CHUNK_SIZE: Размер порции строк, читаемых из базы и отдаваемых клиенту при выгрузке.
+    :cvar IMPORT_BATCH_SIZE: Количество строк в одном пакете и одной транзакции при массовом импорте.
+    :cvar IMPORT_REJECTS_DIR: Директория для файлов отклоненных строк импорта через админку.
+    :cvar DATA_VERSIONS_DIR: Директория файлов версий таблиц для заголовков ETag и Last-Modified.
+    :cvar FRAGMENT_CACHE_MAX_BYTES: Максимальный суммарный размер кэша фрагментов шаблонов (в байтах).
+    :cvar TEMPLATE_BYTECODE_CACHE_DIR: Директория файлового кэша байт-кода шаблонов Jinja (None - кэш отключен).
+    :cvar TEMPLATE_PRECOMPILE: Флаг загрузки всех шаблонов при создании приложения.
+    :cvar ADMIN_LAZY_INIT: Флаг отложенной инициализации админки (до первого запроса и первого обращения к представлению).
+    :cvar STARTUP_REPORT: Флаг записи в лог отчета о времени импортов и шагов создания приложения.
+    :cvar ASSETS_BUNDLES: Статические бандлы: имя - список исходных файлов относительно папки static.
+    :cvar ASSETS_DIST_DIR: Директория собранных бандлов относительно папки static.
+    :cvar ASSETS_BUNDLED: Флаг подключения собранных бандлов вместо исходных файлов.
+    :cvar ASSETS_MAX_AGE: Срок хранения файлов бандлов в кэше браузера (в секундах).
+    :cvar PASSWORD_HASH_METHOD: Алгоритм и параметры хэширования паролей в формате Werkzeug.
+    :cvar PASSWORD_SALT_LENGTH: Длина соли хэша пароля (в символах).
+    :cvar PASSWORD_VERIFY_WORKERS: Количество потоков пула хэширования паролей (0 - в потоке запроса).
+    :cvar PASSWORD_VERIFY_MAX_PENDING: Максимальное количество запросов, ожидающих поток пула хэширования.
+    :cvar PASSWORD_VERIFY_TIMEOUT: Максимальное время ожидания места в очереди хэширования (в секундах).
+    :cvar LOGIN_THROTTLE_ENABLED: Флаг ограничения частоты попыток входа.
+    :cvar LOGIN_THROTTLE_LIMITS: Лимиты попыток входа: имя - (количество попыток, период в секундах).
+    :cvar LOGIN_THROTTLE_MAX_KEYS: Максимальное количество отслеживаемых IP-адресов и учетных записей.
+    :cvar LOGIN_THROTTLE_DB: Файл SQLite с состоянием лимитов, общий для воркеров (None - память процесса).
     """
 
     #: Базовая директория приложения
@@ -44,24 +99,230 @@ class DevelopmentConfig:
     #: Уровень логирования
     LOGGING_LEVEL = logging.DEBUG
 
+    #: Запись логов через очередь и фоновый поток (в режиме разработки логи пишутся сразу)
+    LOG_QUEUE_ENABLED = False
+
+    #: Максимальное количество записей в очереди логов
+    LOG_QUEUE_SIZE = 10000
+
+    #: Политика при переполнении очереди: 'drop' - отбросить запись, 'block' - подождать LOG_QUEUE_TIMEOUT секунд
+    LOG_QUEUE_POLICY = 'drop'
+
+    #: Максимальное время ожидания места в очереди для политики 'block' (в секундах)
+    LOG_QUEUE_TIMEOUT = 1.0
+
+    #: Формат файла логов: 'text' - читаемые строки, 'json' - одна запись в формате JSON на строку
+    LOG_FORMAT = 'text'
+
+    #: Доли записываемых записей по логгерам и уровням, например {'app': {'DEBUG': 0.1}}
+    #: (в режиме разработки записываются все записи)
+    LOG_SAMPLE_RATES = {}
+
+    #: Замеры SQL-запросов, отрисовки шаблонов и записи логов в каждом запросе
+    REQUEST_TIMING_ENABLED = True
+
+    #: Заголовок Server-Timing с итогами замеров (виден во вкладке Network инструментов разработчика)
+    SERVER_TIMING_HEADER = True
+
+    #: Запрос дольше этого времени (в миллисекундах) записывается в журнал медленных запросов
+    SLOW_REQUEST_THRESHOLD_MS = 500
+
+    #: Запрос, выполнивший больше SQL-запросов, записывается в журнал медленных запросов
+    SLOW_REQUEST_MAX_QUERIES = 50
+
+    #: Количество SQL-запросов с наибольшим суммарным временем в записи о медленном запросе
+    SLOW_REQUEST_MAX_STATEMENTS = 10
+
+    #: Файл журнала медленных запросов (одна запись в формате JSON на строку)
+    SLOW_REQUEST_LOG_FILE = os.path.join(LOGS_DIR, 'slow_requests.log')
+
+    #: Обнаружение повторных ленивых загрузок отношений (N+1): None - отключено, 'warn' - предупреждение
+    #: в логе в конце запроса, 'raise' - исключение при повторной загрузке (для тестов и тестового стенда)
+    LAZY_LOAD_DETECTION = 'warn'
+
+    #: Отношение, загруженное лениво столько раз за один запрос, считается N+1
+    LAZY_LOAD_THRESHOLD = 2
+
+    #: Сбор метрик запросов, SQL, входа и ошибок (выводятся в формате Prometheus по адресу /metrics)
+    METRICS_ENABLED = True
+
+    #: Директория файлов метрик процессов (в режиме разработки процесс один, файлы не нужны)
+    METRICS_DIR = None
+
+    #: Метрики процесса записываются в файл не чаще раза в столько секунд
+    METRICS_FLUSH_INTERVAL = 5.0
+
+    #: Токен сборщика метрик (Prometheus), передаваемый в заголовке Authorization: Bearer
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    #: Профилирование отдельных запросов администратора (?_profile=1 или заголовок X-Profile)
+    PROFILER_ENABLED = True
+
+    #: Директория профилей запросов (находится на одном уровне с папкой app)
+    PROFILER_DIR = os.path.join(BASEDIR, '..', '..', 'profiles')
+
+    #: Количество хранимых профилей: после записи нового самые старые удаляются
+    PROFILER_MAX_PROFILES = 50
+
     #: URI базы данных для подключения к SQLite, используется для режима разработки
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASEDIR, '..', 'app.db')
 
     #: Флаг для отключения отслеживания изменений объектов SQLAlchemy (экономит ресурсы памяти)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    #: PRAGMA-настройки SQLite для каждого нового соединения (в режиме разработки используются значения SQLite по умолчанию)
+    SQLITE_PRAGMAS = {}
+
     #: Сообщение, которое выводится при неудачной попытке авторизации
     LOGIN_MESSAGE = 'Ошибка! Вам доступ запрещен.'
 
     #: Длительность хранения cookies для функции "Запомнить меня"
     REMEMBER_COOKIE_DURATION = timedelta(days=30)
 
+    #: Максимальное количество пользователей в кэше идентичности загрузчика Flask-Login
+    IDENTITY_CACHE_SIZE = 1024
+
+    #: Время жизни записи в кэше идентичности (в секундах); ограничивает, как долго другие процессы
+    #: могут видеть устаревшие роль и email после изменения пользователя
+    IDENTITY_CACHE_TTL = 30
+
+    #: Целевая суммарная загрузка сотрудника (FTE) для аналитики
+    ANALYTICS_TARGET_FTE = 1.0
+
+    #: Допустимое отклонение суммарной загрузки от целевой, в пределах которого сотрудник считается загруженным полностью
+    ANALYTICS_FTE_TOLERANCE = 0.01
+
+    #: Максимальная длина списков пере- и недогруженных сотрудников в ответе аналитики
+    ANALYTICS_LIST_LIMIT = 50
+
+    #: Количество команд с наибольшим суммарным FTE на графике численности и FTE команд
+    ANALYTICS_TEAM_LIMIT = 30
+
+    #: Количество записей на странице JSON API по умолчанию (параметр limit)
+    API_PAGE_SIZE = 100
+
+    #: Максимальное количество записей на странице JSON API и в одной выборке по ids
+    API_MAX_PAGE_SIZE = 1000
+
+    #: Размер порции строк, читаемых из базы и отдаваемых клиенту при выгрузке CSV/JSON Lines
+    EXPORT_CHUNK_SIZE = 1000
+
+    #: Количество строк в одном пакете executemany и одной транзакции при массовом импорте
+    IMPORT_BATCH_SIZE = 20000
+
+    #: Директория для файлов отклоненных строк импорта через админку (находится на одном уровне с папкой app)
+    IMPORT_REJECTS_DIR = os.path.join(BASEDIR, '..', '..', 'imports')
+
+    #: Директория файлов версий таблиц (находится на одном уровне с папкой app); должна быть общей
+    #: для всех процессов приложения, иначе процесс не узнает об изменениях, сделанных другими
+    DATA_VERSIONS_DIR = os.path.join(BASEDIR, '..', '..', 'data_versions')
+
+    #: Максимальный суммарный размер отрисованных фрагментов в кэше процесса (в байтах); 0 отключает кэш
+    FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    #: Директория файлового кэша байт-кода шаблонов Jinja (в режиме разработки шаблоны компилируются заново)
+    TEMPLATE_BYTECODE_CACHE_DIR = None
+
+    #: Загрузка всех шаблонов при создании приложения (в режиме разработки шаблоны загружаются по мере обращения)
+    TEMPLATE_PRECOMPILE = False
+
+    #: Отложенная инициализация админки: Flask-Admin создается при первом запросе к приложению, а формы
+    #: каждого представления строятся при первом обращении к нему (CLI-команды админку не загружают)
+    ADMIN_LAZY_INIT = True
+
+    #: Запись в лог отчета о времени запуска (его также выводит команда flask startup-report)
+    STARTUP_REPORT = False
+
+    #: Статические бандлы, которые собирает команда flask build-assets (файлы склеиваются в указанном порядке).
+    #: Chart.js вынесен в отдельный бандл и подключается только на страницах с диаграммами.
+    ASSETS_BUNDLES = {
+        'member.css': [
+            'css/bootstrap.min.css',
+            'css/bootstrap-datepicker.min.css',
+            'css/select2.min.css',
+            'css/custom.css',
+        ],
+        'member.js': [
+            'js/jquery-3.7.1.min.js',
+            'js/select2.min.js',
+            'js/bootstrap.bundle.min.js',
+            'js/bootstrap-datepicker.min.js',
+        ],
+        'admin.css': [
+            'css/bootstrap.min.css',
+            'css/flatpickr.min.css',
+            'css/select2.min.css',
+            'css/custom.css',
+            'font/font-awesome/css/font-awesome.min.css',
+        ],
+        'admin.js': [
+            'js/jquery-3.7.1.min.js',
+            'js/bootstrap.bundle.min.js',
+            'js/flatpickr.min.js',
+            'js/select2.min.js',
+        ],
+        'chart.js': [
+            'js/chart.js',
+        ],
+    }
+
+    #: Директория собранных бандлов относительно папки static
+    ASSETS_DIST_DIR = 'dist'
+
+    #: Подключение собранных бандлов (в режиме разработки подключаются исходные файлы, сборка не нужна)
+    ASSETS_BUNDLED = False
+
+    #: Срок хранения файлов бандлов в кэше браузера: имя файла содержит хэш содержимого, поэтому год
+    ASSETS_MAX_AGE = 365 * 24 * 60 * 60
+
+    #: Алгоритм и параметры хэширования паролей: 'scrypt:n:r:p' или 'pbkdf2:хэш-функция:итерации'.
+    #: Хэши с другими параметрами пересчитываются при успешном входе (flask benchmark-password-hash
+    #: показывает время проверки для разных параметров)
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+    #: Длина соли хэша пароля (в символах)
+    PASSWORD_SALT_LENGTH = 16
+
+    #: Количество потоков пула хэширования паролей (в режиме разработки пароли проверяются в потоке запроса)
+    PASSWORD_VERIFY_WORKERS = 0
+
+    #: Максимальное количество запросов, ожидающих свободный поток пула хэширования
+    PASSWORD_VERIFY_MAX_PENDING = 16
+
+    #: Максимальное время ожидания места в очереди хэширования (в секундах), после которого отдается ответ 503
+    PASSWORD_VERIFY_TIMEOUT = 5.0
+
+    #: Ограничение частоты попыток входа (запросы сверх лимита получают ответ 429 без проверки пароля)
+    LOGIN_THROTTLE_ENABLED = True
+
+    #: Лимиты попыток входа: 'ip' - с одного IP-адреса, 'account' - в одну учетную запись;
+    #: значение - (количество попыток, период в секундах, за который лимит полностью восстанавливается)
+    LOGIN_THROTTLE_LIMITS = {
+        'ip': (20, 60),
+        'account': (5, 300),
+    }
+
+    #: Максимальное количество отслеживаемых IP-адресов и учетных записей (ограничивает память)
+    LOGIN_THROTTLE_MAX_KEYS = 100000
+
+    #: Файл SQLite с состоянием лимитов (в режиме разработки лимиты хранятся в памяти процесса)
+    LOGIN_THROTTLE_DB = None
+
     #: Секретный ключ для защиты сессий и CSRF (загружается из .env)
     SECRET_KEY = os.getenv('SECRET_KEY', 'you-will-never-guess')
 
     #: Включение защиты CSRF для всех форм
     WTF_CSRF_ENABLED = True
 
+    #: Количество записей на странице списков сотрудников, команд и составов команд
+    MEMBER_PAGE_SIZE = 100
+
+    #: Количество строк, которые читаются из базы за один раз в потоковом режиме (?stream=1)
+    MEMBER_STREAM_CHUNK_SIZE = 1000
+
+    #: Минимальный размер блока HTML (в символах), который отправляется клиенту в потоковом режиме
+    MEMBER_STREAM_BUFFER_SIZE = 16384
+
     # Опциональные настройки для Flask-Admin
     # FLASK_ADMIN_SWATCH = 'default'
     # FLASK_ADMIN_FLUID_LAYOUT = True
@@ -0,0 +1,115 @@
+# app/config/production.py
+"""
+Конфигурационный файл для рабочего (production) режима приложения Flask.
+
+Наследует настройки режима разработки и переопределяет параметры, важные для многопоточного
+сервера: режим журнала SQLite (WAL), размер кэша и mmap, ожидание блокировок, проверку внешних
+ключей и параметры пула соединений. Все значения можно переопределить в наследнике этого класса.
+
+Приложение с этой конфигурацией создается так::
+
+    flask --app "app:create_app('app.config.production.ProductionConfig')" run
+"""
+
+import os
+import logging
+
+from app.config.development import DevelopmentConfig
+
+
+class ProductionConfig(DevelopmentConfig):
+    """
+    Конфигурация для рабочего режима.
+
+    :cvar LOGGING_LEVEL: Уровень логирования для приложения.
+    :cvar LOG_QUEUE_ENABLED: Флаг записи логов через очередь и фоновый поток.
+    :cvar LOG_FORMAT: Формат файла логов ('text' или 'json').
+    :cvar SERVER_TIMING_HEADER: Флаг добавления заголовка Server-Timing к ответам.
+    :cvar LAZY_LOAD_DETECTION: Режим обнаружения повторных ленивых загрузок отношений.
+    :cvar SQLITE_PRAGMAS: PRAGMA-настройки, применяемые к каждому новому соединению SQLite.
+    :cvar SQLALCHEMY_ENGINE_OPTIONS: Параметры движка SQLAlchemy и пула соединений.
+    :cvar TEMPLATES_AUTO_RELOAD: Флаг проверки изменения файлов шаблонов при каждом рендере.
+    :cvar TEMPLATE_BYTECODE_CACHE_DIR: Директория файлового кэша байт-кода шаблонов Jinja.
+    :cvar TEMPLATE_PRECOMPILE: Флаг загрузки всех шаблонов при создании приложения.
+    :cvar ADMIN_LAZY_INIT: Флаг отложенной инициализации админки.
+    :cvar STARTUP_REPORT: Флаг записи в лог отчета о времени запуска.
+    :cvar ASSETS_BUNDLED: Флаг подключения собранных бандлов вместо исходных файлов.
+    :cvar PASSWORD_VERIFY_WORKERS: Количество потоков пула хэширования паролей.
+    :cvar LOGIN_THROTTLE_DB: Файл SQLite с состоянием лимитов попыток входа.
+    :cvar METRICS_DIR: Директория файлов метрик процессов для суммирования по воркерам.
+    """
+
+    #: Уровень логирования
+    LOGGING_LEVEL = logging.INFO
+
+    #: Запись логов через очередь: файл и консоль обслуживает фоновый поток, а не поток запроса
+    LOG_QUEUE_ENABLED = True
+
+    #: Файл логов в формате JSON Lines для загрузки в системы сбора логов
+    LOG_FORMAT = 'json'
+
+    #: Замеры запросов остаются включенными ради журнала медленных запросов, но их итоги
+    #: не передаются клиентам в заголовке Server-Timing
+    SERVER_TIMING_HEADER = False
+
+    #: Обнаружение ленивых загрузок отключено: повторные загрузки выявляются в разработке и на тестовом стенде
+    LAZY_LOAD_DETECTION = None
+
+    #: URI базы данных (можно переопределить переменной окружения DATABASE_URL)
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', DevelopmentConfig.SQLALCHEMY_DATABASE_URI)
+
+    #: PRAGMA-настройки SQLite, применяемые при открытии каждого соединения (в указанном порядке):
+    #: - journal_mode=WAL: читатели не блокируются пишущей транзакцией;
+    #: - synchronous=NORMAL: в режиме WAL безопасно и заметно быстрее FULL;
+    #: - mmap_size: чтение страниц базы через отображение в память (256 МБ);
+    #: - cache_size: кэш страниц на соединение, отрицательное значение задается в КиБ (64 МБ);
+    #: - busy_timeout: сколько миллисекунд ждать снятия блокировки вместо ошибки "database is locked";
+    #: - foreign_keys: проверка внешних ключей (в SQLite по умолчанию выключена).
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'busy_timeout': 5000,
+        'foreign_keys': 'ON',
+    }
+
+    #: Параметры пула соединений для многопоточного сервера: одно соединение на рабочий поток
+    #: плюс запас на пики. check_same_thread отключен, так как соединения переходят между потоками через пул.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'connect_args': {'check_same_thread': False},
+    }
+
+    #: Шаблоны не меняются без перезапуска приложения, поэтому файлы не проверяются при каждом рендере
+    TEMPLATES_AUTO_RELOAD = False
+
+    #: Кэш байт-кода шаблонов, общий для всех процессов и сохраняющийся между перезапусками
+    #: (находится на одном уровне с папкой app)
+    TEMPLATE_BYTECODE_CACHE_DIR = os.path.join(DevelopmentConfig.BASEDIR, '..', '..', 'jinja_cache')
+
+    #: Все шаблоны загружаются при создании приложения, до первого запроса
+    TEMPLATE_PRECOMPILE = True
+
+    #: Админка создается при запуске воркера, чтобы первый запрос не ждал ее инициализации
+    #: (команды CLI откладывают ее до первого запроса и в этом режиме)
+    ADMIN_LAZY_INIT = False
+
+    #: Время запуска каждого воркера пишется в лог
+    STARTUP_REPORT = True
+
+    #: Страницы подключают собранные бандлы (перед запуском выполняется flask build-assets)
+    ASSETS_BUNDLED = True
+
+    #: Хэширование паролей занимает не больше двух ядер процессора, остальные обслуживают другие страницы
+    PASSWORD_VERIFY_WORKERS = 2
+
+    #: Лимиты попыток входа общие для всех воркеров (файл находится на одном уровне с папкой app)
+    LOGIN_THROTTLE_DB = os.path.join(DevelopmentConfig.BASEDIR, '..', '..', 'throttle', 'login.db')
+
+    #: Метрики каждого воркера записываются в свой файл, маршрут /metrics суммирует их по всем воркерам
+    #: (директорию следует очищать при развертывании)
+    METRICS_DIR = os.path.join(DevelopmentConfig.BASEDIR, '..', '..', 'metrics')
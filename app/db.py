@@ -5,9 +5,63 @@
 Этот модуль создает глобальный объект `db`, который используется для взаимодействия с базой данных
 через ORM (Object-Relational Mapping) подход, предоставляемый библиотекой SQLAlchemy. Этот объект
 будет использоваться в других частях приложения для определения моделей и выполнения запросов к базе данных.
+
+Также модуль содержит функцию `configure_engine`, которая применяет PRAGMA-настройки SQLite
+из конфигурации приложения к каждому новому соединению, и функцию `init_migrate`, которая
+подключает Flask-Migrate.
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 # Создает экземпляр SQLAlchemy, который используется для работы с базой данных в приложении.
 # Экземпляр SQLAlchemy, предоставляющий доступ к функциональности ORM для взаимодействия с базой данных.
 db = SQLAlchemy()
+
+
+def configure_engine(app):
+    """
+    Подключает обработчик, применяющий PRAGMA-настройки SQLite к каждому новому соединению.
+
+    Настройки берутся из ``SQLITE_PRAGMAS`` конфигурации приложения и выполняются в указанном порядке.
+    Для баз, отличных от SQLite, функция ничего не делает.
+
+    :param app: Приложение Flask, для движка которого применяются настройки.
+    :type app: Flask
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def init_migrate(app):
+    """
+    Подключает Flask-Migrate к приложению: регистрирует расширение и группу команд ``flask db``.
+
+    Flask-Migrate вместе с Alembic импортируется дольше всего остального приложения, поэтому
+    create_app вызывает эту функцию только при обращении к командам ``flask db``. Код, который
+    применяет миграции напрямую (``flask_migrate.upgrade``), должен вызвать ее сам.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    :return: Группа команд ``flask db``.
+    :rtype: click.Group
+    """
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    return app.cli.commands['db']
@@ -0,0 +1,114 @@
+# app/modules/admin/ajax.py
+"""
+Модуль с AJAX-загрузчиками и виджетами для полей выбора в административной панели.
+
+Используется для полей, в которых выбирается запись из большого справочника (команда, сотрудник).
+Вместо загрузки всего справочника в форму виджет Select2 запрашивает варианты у эндпоинта
+``<view>/ajax/lookup/`` Flask-Admin по мере ввода, постранично и по префиксу названия.
+
+Основные классы:
+- PrefixAjaxModelLoader: Загрузчик вариантов с поиском по префиксу, который может использовать индекс.
+- AjaxSelect2Widget: Виджет Select2, получающий варианты с сервера.
+"""
+from flask import url_for
+from flask_admin.form import Select2Widget
+from flask_admin.contrib.sqla.ajax import QueryAjaxModelLoader
+from flask_admin.model.ajax import DEFAULT_PAGE_SIZE
+
+
+class PrefixAjaxModelLoader(QueryAjaxModelLoader):
+    """
+    Загрузчик вариантов для Select2 с поиском по началу названия.
+
+    В отличие от стандартного загрузчика Flask-Admin, который ищет подстроку через ``ILIKE '%term%'``
+    и всегда читает таблицу целиком, этот загрузчик ищет по диапазону ``name >= term AND name < term + U+FFFF``.
+    Такое условие использует индекс по колонке названия, поэтому стоимость поиска не зависит от размера таблицы.
+    Поиск чувствителен к регистру.
+
+    :param name: Имя загрузчика (используется в параметре ``name`` запроса к ``ajax/lookup``).
+    :param session: Сессия SQLAlchemy.
+    :param model: Модель, из которой выбираются варианты.
+    :param options: Параметры загрузчика; ``fields`` должен содержать одну колонку названия.
+    """
+
+    def __init__(self, name, session, model, **options):
+        super(PrefixAjaxModelLoader, self).__init__(name, session, model, **options)
+
+        #: Колонка, по которой выполняется поиск и сортировка вариантов
+        self.name_field = self._cached_fields[0]
+
+        #: Количество вариантов на одной странице выпадающего списка
+        self.page_size = options.get('page_size', DEFAULT_PAGE_SIZE)
+
+    def format(self, model):
+        """
+        Возвращает пару (идентификатор, название) для отображения в Select2.
+
+        :param model: Экземпляр модели или None.
+        :return: Кортеж (id, название) или None.
+        """
+        if not model:
+            return None
+
+        return getattr(model, self.pk), getattr(model, self.name_field.key)
+
+    def get_list(self, term, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        Возвращает страницу вариантов, название которых начинается с ``term``.
+
+        :param term: Введенный пользователем префикс названия.
+        :type term: str
+        :param offset: Смещение от начала выборки.
+        :type offset: int
+        :param limit: Количество вариантов на странице (не больше ``page_size``).
+        :type limit: int
+        :return: Список экземпляров модели.
+        :rtype: list
+        """
+        query = self.get_query()
+
+        if term:
+            query = query.filter(self.name_field >= term, self.name_field < term + '\uffff')
+
+        limit = min(limit or self.page_size, self.page_size)
+        return query.order_by(self.name_field).offset(offset or 0).limit(limit).all()
+
+    def get_choices(self, *pks):
+        """
+        Возвращает варианты выбора только для указанных идентификаторов.
+
+        Используется формой, чтобы показать уже выбранные значения, не загружая весь справочник.
+
+        :param pks: Идентификаторы записей; пустые значения пропускаются.
+        :return: Список пар (id, название).
+        :rtype: list
+        """
+        pks = [pk for pk in pks if pk]
+        if not pks:
+            return []
+
+        pk_field = getattr(self.model, self.pk)
+        rows = self.session.query(pk_field, self.name_field).filter(pk_field.in_(pks)).all()
+        return [tuple(row) for row in rows]
+
+
+class AjaxSelect2Widget(Select2Widget):
+    """
+    Виджет Select2, который загружает варианты с эндпоинта ``ajax/lookup`` текущего представления.
+
+    :param loader_name: Имя загрузчика из ``form_ajax_refs`` представления.
+    :type loader_name: str
+    :param page_size: Количество вариантов на одной странице выпадающего списка.
+    :type page_size: int
+    """
+
+    def __init__(self, loader_name, page_size=DEFAULT_PAGE_SIZE, **kwargs):
+        super(AjaxSelect2Widget, self).__init__(**kwargs)
+        self.loader_name = loader_name
+        self.page_size = page_size
+
+    def __call__(self, field, **kwargs):
+        kwargs['data-role'] = 'select2-ajax'
+        kwargs['data-url'] = url_for('.ajax_lookup', name=self.loader_name)
+        kwargs['data-page-size'] = self.page_size
+        return super(AjaxSelect2Widget, self).__call__(field, **kwargs)
@@ -0,0 +1,99 @@
+# app/modules/admin/import_views.py
+"""
+Модуль с представлением административной панели для массового импорта данных из файлов.
+
+Загруженный файл CSV или JSON Lines читается потоково и передается в :mod:`utils.bulk_import`.
+Отклоненные строки сохраняются в директорию IMPORT_REJECTS_DIR и доступны для скачивания
+со страницы импорта.
+
+Основные классы:
+- ImportForm: Форма загрузки файла.
+- ImportAdmin: Представление с формой импорта и скачиванием файла отклоненных строк.
+"""
+import io
+import os
+import uuid
+
+from flask import current_app, send_from_directory, abort
+from flask_admin import BaseView, expose
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired
+from wtforms import SelectField
+from wtforms.validators import DataRequired
+from werkzeug.utils import secure_filename
+
+from app.modules.admin.views import AdminAccessMixin
+from utils.bulk_import import FileEncodingError, detect_format, import_file
+from utils.logging import log_and_flash
+
+
+class ImportForm(FlaskForm):
+    """
+    Форма загрузки файла для массового импорта.
+
+    :param entity: Импортируемая сущность.
+    :type entity: SelectField
+    :param file: Файл CSV или JSON Lines.
+    :type file: FileField
+    """
+    entity = SelectField('Что импортировать', choices=[
+        ('staff', 'Сотрудники (Staff)'),
+        ('team', 'Команды (Team)'),
+        ('team_set', 'Составы команд (TeamSet)'),
+    ], validators=[DataRequired()])
+    file = FileField('Файл (.csv или .jsonl)', validators=[FileRequired()])
+
+
+class ImportAdmin(AdminAccessMixin, BaseView):
+    """
+    Представление административной панели для массового импорта данных.
+
+    Доступ разрешен только авторизованным пользователям с ролью 'admin' (см. :class:`AdminAccessMixin`).
+    """
+
+    @expose('/', methods=('GET', 'POST'))
+    def index(self):
+        """
+        Страница с формой импорта. После загрузки файла показывает итог импорта.
+        """
+        form = ImportForm()
+        result = None
+
+        if form.validate_on_submit():
+            upload = form.file.data
+            entity = form.entity.data
+            try:
+                fmt = detect_format(upload.filename)
+            except ValueError as error:
+                log_and_flash(str(error), 'danger')
+                return self.render('admin/import.html', form=form, result=None)
+
+            rejects_dir = current_app.config['IMPORT_REJECTS_DIR']
+            os.makedirs(rejects_dir, exist_ok=True)
+            rejects_name = f'{entity}-{uuid.uuid4().hex}.rejected.{fmt}'
+
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+            try:
+                result = import_file(entity, stream, fmt, os.path.join(rejects_dir, rejects_name))
+            except FileEncodingError as error:
+                log_and_flash('Файл %s отклонен: %s', 'danger', secure_filename(upload.filename), error)
+                return self.render('admin/import.html', form=form, result=None)
+            if result.rejects_path:
+                result = result._replace(rejects_path=rejects_name)
+
+            log_and_flash('Импорт %s из %s: добавлено %s, отклонено %s', 'info',
+                          entity, secure_filename(upload.filename), result.inserted, result.rejected)
+
+        return self.render('admin/import.html', form=form, result=result)
+
+    @expose('/rejected/<filename>')
+    def rejected(self, filename):
+        """
+        Отдает файл отклоненных строк.
+
+        :param filename: Имя файла в директории IMPORT_REJECTS_DIR.
+        :type filename: str
+        """
+        if filename != secure_filename(filename) or '.rejected.' not in filename:
+            abort(404)
+        return send_from_directory(current_app.config['IMPORT_REJECTS_DIR'], filename, as_attachment=True)
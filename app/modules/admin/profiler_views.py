@@ -0,0 +1,85 @@
+# app/modules/admin/profiler_views.py
+"""
+Модуль с представлением административной панели для просмотра профилей запросов.
+
+Профили записывает :mod:`utils.profiler` для запросов администратора с параметром ``?_profile=1``
+(или заголовком ``X-Profile``). Страница списка показывает последние профили, страница профиля -
+дерево вызовов с долей времени каждого узла и таблицу самых долгих функций; файл статистики
+можно скачать для просмотра в snakeviz или pstats.
+
+Основные классы:
+- ProfilerAdmin: Представление со списком профилей, деревом вызовов и скачиванием файла статистики.
+"""
+import os
+
+from flask import request, current_app, send_file, abort
+from flask_admin import BaseView, expose
+
+from app.modules.admin.views import AdminAccessMixin
+from utils.profiler import PROFILE_ID_RE, PROFILE_QUERY_ARG, call_tree, get_profile_store, top_functions
+
+
+class ProfilerAdmin(AdminAccessMixin, BaseView):
+    """
+    Представление административной панели для просмотра профилей запросов.
+
+    Доступ разрешен только авторизованным пользователям с ролью 'admin' (см. :class:`AdminAccessMixin`).
+    """
+
+    def is_visible(self):
+        """
+        Показывает раздел в меню, только если профилирование включено.
+
+        :rtype: bool
+        """
+        return 'profile_store' in current_app.extensions
+
+    def _meta_or_404(self, profile_id):
+        if 'profile_store' not in current_app.extensions or not PROFILE_ID_RE.match(profile_id):
+            abort(404)
+        meta = get_profile_store().meta(profile_id)
+        if meta is None:
+            abort(404)
+        return meta
+
+    @expose('/')
+    def index(self):
+        """
+        Список последних профилей.
+        """
+        profiles = get_profile_store().list() if 'profile_store' in current_app.extensions else []
+        return self.render('admin/profiler.html', profiles=profiles, query_arg=PROFILE_QUERY_ARG)
+
+    @expose('/<profile_id>/')
+    def details(self, profile_id):
+        """
+        Дерево вызовов и самые долгие функции профиля.
+
+        :param profile_id: Идентификатор профиля.
+        :type profile_id: str
+        """
+        meta = self._meta_or_404(profile_id)
+        sort = 'tottime' if request.args.get('sort') == 'tottime' else 'cumulative'
+        try:
+            stats = get_profile_store().stats(profile_id)
+        except FileNotFoundError:
+            abort(404)
+        root = os.path.dirname(current_app.root_path) + os.sep
+        return self.render(
+            'admin/profiler_details.html', meta=meta, sort=sort, total_ms=stats.total_tt * 1000,
+            tree=call_tree(stats, root), functions=top_functions(stats, root, sort)
+        )
+
+    @expose('/<profile_id>/download')
+    def download(self, profile_id):
+        """
+        Отдает файл статистики профиля (формат pstats).
+
+        :param profile_id: Идентификатор профиля.
+        :type profile_id: str
+        """
+        self._meta_or_404(profile_id)
+        path = get_profile_store().stats_path(profile_id)
+        if not os.path.exists(path):
+            abort(404)
+        return send_file(path, as_attachment=True, download_name=f'{profile_id}.prof')
@@ -0,0 +1,46 @@
+# app/modules/admin/setup.py
+"""
+Создание и регистрация административной панели Flask-Admin.
+
+Представления админки (и сам Flask-Admin) импортируются внутри :func:`init_admin`, поэтому
+при отложенной инициализации (``ADMIN_LAZY_INIT``) процессы, которые не обслуживают запросы,
+например CLI-команды, их не загружают.
+"""
+
+
+def init_admin(app):
+    """
+    Создает административную панель и регистрирует ее представления.
+
+    При ``ADMIN_LAZY_INIT`` формы и списки колонок каждого ModelView строятся при первом
+    обращении к этому представлению.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    :return: Экземпляр Flask-Admin.
+    :rtype: flask_admin.Admin
+    """
+    from flask_admin import Admin
+
+    from app.db import db
+    from app.modules.admin.views import MyAdminIndexView
+    from app.modules.admin.user_views import UserAdmin
+    from app.modules.admin.staff_views import StaffAdmin
+    from app.modules.admin.team_views import TeamAdmin
+    from app.modules.admin.team_set_views import TeamSetAdmin
+    from app.modules.admin.import_views import ImportAdmin
+    from app.modules.admin.profiler_views import ProfilerAdmin
+    from app.modules.user.models import User
+    from app.modules.staff.models import Staff
+    from app.modules.team.models import Team
+    from app.modules.team_set.models import TeamSet
+
+    lazy = app.config['ADMIN_LAZY_INIT']
+    admin = Admin(app, name='Admin', template_mode='bootstrap4', base_template='admin/base.html', index_view=MyAdminIndexView())
+    admin.add_view(UserAdmin(User, db.session, endpoint='users_admin', name='User', lazy_scaffolding=lazy))
+    admin.add_view(TeamAdmin(Team, db.session, endpoint='team_admin', name='Team', lazy_scaffolding=lazy))
+    admin.add_view(StaffAdmin(Staff, db.session, endpoint='staff_admin', name='Staff', lazy_scaffolding=lazy))
+    admin.add_view(TeamSetAdmin(TeamSet, db.session, endpoint='team_set_admin', name='TeamSet', lazy_scaffolding=lazy))
+    admin.add_view(ImportAdmin(endpoint='import_admin', name='Import'))
+    admin.add_view(ProfilerAdmin(endpoint='profiler_admin', name='Profiler'))
+    return admin
@@ -7,6 +7,7 @@
 1. Отображение списка сотрудников с возможностью фильтрации, сортировки и поиска.
 2. Форматирование отображаемых данных, включая использование виджетов для ввода дат и времени.
 3. Обработка создания и редактирования записей сотрудников с автоматическим добавлением текущей даты и времени.
+4. Вывод агрегатов по составам команд (количество записей и суммарный FTE), вычисляемых в SQL-запросе списка.
 """
 from datetime import datetime
 
@@ -14,7 +15,13 @@ from flask_admin.form import DatePickerWidget, DateTimePickerWidget
 from wtforms import DateField, DateTimeField
 from wtforms.validators import DataRequired
 
+from flask_admin.contrib.sqla import filters
+
+from app.db import db
 from app.modules.admin.views import MyModelView
+from app.modules.staff.models import Staff
+# Агрегаты Staff.team_sets_count и Staff.fte_total объявляются в модуле моделей TeamSet
+import app.modules.team_set.models  # noqa: F401
 
 
 class StaffAdmin(MyModelView):
@@ -35,7 +42,7 @@ class StaffAdmin(MyModelView):
     can_view_details = True
 
     #: Список колонок, отображаемых в административной панели
-    column_list = ['id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active', 'team_sets_count']
+    column_list = ['id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active', 'team_sets_count', 'fte_total']
 
     #: Колонки, по которым можно производить поиск
     column_searchable_list = ['staff_name']
@@ -44,11 +51,24 @@ class StaffAdmin(MyModelView):
     column_default_sort = ('id', True)
 
     #: Колонки, по которым можно сортировать
-    column_sortable_list = ['id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active']
+    column_sortable_list = ['id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active', 'team_sets_count', 'fte_total']
+
+    #: Фильтры по агрегатам. Задаются явно по SQL-выражению подзапроса, так как у вычисляемой
+    #: колонки нет таблицы и Flask-Admin не может построить для нее фильтр по имени.
+    column_filters = [
+        filters.IntEqualFilter(Staff.team_sets_count.expression, 'BD Links'),
+        filters.IntGreaterFilter(Staff.team_sets_count.expression, 'BD Links'),
+        filters.IntSmallerFilter(Staff.team_sets_count.expression, 'BD Links'),
+        filters.FloatGreaterFilter(Staff.fte_total.expression, 'FTE'),
+        filters.FloatSmallerFilter(Staff.fte_total.expression, 'FTE')
+    ]
+
+    #: Вычисляемые колонки не редактируются через форму
+    form_excluded_columns = ['team_sets_count', 'fte_total']
 
     #: Форматирование в колонках административной панели
     column_formatters = {
-        'team_sets_count': lambda view, context, model, name: view.team_sets_count(model),
+        'fte_total': lambda v, c, m, p: round(m.fte_total, 2),
         'staff_date': lambda v, c, m, p: m.staff_date.strftime('%d.%m.%Y') if m.staff_date else '',
         'staff_datetime': lambda v, c, m, p: m.staff_datetime.strftime('%d.%m.%Y %H:%M') if m.staff_datetime else '',
         'staff_active': lambda v, c, m, p: 'Да' if m.staff_active else 'Нет'
@@ -85,7 +105,8 @@ class StaffAdmin(MyModelView):
         'staff_date': 'Дата',
         'staff_datetime': 'Дата&Время',
         'staff_active': 'Активный?',
-        'team_sets_count': 'BD Links'
+        'team_sets_count': 'BD Links',
+        'fte_total': 'FTE'
     }
 
     def __init__(self, model, session, **kwargs):
@@ -98,16 +119,16 @@ class StaffAdmin(MyModelView):
         """
         super(StaffAdmin, self).__init__(model, session, **kwargs)
 
-    @staticmethod
-    def team_sets_count(obj):
+    def get_query(self):
         """
-        Возвращает количество наборов команды для сотрудника.
+        Возвращает запрос для списка сотрудников вместе с агрегатами по составам команд.
+
+        Количество записей TeamSet и суммарный FTE вычисляются подзапросами в том же SELECT,
+        поэтому страница списка загружается одним запросом без обращения к team_sets каждой записи.
 
-        :param obj: Экземпляр модели сотрудника.
-        :return: Количество наборов команды у сотрудника.
-        :rtype: int
+        :return: Запрос SQLAlchemy для списка сотрудников.
         """
-        return len(obj.team_sets)
+        return super(StaffAdmin, self).get_query().options(db.undefer_group('team_set_aggregates'))
 
     def create_form(self, obj=None):
         """
@@ -5,7 +5,7 @@
 Основные функции:
 1. Отображение и управление записями TeamSet в административной панели.
 2. Обеспечение поиска, сортировки и фильтрации данных по ключевым полям (команда, сотрудник, процент утилизации).
-3. Поддержка удобных виджетов выбора (Select2) для полей команды и сотрудника.
+3. Поддержка удобных виджетов выбора (Select2) для полей команды и сотрудника с загрузкой вариантов по AJAX.
 4. Форматирование отображаемых данных, таких как имена команд и сотрудников, для лучшего представления.
 5. Обработка создания и редактирования записей TeamSet через административную панель.
 
@@ -14,13 +14,19 @@
 - TeamSetAdmin: Административное представление модели TeamSet, включая настройку отображения колонок, фильтров, сортировки и виджетов для удобного ввода данных.
 """
 
-from flask_admin.form import Select2Widget
 from wtforms import FloatField, SelectField, Form
 from wtforms.validators import DataRequired
 
+from app.db import db
+from app.modules.admin.ajax import PrefixAjaxModelLoader, AjaxSelect2Widget
 from app.modules.admin.views import MyModelView
 from app.modules.staff.models import Staff
 from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet
+
+
+#: Количество вариантов на одной странице выпадающих списков команды и сотрудника
+AJAX_PAGE_SIZE = 20
 
 
 class TeamSetForm(Form):
@@ -28,12 +34,14 @@ class TeamSetForm(Form):
     Форма для создания и редактирования набора команд (TeamSet) в административной панели.
 
     Поля формы:
-    - team_id: Выбор команды из связанных записей модели Team.
-    - staff_id: Выбор сотрудника из связанных записей модели Staff.
+    - team_id: Выбор команды из связанных записей модели Team (варианты загружаются по AJAX).
+    - staff_id: Выбор сотрудника из связанных записей модели Staff (варианты загружаются по AJAX).
     - fte: Процент времени (FTE), который сотрудник тратит на работу в команде.
     """
-    team_id = SelectField('Team', widget=Select2Widget(), coerce=int, validators=[DataRequired()])
-    staff_id = SelectField('Staff', widget=Select2Widget(), coerce=int, validators=[DataRequired()])
+    team_id = SelectField('Team', widget=AjaxSelect2Widget('team', page_size=AJAX_PAGE_SIZE), coerce=int,
+                          validators=[DataRequired()])
+    staff_id = SelectField('Staff', widget=AjaxSelect2Widget('staff', page_size=AJAX_PAGE_SIZE), coerce=int,
+                           validators=[DataRequired()])
     fte = FloatField('FTE')
 
 
@@ -55,6 +63,10 @@ class TeamSetAdmin(MyModelView):
     #: Список колонок, отображаемых в административной панели
     column_list = ['id', 'team_name', 'staff_name', 'fte']
 
+    #: Отношения, загружаемые вместе со страницей списка (joinedload): форматтеры колонок обращаются
+    #: к model.team и model.staff, и без этого каждая строка выполняет по два отдельных запроса
+    column_select_related_list = [TeamSet.team, TeamSet.staff]
+
     #: Колонки, по которым можно производить поиск
     column_searchable_list = ['team.team_name', 'staff.staff_name']
 
@@ -83,6 +95,12 @@ class TeamSetAdmin(MyModelView):
 
     form = TeamSetForm
 
+    #: Загрузчики вариантов для полей выбора команды и сотрудника (эндпоинт ajax/lookup)
+    form_ajax_refs = {
+        'team': PrefixAjaxModelLoader('team', db.session, Team, fields=['team_name'], page_size=AJAX_PAGE_SIZE),
+        'staff': PrefixAjaxModelLoader('staff', db.session, Staff, fields=['staff_name'], page_size=AJAX_PAGE_SIZE)
+    }
+
     def __init__(self, model, session, **kwargs):
         """
         Инициализирует административную панель для модели TeamSet.
@@ -96,14 +114,18 @@ class TeamSetAdmin(MyModelView):
 
     def _populate_choices(self, form):
         """
-        Заполняет список доступных вариантов для полей выбора команды и сотрудника.
+        Заполняет список вариантов для полей выбора команды и сотрудника.
+
+        В форму попадают только выбранные значения (из редактируемой записи или из отправленных данных),
+        остальные варианты виджет Select2 запрашивает по AJAX. Поэтому стоимость рендера формы
+        не зависит от размера справочников.
 
         :param form: Форма, в которой необходимо обновить варианты выбора.
         :return: Обновленная форма с заполненными списками вариантов для полей team_id и staff_id.
         """
 
-        form.team_id.choices = [(0, 'Select a team')] + [(team.id, team.team_name) for team in self.session.query(Team).all()]
-        form.staff_id.choices = [(0, 'Select a staff')] + [(staff.id, staff.staff_name) for staff in self.session.query(Staff).all()]
+        form.team_id.choices = [(0, 'Select a team')] + self._form_ajax_refs['team'].get_choices(form.team_id.data)
+        form.staff_id.choices = [(0, 'Select a staff')] + self._form_ajax_refs['staff'].get_choices(form.staff_id.data)
         return form
 
     def create_form(self, obj=None):
@@ -3,7 +3,13 @@
 """
 Этот файл отвечает за настройку административной панели Flask-Admin для управления командами (Team).
 """
+from flask_admin.contrib.sqla import filters
+
+from app.db import db
 from app.modules.admin.views import MyModelView
+from app.modules.team.models import Team
+# Агрегаты Team.team_sets_count и Team.fte_total объявляются в модуле моделей TeamSet
+import app.modules.team_set.models  # noqa: F401
 
 
 class TeamAdmin(MyModelView):
@@ -12,7 +18,7 @@ class TeamAdmin(MyModelView):
     can_view_details = True
 
     #: Список колонок, отображаемых в административной панели
-    column_list = ['id', 'team_name', 'team_sets_count']
+    column_list = ['id', 'team_name', 'team_sets_count', 'fte_total']
 
     #: Колонки, по которым можно производить поиск
     column_searchable_list = ['team_name']
@@ -21,30 +27,44 @@ class TeamAdmin(MyModelView):
     column_default_sort = ('id', True)
 
     #: Колонки, по которым можно сортировать
-    column_sortable_list = ['id', 'team_name']
+    column_sortable_list = ['id', 'team_name', 'team_sets_count', 'fte_total']
+
+    #: Фильтры по агрегатам. Задаются явно по SQL-выражению подзапроса, так как у вычисляемой
+    #: колонки нет таблицы и Flask-Admin не может построить для нее фильтр по имени.
+    column_filters = [
+        filters.IntEqualFilter(Team.team_sets_count.expression, 'BD Links'),
+        filters.IntGreaterFilter(Team.team_sets_count.expression, 'BD Links'),
+        filters.IntSmallerFilter(Team.team_sets_count.expression, 'BD Links'),
+        filters.FloatGreaterFilter(Team.fte_total.expression, 'FTE'),
+        filters.FloatSmallerFilter(Team.fte_total.expression, 'FTE')
+    ]
+
+    #: Вычисляемые колонки не редактируются через форму
+    form_excluded_columns = ['team_sets_count', 'fte_total']
 
     column_formatters = {
-        'team_sets_count': lambda view, context, model, name: view.team_sets_count(model)
+        'fte_total': lambda view, context, model, name: round(model.fte_total, 2)
     }
 
     #: Переопределение названий колонок для удобства пользователя
     column_labels = {
         'id': 'ID',
         'team_name': 'Название команды',
-        'team_sets_count': 'BD Links'
+        'team_sets_count': 'BD Links',
+        'fte_total': 'FTE'
     }
 
-    @staticmethod
-    def team_sets_count(obj):
+    def get_query(self):
         """
-        Возвращает количество наборов команды для указанного объекта команды.
+        Возвращает запрос для списка команд вместе с агрегатами по составам команд.
+
+        Количество записей TeamSet и суммарный FTE вычисляются подзапросами в том же SELECT,
+        поэтому страница списка загружается одним запросом без обращения к team_sets каждой записи.
 
-        :param obj: Экземпляр модели команды.
-        :return: Количество наборов команды.
-        :rtype: int
+        :return: Запрос SQLAlchemy для списка команд.
         """
 
-        return len(obj.team_sets)
+        return super(TeamAdmin, self).get_query().options(db.undefer_group('team_set_aggregates'))
 
     def __init__(self, model, session, **kwargs):
         super(TeamAdmin, self).__init__(model, session, **kwargs)
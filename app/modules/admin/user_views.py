@@ -12,7 +12,6 @@ from app.modules.admin.views import MyModelView
 from wtforms import StringField, SelectField, PasswordField
 from wtforms.validators import DataRequired, Email, Length, EqualTo
 from flask_admin.form import Select2Widget
-from werkzeug.security import generate_password_hash
 
 
 class UserAdmin(MyModelView):
@@ -100,7 +99,7 @@ class UserAdmin(MyModelView):
         """
         if form.password.data:
             # Если введен новый пароль, хешируем его и сохраняем
-            model.password_hash = generate_password_hash(form.password.data)
+            model.set_password(form.password.data)
 
         # Явно сохраняем роль пользователя
         if form.role.data:
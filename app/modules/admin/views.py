@@ -4,6 +4,8 @@
 
 Используется для организации и управления маршрутами (routes) и обработчиками запросов, связанными с этим модулем.
 """
+import threading
+
 from flask import redirect, request, url_for, render_template, current_app
 from flask_login import current_user
 from flask_admin.contrib.sqla import ModelView
@@ -12,24 +14,19 @@ from sqlalchemy.exc import IntegrityError
 from utils.logging import log_and_flash
 
 
-class MyModelView(ModelView):
+class AdminAccessMixin:
     """
-        Класс для управления моделями через Flask-Admin.
+    Проверка доступа к представлениям административной панели.
 
-        Этот класс настраивает доступ к страницам управления моделями в административной панели.
-        Доступ разрешен только авторизованным пользователям с ролью 'admin'.
+    Доступ разрешен только авторизованным пользователям с ролью 'admin'; остальные получают
+    flash-сообщение ``access_denied_message`` и перенаправляются на страницу входа.
+    Класс указывается в списке базовых классов перед классом представления Flask-Admin.
 
-        Методы:
-            is_accessible() -> bool:
-                Проверяет, доступен ли данный интерфейс для текущего пользователя.
-
-            inaccessible_callback(name: str, **kwargs):
-                Перенаправляет на страницу входа, если доступ к панели запрещен.
-        """
+    :cvar access_denied_message: Сообщение пользователю, которому доступ запрещен.
+    """
 
-    # page_size = 100
-    # action_disallowed_list = ['delete', ]
-    # can_view_details = True  # show a modal dialog with records details
+    #: Сообщение пользователю, которому доступ запрещен
+    access_denied_message = 'Доступ к разделам админки вам запрещен!'
 
     def is_accessible(self):
         """
@@ -42,8 +39,7 @@ class MyModelView(ModelView):
         """
         if current_user.is_authenticated and current_user.role == 'admin':
             return True
-        log_and_flash('Доступ к разделам админки вам запрещен!', 'danger')
-
+        log_and_flash(self.access_denied_message, 'danger')
         return False
 
     def inaccessible_callback(self, name, **kwargs):
@@ -58,6 +54,62 @@ class MyModelView(ModelView):
         """
         return redirect(url_for('login.login', next=request.path))
 
+
+class MyModelView(AdminAccessMixin, ModelView):
+    """
+        Класс для управления моделями через Flask-Admin.
+
+        Этот класс настраивает доступ к страницам управления моделями в административной панели.
+        Доступ разрешен только авторизованным пользователям с ролью 'admin'.
+
+        Методы:
+            is_accessible() -> bool:
+                Проверяет, доступен ли данный интерфейс для текущего пользователя.
+
+            inaccessible_callback(name: str, **kwargs):
+                Перенаправляет на страницу входа, если доступ к панели запрещен.
+
+        При ``lazy_scaffolding=True`` формы, списки колонок и фильтры строятся не в конструкторе,
+        а при первом обращении к представлению.
+        """
+
+    # page_size = 100
+    # action_disallowed_list = ['delete', ]
+    # can_view_details = True  # show a modal dialog with records details
+
+    def __init__(self, model, session, lazy_scaffolding=False, **kwargs):
+        """
+        :param model: Модель SQLAlchemy.
+        :param session: Сессия SQLAlchemy.
+        :param lazy_scaffolding: Отложить построение форм и списков колонок до первого обращения к представлению.
+        :type lazy_scaffolding: bool
+        :param kwargs: Дополнительные параметры ModelView.
+        """
+        self.lazy_scaffolding = lazy_scaffolding
+        self._scaffold_lock = threading.Lock()
+        super(MyModelView, self).__init__(model, session, **kwargs)
+
+    def _refresh_cache(self):
+        """
+        Строит формы, списки колонок и фильтры (при отложенной инициализации - только после первого обращения).
+        """
+        if self.lazy_scaffolding:
+            # Конструктор ModelView строит автоматические join по списку колонок; он будет построен позже
+            self._list_columns = []
+            return
+        super(MyModelView, self)._refresh_cache()
+
+    def _handle_view(self, name, **kwargs):
+        abort = super(MyModelView, self)._handle_view(name, **kwargs)
+        if abort is None and self.lazy_scaffolding:
+            with self._scaffold_lock:
+                if self.lazy_scaffolding:
+                    super(MyModelView, self)._refresh_cache()
+                    if not self.column_select_related_list:
+                        self._auto_joins = self.scaffold_auto_joins()
+                    self.lazy_scaffolding = False
+        return abort
+
     def is_action_allowed(self, name):
         """
         Проверяет, разрешены ли массовые действия (bulk actions). В данном случае все массовые действия отключены.
@@ -80,9 +132,9 @@ class MyModelView(ModelView):
         :type is_created: bool
         """
         if is_created:
-            current_app.logger.info(f'Запись {model} была успешно создана.')
+            current_app.logger.info('Запись %s была успешно создана.', model)
         else:
-            current_app.logger.info(f'Запись {model} была обновлена.')
+            current_app.logger.info('Запись %s была обновлена.', model)
 
     def after_model_delete(self, model):
         """
@@ -91,11 +143,11 @@ class MyModelView(ModelView):
         :param model: Модель, которая будет удалена.
         :type model: SQLAlchemy модель
         """
-        current_app.logger.warning(f'Запись {model} была удалена.')
+        current_app.logger.warning('Запись %s была удалена.', model)
 
 
 
-class MyAdminIndexView(AdminIndexView):
+class MyAdminIndexView(AdminAccessMixin, AdminIndexView):
     """
         Класс для настройки главной страницы административной панели.
 
@@ -110,31 +162,7 @@ class MyAdminIndexView(AdminIndexView):
                 Перенаправляет на страницу входа, если доступ к панели запрещен.
         """
 
-    def is_accessible(self):
-        """
-        Определяет, доступен ли данный интерфейс для текущего пользователя.
-
-        Доступ разрешен только авторизованным пользователям с ролью 'admin'.
-
-        :return: True, если пользователь авторизован и имеет роль 'admin', иначе False.
-        :rtype: bool
-        """
-        if current_user.is_authenticated and current_user.role == 'admin':
-            return True
-        log_and_flash('Доступ в админку вам запрещен!', 'danger')
-        return False
-
-    def inaccessible_callback(self, name, **kwargs):
-        """
-        Перенаправляет пользователя на страницу входа, если доступ запрещен.
-
-        :param name: Имя вызванного действия.
-        :type name: str
-        :param kwargs: Дополнительные параметры.
-        :return: Перенаправление на страницу входа.
-        :rtype: werkzeug.wrappers.Response
-        """
-        return redirect(url_for('login.login', next=request.path))
+    access_denied_message = 'Доступ в админку вам запрещен!'
 
     @expose('/')
     def index(self):
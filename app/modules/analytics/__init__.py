@@ -0,0 +1,4 @@
+# app/modules/analytics/__init__.py
+"""
+This is the configuration package. It contains the configuration files for the application.
+"""
\ No newline at end of file
@@ -0,0 +1,216 @@
+# app/modules/analytics/engine.py
+"""
+Модуль для расчета аналитики загрузки сотрудников (FTE) по составам команд.
+
+Все записи TeamSet (team_id, staff_id, fte) читаются из базы одним запросом в компактный
+структурированный массив NumPy: строки курсора DBAPI передаются в ``np.fromiter`` напрямую, без
+построения объектов Row SQLAlchemy. Идентификаторы переводятся в плотные индексы через ``np.unique``,
+после чего все сводные показатели считаются векторно (``np.bincount`` с весами и ``np.histogram``),
+без циклов Python по записям. Названия команд и сотрудников загружаются только для тех записей,
+которые попадают в итоговые списки.
+
+Результат расчета запоминается в процессе с ключом по версиям таблиц TeamSet, Staff и Team
+(см. :mod:`utils.data_versions`) и параметрам расчета: пока таблицы не изменились, повторные
+запросы любых пользователей не обращаются к базе данных.
+
+Основные функции:
+- load_allocations: Загружает записи TeamSet в массив NumPy.
+- compute_fte_analytics: Считает сводные показатели и возвращает их в виде, готовом для JSON.
+- cached_fte_analytics: Возвращает запомненный результат compute_fte_analytics для текущих версий таблиц.
+"""
+import numpy as np
+from flask import current_app
+
+from app.db import db
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet
+from utils.data_versions import current_versions
+
+#: Тип элемента массива записей TeamSet
+ALLOCATION_DTYPE = np.dtype([('team_id', np.int32), ('staff_id', np.int32), ('fte', np.float64)])
+
+
+def load_allocations():
+    """
+    Загружает все записи TeamSet в структурированный массив NumPy.
+
+    :return: Массив с полями team_id, staff_id и fte.
+    :rtype: numpy.ndarray
+    """
+    result = db.session.connection().exec_driver_sql(
+        f'SELECT team_id, staff_id, fte FROM {TeamSet.__table__.name}'
+    )
+    try:
+        # Кортежи курсора DBAPI читаются без обработки строк SQLAlchemy
+        return np.fromiter(result.cursor, dtype=ALLOCATION_DTYPE)
+    finally:
+        result.close()
+
+
+def _active_staff_ids():
+    """
+    Возвращает идентификаторы активных сотрудников.
+
+    :rtype: numpy.ndarray
+    """
+    rows = db.session.execute(db.select(Staff.id).where(Staff.staff_active.is_(True))).scalars()
+    return np.fromiter(rows, dtype=np.int32)
+
+
+def _names(model, name_column, ids):
+    """
+    Возвращает словарь названий для указанных идентификаторов.
+
+    :param model: Модель (Staff или Team).
+    :param name_column: Колонка с названием.
+    :param ids: Идентификаторы записей.
+    :rtype: dict
+    """
+    if not len(ids):
+        return {}
+    rows = db.session.execute(db.select(model.id, name_column).where(model.id.in_(ids.tolist())))
+    return {row_id: name for row_id, name in rows}
+
+
+def _histogram(values, edges):
+    """
+    Считает гистограмму значений по интервалам ``[edges[i], edges[i + 1])``.
+
+    Последний интервал открыт справа: в него попадают все значения не меньше ``edges[-1]``.
+
+    :param values: Значения.
+    :type values: numpy.ndarray
+    :param edges: Возрастающие границы интервалов.
+    :type edges: list
+    :return: Подписи интервалов и количество значений в каждом из них.
+    :rtype: dict
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 1)
+    counts = np.bincount(bins, minlength=len(edges))
+    labels = [f'{low:g}–{high:g}' for low, high in zip(edges[:-1], edges[1:])] + [f'≥{edges[-1]:g}']
+    return {'labels': labels, 'counts': counts.tolist()}
+
+
+def _member_list(ids, totals, names, order, limit):
+    """
+    Формирует список сотрудников с суммарным FTE в заданном порядке.
+
+    :rtype: list[dict]
+    """
+    order = order[:limit]
+    return [
+        {'id': int(ids[i]), 'name': names.get(int(ids[i])), 'fte': round(float(totals[i]), 4)}
+        for i in order
+    ]
+
+
+def compute_fte_analytics(target_fte=1.0, tolerance=0.01, list_limit=50, team_limit=30, histogram_edges=None,
+                          headcount_edges=None):
+    """
+    Считает аналитику загрузки сотрудников и команд.
+
+    Показатели:
+
+    - ``teams``: численность (число различных сотрудников) и суммарный FTE ``team_limit`` команд
+      с наибольшим суммарным FTE;
+    - ``over_allocated``: сотрудники с суммарным FTE больше ``target_fte + tolerance``;
+    - ``under_allocated``: активные сотрудники с суммарным FTE меньше ``target_fte - tolerance``
+      (включая сотрудников без единой записи в составах команд);
+    - ``histograms``: распределения суммарного FTE сотрудников, FTE записей и численности команд
+      (по интервалам ``headcount_edges``).
+
+    :param target_fte: Целевая загрузка сотрудника.
+    :type target_fte: float
+    :param tolerance: Допустимое отклонение от целевой загрузки.
+    :type tolerance: float
+    :param list_limit: Максимальная длина списков пере- и недогруженных сотрудников.
+    :type list_limit: int
+    :param team_limit: Количество команд в показателе ``teams``.
+    :type team_limit: int
+    :param histogram_edges: Границы интервалов гистограммы FTE.
+    :type histogram_edges: list
+    :param headcount_edges: Границы интервалов гистограммы численности команд.
+    :type headcount_edges: list
+    :return: Словарь с показателями, готовый для сериализации в JSON.
+    :rtype: dict
+    """
+    if histogram_edges is None:
+        histogram_edges = [0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
+    if headcount_edges is None:
+        headcount_edges = [1, 2, 3, 5, 10, 20, 50, 100]
+
+    allocations = load_allocations()
+    active_ids = _active_staff_ids()
+
+    # Плотные индексы сотрудников: все сотрудники из составов команд и все активные сотрудники
+    staff_ids, staff_inverse = np.unique(
+        np.concatenate([allocations['staff_id'], active_ids]), return_inverse=True
+    )
+    staff_idx = staff_inverse[:len(allocations)]
+    team_ids, team_idx = np.unique(allocations['team_id'], return_inverse=True)
+
+    fte = allocations['fte']
+    staff_fte = np.bincount(staff_idx, weights=fte, minlength=len(staff_ids))
+    team_fte = np.bincount(team_idx, weights=fte, minlength=len(team_ids))
+
+    # Численность команды - число различных пар (команда, сотрудник), сгруппированных по команде
+    pairs = np.unique(team_idx.astype(np.int64) * len(staff_ids) + staff_idx)
+    team_headcount = np.bincount(pairs // max(len(staff_ids), 1), minlength=len(team_ids))
+
+    over = np.flatnonzero(staff_fte > target_fte + tolerance)
+    over = over[np.argsort(-staff_fte[over], kind='stable')]
+
+    is_active = np.isin(staff_ids, active_ids)
+    under = np.flatnonzero(is_active & (staff_fte < target_fte - tolerance))
+    under = under[np.argsort(staff_fte[under], kind='stable')]
+
+    # Команды с наибольшим суммарным FTE: график не показывает больше team_limit столбцов
+    top_teams = np.argsort(-team_fte, kind='stable')[:team_limit]
+
+    listed = np.concatenate([over[:list_limit], under[:list_limit]])
+    staff_names = _names(Staff, Staff.staff_name, staff_ids[listed])
+    team_names = _names(Team, Team.team_name, team_ids[top_teams])
+
+    return {
+        'totals': {
+            'allocations': int(len(allocations)),
+            'staff': int(len(staff_ids)),
+            'teams': int(len(team_ids)),
+            'fte': round(float(fte.sum()), 4),
+            'over_allocated': int(len(over)),
+            'under_allocated': int(len(under)),
+        },
+        'teams': {
+            'ids': team_ids[top_teams].tolist(),
+            'names': [team_names.get(team_id) for team_id in team_ids[top_teams].tolist()],
+            'headcount': team_headcount[top_teams].tolist(),
+            'fte': np.round(team_fte[top_teams], 4).tolist(),
+        },
+        'over_allocated': _member_list(staff_ids, staff_fte, staff_names, over, list_limit),
+        'under_allocated': _member_list(staff_ids, staff_fte, staff_names, under, list_limit),
+        'histograms': {
+            'staff_fte': _histogram(staff_fte, histogram_edges),
+            'allocation_fte': _histogram(fte, histogram_edges),
+            'team_headcount': _histogram(team_headcount, headcount_edges),
+        },
+    }
+
+
+def cached_fte_analytics(**kwargs):
+    """
+    Возвращает результат :func:`compute_fte_analytics`, запомненный для текущих версий таблиц
+    TeamSet, Staff и Team и тех же параметров. Процесс хранит только последний результат.
+
+    :param kwargs: Параметры :func:`compute_fte_analytics`.
+    :return: Словарь с показателями.
+    :rtype: dict
+    """
+    key = (current_versions((TeamSet, Staff, Team)), tuple(sorted(kwargs.items())))
+    cached = current_app.extensions.get('fte_analytics')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    result = compute_fte_analytics(**kwargs)
+    current_app.extensions['fte_analytics'] = (key, result)
+    return result
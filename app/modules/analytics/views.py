@@ -0,0 +1,52 @@
+# app/modules/analytics/views.py
+"""
+Модуль с пользовательскими классами для страницы аналитики загрузки сотрудников (FTE).
+
+Страница содержит только разметку графиков: данные для Chart.js загружаются отдельным запросом
+к эндпоинту ``/analytics/data/`` в формате JSON.
+Используется для организации и управления маршрутами (routes) и обработчиками запросов, связанными с этим модулем.
+"""
+from flask import Blueprint, render_template, jsonify, current_app
+from flask_login import login_required
+
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet
+from utils.data_versions import conditional_response
+
+blueprint = Blueprint('analytics', __name__, url_prefix='/analytics')
+
+
+@blueprint.route('/')
+@login_required
+def analytics():
+    """
+    Страница с графиками загрузки сотрудников и команд.
+
+    :return: HTML-код страницы аналитики.
+    :rtype: str
+    """
+    title = 'Аналитика FTE'
+    return render_template('member/analytics/index.html', title=title)
+
+
+@blueprint.route('/data/')
+@login_required
+@conditional_response(TeamSet, Staff, Team)
+def analytics_data():
+    """
+    Сводные показатели загрузки сотрудников и команд в формате JSON.
+
+    :return: JSON с показателями (см. :func:`compute_fte_analytics`).
+    :rtype: flask.Response
+    """
+    # NumPy импортируется при первом обращении к аналитике, а не при запуске приложения
+    from app.modules.analytics.engine import cached_fte_analytics
+
+    config = current_app.config
+    return jsonify(cached_fte_analytics(
+        target_fte=config['ANALYTICS_TARGET_FTE'],
+        tolerance=config['ANALYTICS_FTE_TOLERANCE'],
+        list_limit=config['ANALYTICS_LIST_LIMIT'],
+        team_limit=config['ANALYTICS_TEAM_LIMIT'],
+    ))
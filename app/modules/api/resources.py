@@ -0,0 +1,152 @@
+# app/modules/api/resources.py
+"""
+Описание ресурсов JSON API и построение запросов по параметрам клиента.
+
+Каждый ресурс описывает модель, доступные поля (колонки и вычисляемые колонки из сводных таблиц),
+поля по умолчанию и связи, которые можно встроить в ответ. Запрос строится так, чтобы из базы
+читались только запрошенные поля (``load_only``), а встроенные объекты загружались одним
+дополнительным запросом на связь (``selectinload``), тоже только с запрошенными полями.
+
+Основные классы и функции:
+- Resource, Relation: Описание ресурса и его связи.
+- RESOURCES: Ресурсы API по именам.
+- ApiError: Ошибка в параметрах запроса.
+- build_query: Строит запрос ORM по выбранным полям и встраиваемым связям.
+- serialize: Преобразует объект модели в словарь с выбранными полями.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+
+from app.db import db
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet, TeamAllocationSummary, StaffAllocationSummary
+
+#: Связь ресурса: атрибут модели, имя связанного ресурса и колонки модели, нужные для загрузки связи
+Relation = namedtuple('Relation', ['attribute', 'resource', 'required'])
+
+#: Ресурс API: модель, доступные поля, поля по умолчанию, встраиваемые связи и таблицы,
+#: от которых зависят ответы (для ETag, см. :mod:`utils.data_versions`)
+Resource = namedtuple('Resource', ['model', 'fields', 'default_fields', 'relations', 'tables'])
+
+#: Ресурсы API по именам (имя используется в URL и в параметрах fields[<связь>])
+RESOURCES = {
+    'staff': Resource(
+        model=Staff,
+        fields=('id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active',
+                'team_sets_count', 'team_count', 'fte_total'),
+        default_fields=('id', 'staff_name', 'staff_date', 'staff_datetime', 'staff_active'),
+        relations={'team_sets': Relation(Staff.team_sets, 'team_sets', ())},
+        tables=(Staff, TeamSet, StaffAllocationSummary),
+    ),
+    'teams': Resource(
+        model=Team,
+        fields=('id', 'team_name', 'team_sets_count', 'headcount', 'fte_total'),
+        default_fields=('id', 'team_name'),
+        relations={'team_sets': Relation(Team.team_sets, 'team_sets', ())},
+        tables=(Team, TeamSet, TeamAllocationSummary),
+    ),
+    'team_sets': Resource(
+        model=TeamSet,
+        fields=('id', 'team_id', 'staff_id', 'fte'),
+        default_fields=('id', 'team_id', 'staff_id', 'fte'),
+        relations={
+            'team': Relation(TeamSet.team, 'teams', (TeamSet.team_id,)),
+            'staff': Relation(TeamSet.staff, 'staff', (TeamSet.staff_id,)),
+        },
+        tables=(TeamSet, Team, Staff, TeamAllocationSummary, StaffAllocationSummary),
+    ),
+}
+
+
+class ApiError(ValueError):
+    """
+    Ошибка в параметрах запроса к API (неизвестное поле или связь, некорректное значение).
+    """
+
+
+def parse_list(value):
+    """
+    Разбирает список значений, перечисленных через запятую.
+
+    :param value: Строка вида ``a,b,c`` или None.
+    :rtype: list[str]
+    """
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def select_fields(resource, requested):
+    """
+    Проверяет запрошенные поля ресурса и возвращает их (или поля по умолчанию). Поле id возвращается всегда.
+
+    :param resource: Ресурс.
+    :type resource: Resource
+    :param requested: Запрошенные поля.
+    :type requested: list[str]
+    :rtype: list[str]
+    :raises ApiError: Если запрошено неизвестное поле.
+    """
+    unknown = [field for field in requested if field not in resource.fields]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    fields = requested or list(resource.default_fields)
+    return ['id'] + [field for field in fields if field != 'id']
+
+
+def _load_columns(model, fields):
+    return [getattr(model, field) for field in fields if field != 'id']
+
+
+def build_query(resource, fields, embed):
+    """
+    Строит запрос ORM, который читает только выбранные поля и встраиваемые связи.
+
+    :param resource: Ресурс.
+    :type resource: Resource
+    :param fields: Выбранные поля ресурса.
+    :type fields: list[str]
+    :param embed: Встраиваемые связи и выбранные поля связанных ресурсов.
+    :type embed: dict
+    :return: Запрос SQLAlchemy (Query).
+    """
+    model = resource.model
+    columns = _load_columns(model, fields)
+    options = []
+
+    for name, related_fields in embed.items():
+        relation = resource.relations[name]
+        related = RESOURCES[relation.resource]
+        # Колонки внешнего ключа нужны, чтобы связь «многие к одному» загружалась одним запросом
+        columns.extend(column for column in relation.required if column not in columns)
+        options.append(
+            db.selectinload(relation.attribute).load_only(*_load_columns(related.model, related_fields), raiseload=True)
+        )
+
+    return db.session.query(model).options(db.load_only(*columns, raiseload=True), *options)
+
+
+def _value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def serialize(obj, fields, embed=None):
+    """
+    Преобразует объект модели в словарь с выбранными полями и встроенными связями.
+
+    :param obj: Объект модели.
+    :param fields: Выбранные поля.
+    :type fields: list[str]
+    :param embed: Встроенные связи и их поля.
+    :type embed: dict
+    :rtype: dict
+    """
+    data = {field: _value(getattr(obj, field)) for field in fields}
+    for name, related_fields in (embed or {}).items():
+        related = getattr(obj, name)
+        if isinstance(related, list):
+            data[name] = [serialize(item, related_fields) for item in related]
+        else:
+            data[name] = serialize(related, related_fields) if related is not None else None
+    return data
@@ -0,0 +1,153 @@
+# app/modules/api/views.py
+"""
+Модуль с маршрутами версионированного JSON API только для чтения (версия 1).
+
+Ресурсы: ``/api/v1/staff/``, ``/api/v1/teams/``, ``/api/v1/team_sets/`` и ``/api/v1/<ресурс>/<id>``.
+
+Параметры запроса:
+
+- ``fields=a,b`` - поля ресурса (из базы читаются только они, поле id возвращается всегда);
+- ``embed=team,staff`` - встроенные связанные объекты (загружаются через selectinload);
+- ``fields[<связь>]=a,b`` - поля встроенных объектов;
+- ``cursor=<id>`` и ``limit=<n>`` - постраничная выборка по курсору (ответ содержит ``next_cursor``);
+- ``ids=1,2,3`` - выборка по списку идентификаторов (ответ содержит ``missing``).
+
+Доступ разрешен только авторизованным пользователям; без авторизации возвращается 401.
+Ответы содержат заголовки ETag и Last-Modified; при неизменных данных возвращается 304.
+"""
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+
+from app.modules.api.resources import RESOURCES, ApiError, build_query, parse_list, select_fields, serialize
+from utils.data_versions import conditional_response
+from utils.pagination import keyset_page
+
+blueprint = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+@blueprint.before_request
+def require_login():
+    """
+    Возвращает 401 в формате JSON вместо перенаправления на страницу входа.
+    """
+    if not current_user.is_authenticated:
+        return jsonify(error='Требуется авторизация'), 401
+
+
+@blueprint.errorhandler(ApiError)
+def api_error(error):
+    """
+    Возвращает ошибку в параметрах запроса в формате JSON.
+    """
+    return jsonify(error=str(error)), 400
+
+
+def _parse_request(resource_name):
+    """
+    Разбирает параметры fields, embed и fields[<связь>] запроса.
+
+    :param resource_name: Имя ресурса.
+    :type resource_name: str
+    :return: Ресурс, выбранные поля и словарь встраиваемых связей с их полями.
+    :rtype: tuple
+    :raises ApiError: Если указаны неизвестные поля или связи.
+    """
+    resource = RESOURCES[resource_name]
+    fields = select_fields(resource, parse_list(request.args.get('fields')))
+
+    embed = {}
+    for name in parse_list(request.args.get('embed')):
+        relation = resource.relations.get(name)
+        if relation is None:
+            raise ApiError(f'Неизвестная связь: {name}')
+        embed[name] = select_fields(RESOURCES[relation.resource], parse_list(request.args.get(f'fields[{name}]')))
+
+    return resource, fields, embed
+
+
+def _int_list(value, name):
+    try:
+        return [int(item) for item in parse_list(value)]
+    except ValueError:
+        raise ApiError(f'Параметр {name} должен содержать целые числа через запятую')
+
+
+def _int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        raise ApiError(f'Параметр {name} должен быть целым числом')
+
+
+def _list(resource_name):
+    """
+    Возвращает страницу ресурса по курсору или записи по списку идентификаторов.
+    """
+    resource, fields, embed = _parse_request(resource_name)
+    query = build_query(resource, fields, embed)
+    model = resource.model
+    max_page_size = current_app.config['API_MAX_PAGE_SIZE']
+
+    if 'ids' in request.args:
+        ids = _int_list(request.args['ids'], 'ids')
+        if len(ids) > max_page_size:
+            raise ApiError(f'В параметре ids можно указать не больше {max_page_size} идентификаторов')
+        items = query.filter(model.id.in_(ids)).order_by(model.id).all() if ids else []
+        found = {item.id for item in items}
+        return jsonify(
+            data=[serialize(item, fields, embed) for item in items],
+            missing=[item_id for item_id in dict.fromkeys(ids) if item_id not in found]
+        )
+
+    limit = _int_arg('limit', current_app.config['API_PAGE_SIZE'])
+    if not 1 <= limit <= max_page_size:
+        raise ApiError(f'Параметр limit должен быть от 1 до {max_page_size}')
+    items, next_cursor = keyset_page(query, model.id, _int_arg('cursor', 0), limit)
+    return jsonify(data=[serialize(item, fields, embed) for item in items], next_cursor=next_cursor)
+
+
+def _detail(resource_name, item_id):
+    """
+    Возвращает одну запись ресурса по идентификатору.
+    """
+    resource, fields, embed = _parse_request(resource_name)
+    item = build_query(resource, fields, embed).filter(resource.model.id == item_id).one_or_none()
+    if item is None:
+        return jsonify(error='Запись не найдена'), 404
+    return jsonify(data=serialize(item, fields, embed))
+
+
+@blueprint.route('/staff/')
+@conditional_response(*RESOURCES['staff'].tables)
+def staff_list():
+    return _list('staff')
+
+
+@blueprint.route('/staff/<int:item_id>')
+@conditional_response(*RESOURCES['staff'].tables)
+def staff_detail(item_id):
+    return _detail('staff', item_id)
+
+
+@blueprint.route('/teams/')
+@conditional_response(*RESOURCES['teams'].tables)
+def team_list():
+    return _list('teams')
+
+
+@blueprint.route('/teams/<int:item_id>')
+@conditional_response(*RESOURCES['teams'].tables)
+def team_detail(item_id):
+    return _detail('teams', item_id)
+
+
+@blueprint.route('/team_sets/')
+@conditional_response(*RESOURCES['team_sets'].tables)
+def team_set_list():
+    return _list('team_sets')
+
+
+@blueprint.route('/team_sets/<int:item_id>')
+@conditional_response(*RESOURCES['team_sets'].tables)
+def team_set_detail(item_id):
+    return _detail('team_sets', item_id)
@@ -6,6 +6,7 @@
 """
 from flask import Blueprint, render_template, request
 from utils.logging import log_and_flash
+from utils.metrics import record_error
 
 # Создаем Blueprint для модуля error с префиксом '/error'
 blueprint = Blueprint('error', __name__, url_prefix='/error')
@@ -31,7 +32,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 404.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 404: {request.url} не найдена', 'danger')
+        record_error(404)
+        log_and_flash('Ошибка 404: %s не найдена', 'danger', request.url)
 
         return render_template('member/errors.html', error_type=404, error_message="Page not found"), 404
 
@@ -47,7 +49,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 500.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 500: {request.url}', 'danger')
+        record_error(500)
+        log_and_flash('Ошибка 500: %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=500, error_message="Internal server error"), 500
 
     @app.errorhandler(400)
@@ -62,7 +65,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 400.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 400: Некорректный запрос на {request.url}', 'danger')
+        record_error(400)
+        log_and_flash('Ошибка 400: Некорректный запрос на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=400, error_message="Bad Request"), 400
 
     @app.errorhandler(401)
@@ -77,7 +81,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 401.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 401: Неавторизованный доступ на {request.url}', 'danger')
+        record_error(401)
+        log_and_flash('Ошибка 401: Неавторизованный доступ на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=401, error_message="Unauthorized"), 401
 
     @app.errorhandler(403)
@@ -92,7 +97,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 403.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 403: Доступ запрещен на {request.url}', 'danger')
+        record_error(403)
+        log_and_flash('Ошибка 403: Доступ запрещен на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=403, error_message="Forbidden"), 403
 
     @app.errorhandler(405)
@@ -107,7 +113,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 405.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 405: Метод не разрешен на {request.url}', 'danger')
+        record_error(405)
+        log_and_flash('Ошибка 405: Метод не разрешен на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=405, error_message="Method Not Allowed"), 405
 
     @app.errorhandler(409)
@@ -122,7 +129,8 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 409.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 409: Конфликт на {request.url}', 'danger')
+        record_error(409)
+        log_and_flash('Ошибка 409: Конфликт на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=409, error_message="Conflict"), 409
 
     @app.errorhandler(422)
@@ -137,5 +145,23 @@ def register_error_handlers(app):
         :return: Сгенерированный HTML-код страницы ошибки 422.
         :rtype: tuple (str, int)
         """
-        log_and_flash(f'Ошибка 422: Необрабатываемый запрос на {request.url}', 'danger')
+        record_error(422)
+        log_and_flash('Ошибка 422: Необрабатываемый запрос на %s', 'danger', request.url)
         return render_template('member/errors.html', error_type=422, error_message="Unprocessable Entity"), 422
+
+    @app.errorhandler(503)
+    def service_unavailable_error(e):
+        """
+        Обработчик ошибки 503 - Service Unavailable.
+        Этот код ошибки указывает, что сервер временно перегружен (например, очередь проверки паролей заполнена).
+
+        :param e: Ошибка 503.
+        :type e: Exception
+
+        :return: Сгенерированный HTML-код страницы ошибки 503 и заголовок Retry-After.
+        :rtype: tuple (str, int, dict)
+        """
+        record_error(503)
+        log_and_flash('Ошибка 503: Сервис временно недоступен на %s', 'danger', request.url)
+        headers = {'Retry-After': str(e.retry_after)} if getattr(e, 'retry_after', None) else {}
+        return render_template('member/errors.html', error_type=503, error_message="Service Unavailable"), 503, headers
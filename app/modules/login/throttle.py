@@ -0,0 +1,79 @@
+# app/modules/login/throttle.py
+"""
+Ограничение частоты попыток входа по IP-адресу и по учетной записи.
+
+Проверка выполняется в начале обработки POST-запроса входа, до разбора формы, поиска пользователя
+и проверки хэша пароля. Запрос сверх лимита получает ответ 429 с заголовком Retry-After без записи
+в лог и flash-сообщения, поэтому перебор паролей не нагружает процессор хэшированием.
+
+- лимит ``ip`` ограничивает попытки с одного адреса (перебор по многим учетным записям);
+- лимит ``account`` ограничивает попытки входа в одну учетную запись (перебор с многих адресов);
+  после успешного входа он сбрасывается.
+
+Лимиты задаются настройкой ``LOGIN_THROTTLE_LIMITS``. Состояние хранится в памяти процесса или,
+если задан ``LOGIN_THROTTLE_DB``, в файле SQLite, общем для всех воркеров.
+"""
+import math
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+from utils.throttle import MemoryBucketStore, SqliteBucketStore, Throttle
+
+
+class LoginThrottled(TooManyRequests):
+    """
+    Превышен лимит попыток входа.
+    """
+
+    description = 'Слишком много попыток входа. Повторите попытку позже.'
+
+
+def init_login_throttle(app):
+    """
+    Создает ограничитель попыток входа по настройкам LOGIN_THROTTLE_*.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    if not app.config['LOGIN_THROTTLE_ENABLED']:
+        return
+    max_keys = app.config['LOGIN_THROTTLE_MAX_KEYS']
+    if app.config['LOGIN_THROTTLE_DB']:
+        store = SqliteBucketStore(app.config['LOGIN_THROTTLE_DB'], max_keys=max_keys)
+    else:
+        store = MemoryBucketStore(max_keys=max_keys)
+    app.extensions['login_throttle'] = Throttle(store, app.config['LOGIN_THROTTLE_LIMITS'])
+
+
+def _account_key():
+    return (request.form.get('email') or '').strip().lower()
+
+
+def throttle_login_attempt():
+    """
+    Учитывает попытку входа и прерывает запрос ответом 429, если лимит по IP-адресу
+    или по учетной записи исчерпан.
+
+    :raises LoginThrottled: Лимит исчерпан.
+    """
+    throttle = current_app.extensions.get('login_throttle')
+    if throttle is None:
+        return
+
+    wait = throttle.hit('ip', request.remote_addr)
+    account = _account_key()
+    if not wait and account:
+        wait = throttle.hit('account', account)
+    if wait:
+        raise LoginThrottled(retry_after=math.ceil(wait))
+
+
+def reset_account_throttle():
+    """
+    Сбрасывает лимит учетной записи после успешного входа.
+    """
+    throttle = current_app.extensions.get('login_throttle')
+    account = _account_key()
+    if throttle is not None and account:
+        throttle.reset('account', account)
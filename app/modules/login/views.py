@@ -9,10 +9,13 @@
 from flask import Blueprint, flash, redirect, render_template, request, url_for, current_app
 from flask_login import current_user, login_user, logout_user, login_required
 
+from app.db import db
 from app.modules.login.forms import LoginForm
+from app.modules.login.throttle import LoginThrottled, throttle_login_attempt, reset_account_throttle
 from app.modules.user.models import User
 
 from utils.logging import log_and_flash
+from utils.metrics import record_login
 
 # Создаем Blueprint для модуля login с префиксом '/login'
 blueprint = Blueprint('login', __name__, url_prefix='/login')
@@ -34,6 +37,14 @@ def login():
         log_and_flash('Пользователь уже авторизован!', 'warning')
         return redirect(url_for('index.index'))
 
+    # Лимит попыток проверяется до разбора формы, поиска пользователя и проверки пароля
+    if request.method == 'POST':
+        try:
+            throttle_login_attempt()
+        except LoginThrottled:
+            record_login('throttled')
+            raise
+
     form = LoginForm()
 
     if form.validate_on_submit():
@@ -41,19 +52,28 @@ def login():
         if user is None or not user.check_password(form.password.data):
             # Логирование неудачной попытки входа
             log_and_flash('Неудачная попытка входа: неправильный логин или пароль!', 'danger')
+            record_login('failure')
             return redirect(url_for('login.login'))
 
+        # Хэш, созданный с устаревшими параметрами, пересчитывается с текущими, пока известен пароль
+        if user.password_needs_rehash():
+            user.set_password(form.password.data)
+            db.session.commit()
+
         login_user(user, remember=form.remember_me.data)
+        reset_account_throttle()
+        record_login('success')
 
         # Логирование успешной авторизации
-        log_and_flash(f'Пользователь {user.user_email} успешно авторизовался!', 'success')
+        log_and_flash('Пользователь %s успешно авторизовался!', 'success', user.user_email)
         return redirect(url_for('profile.profile'))
 
     # Обработка ошибок валидации формы
     if form.errors:
+        record_login('invalid_form')
         for field, errors in form.errors.items():
             for error in errors:
-                log_and_flash(f"Ошибка в поле {getattr(form, field).label.text}: {error}", 'danger')
+                log_and_flash('Ошибка в поле %s: %s', 'danger', getattr(form, field).label.text, error)
 
     return render_template('member/login.html', title='Авторизация', form=form)
 
@@ -69,7 +89,6 @@ def logout():
     :return: Перенаправление на главную страницу.
     :rtype: werkzeug.wrappers.Response
     """
-    # current_app.logger.info(f'Пользователь {current_user.user_email} вышел из системы')
-    log_and_flash(f'Пользователь {current_user.user_email} вышел из системы', 'warning')
+    log_and_flash('Пользователь %s вышел из системы', 'warning', current_user.user_email)
     logout_user()
     return redirect(url_for('index.index'))
@@ -0,0 +1,4 @@
+# app/modules/metrics/__init__.py
+"""
+This is the configuration package. It contains the configuration files for the application.
+"""
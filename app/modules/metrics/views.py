@@ -0,0 +1,38 @@
+# app/modules/metrics/views.py
+"""
+Модуль с маршрутом вывода метрик приложения в текстовом формате Prometheus (``/metrics``).
+
+Доступ разрешен администраторам (как к админке) и сборщику метрик, передающему заголовок
+``Authorization: Bearer <METRICS_TOKEN>``. Остальные запросы получают 403.
+"""
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user
+
+from utils.metrics import CONTENT_TYPE
+
+# Создаем Blueprint для модуля metrics без префикса: сборщики ожидают путь /metrics
+blueprint = Blueprint('metrics', __name__)
+
+
+def _has_token():
+    token = current_app.config['METRICS_TOKEN']
+    header = request.headers.get('Authorization', '')
+    return bool(token) and header.startswith('Bearer ') and hmac.compare_digest(header[len('Bearer '):], token)
+
+
+@blueprint.route('/metrics')
+def metrics():
+    """
+    Возвращает метрики всех процессов приложения в текстовом формате Prometheus.
+
+    :return: Ответ с метриками.
+    :rtype: werkzeug.wrappers.Response
+    """
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        abort(404)
+    if not _has_token() and not (current_user.is_authenticated and current_user.role == 'admin'):
+        abort(403)
+    return Response(registry.expose(), content_type=CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
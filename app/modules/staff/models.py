@@ -25,7 +25,7 @@ class Staff(db.Model):
     __tablename__ = 'staff'
 
     id = db.Column(db.Integer, primary_key=True)
-    staff_name = db.Column(db.String, nullable=False)
+    staff_name = db.Column(db.String, nullable=False, index=True)
     staff_date = db.Column(db.Date, nullable=False)
     staff_datetime = db.Column(db.DateTime)
     staff_active = db.Column(db.Boolean, nullable=False)
@@ -4,20 +4,55 @@
 
 Используется для организации и управления маршрутами (routes) и обработчиками запросов, связанными с этим модулем.
 """
-from flask import Blueprint, render_template
+from flask import Blueprint
 from flask_login import login_required
 from app.modules.staff.models import Staff
+from app.modules.team_set.models import TeamSet, StaffAllocationSummary
 from app.db import db
+from utils.data_versions import conditional_response
+from utils.export import export_response
+from utils.pagination import render_member_list
 
 blueprint = Blueprint('staff', __name__, url_prefix='/staff')
 
+#: Таблицы, от которых зависят страница и выгрузка: агрегаты читаются из сводной таблицы,
+#: которая меняется вместе с TeamSet
+DATA_TABLES = (Staff, TeamSet, StaffAllocationSummary)
+
 
 @blueprint.route('/')
 @login_required
+@conditional_response(*DATA_TABLES)
 def staff():
     title = 'Сотрудники'
-    # Загружаем всех сотрудников с подгрузкой связанных записей TeamSet
-    staff_items = Staff.query.options(
-        db.joinedload(Staff.team_sets)  # Подгружаем связанные записи из TeamSet
-    ).all()
-    return render_template('member/staff/index.html', title=title, staff_items=staff_items)
+    # Количество команд считается подзапросом в том же SELECT, коллекция team_sets не загружается
+    query = Staff.query.options(
+        db.undefer(Staff.team_sets_count)
+    )
+    return render_member_list(
+        'member/staff/index.html', query, Staff.id, 'staff_items',
+        title=title, data_tables=DATA_TABLES
+    )
+
+
+@blueprint.route('/export.<fmt>')
+@login_required
+@conditional_response(*DATA_TABLES)
+def export(fmt):
+    """
+    Потоковая выгрузка сотрудников в формате CSV или JSON Lines (см. :mod:`utils.export`).
+
+    :param fmt: Формат выгрузки ('csv' или 'jsonl').
+    :type fmt: str
+    """
+    columns = {
+        'id': Staff.id,
+        'staff_name': Staff.staff_name,
+        'staff_date': Staff.staff_date,
+        'staff_datetime': Staff.staff_datetime,
+        'staff_active': Staff.staff_active,
+        'team_sets_count': Staff.team_sets_count.expression,
+        'team_count': Staff.team_count.expression,
+        'fte_total': Staff.fte_total.expression,
+    }
+    return export_response('staff', fmt, columns)
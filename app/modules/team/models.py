@@ -22,7 +22,7 @@ class Team(db.Model):
     __tablename__ = 'team'
 
     id = db.Column(db.Integer, primary_key=True)
-    team_name = db.Column(db.String, nullable=False)
+    team_name = db.Column(db.String, nullable=False, index=True)
 
     # Отношение "один ко многим" между Team и TeamSet.
     # back_populates указываем в единственном числе.
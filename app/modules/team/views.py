@@ -4,19 +4,51 @@
 
 Используется для организации и управления маршрутами (routes) и обработчиками запросов, связанными с этим модулем.
 """
-from flask import Blueprint, render_template
+from flask import Blueprint
 from flask_login import login_required
 from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet, TeamAllocationSummary
 from app.db import db
+from utils.data_versions import conditional_response
+from utils.export import export_response
+from utils.pagination import render_member_list
 
 blueprint = Blueprint('team', __name__, url_prefix='/team')
 
+#: Таблицы, от которых зависят страница и выгрузка: агрегаты читаются из сводной таблицы,
+#: которая меняется вместе с TeamSet
+DATA_TABLES = (Team, TeamSet, TeamAllocationSummary)
+
 
 @blueprint.route('/')
 @login_required
+@conditional_response(*DATA_TABLES)
 def team():
     title = 'Команды'
-    team_items = Team.query.options(
-        db.joinedload(Team.team_sets)  # Подгружаем связанные записи из TeamSet
-    ).all()
-    return render_template('member/team/index.html', title=title, team_items=team_items)
\ No newline at end of file
+    query = Team.query.options(
+        db.undefer(Team.team_sets_count)  # Количество сотрудников считается подзапросом в том же SELECT
+    )
+    return render_member_list(
+        'member/team/index.html', query, Team.id, 'team_items',
+        title=title, data_tables=DATA_TABLES
+    )
+
+
+@blueprint.route('/export.<fmt>')
+@login_required
+@conditional_response(*DATA_TABLES)
+def export(fmt):
+    """
+    Потоковая выгрузка команд в формате CSV или JSON Lines (см. :mod:`utils.export`).
+
+    :param fmt: Формат выгрузки ('csv' или 'jsonl').
+    :type fmt: str
+    """
+    columns = {
+        'id': Team.id,
+        'team_name': Team.team_name,
+        'team_sets_count': Team.team_sets_count.expression,
+        'headcount': Team.headcount.expression,
+        'fte_total': Team.fte_total.expression,
+    }
+    return export_response('team', fmt, columns)
@@ -15,8 +15,23 @@ Attributes:
 Определение отношений:
     team (relationship): Связь "многие к одному" с моделью Team, указывает на команду, к которой принадлежит состав.
     staff (relationship): Связь "многие к одному" с моделью Staff, указывает на сотрудника, входящего в состав команды.
+
+Сводные таблицы:
+    TeamAllocationSummary (team_allocation_summary): Количество записей, численность и суммарный FTE команды.
+    StaffAllocationSummary (staff_allocation_summary): Количество записей, число команд и суммарный FTE сотрудника.
+    Таблицы поддерживаются в актуальном состоянии обработчиками событий модуля app.modules.team_set.summary.
+
+Вычисляемые колонки:
+    Staff.team_sets_count, Team.team_sets_count (column_property): Количество записей TeamSet у сотрудника
+                              и у команды, читаемое из сводной таблицы по первичному ключу
+                              (загружаются только по db.undefer()).
+    Staff.fte_total, Team.fte_total (column_property): Суммарный FTE по записям TeamSet, читаемый так же.
+    Staff.team_count, Team.headcount (column_property): Число различных команд сотрудника и число
+                              различных сотрудников команды, читаемые так же.
 """
 from app.db import db
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
 
 
 class TeamSet(db.Model):
@@ -24,9 +39,15 @@ class TeamSet(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False, index=True)
     fte = db.Column(db.Float, nullable=False)
 
+    # Составной индекс (team_id, staff_id) обслуживает выборки по команде и по паре команда-сотрудник.
+    # Для выборок по сотруднику используется отдельный индекс по staff_id.
+    __table_args__ = (
+        db.Index('ix_team_set_team_id_staff_id', 'team_id', 'staff_id'),
+    )
+
     # Обратные отношения, задающие связь "многие к одному" с Team и Staff.
     # back_populates указываем во множественном числе.
     # Эти отношения обеспечивают доступ к родительским записям Team и Staff для каждой записи TeamSet.
@@ -37,3 +58,77 @@ class TeamSet(db.Model):
 
     def __repr__(self):
         return f"<TeamSet(id={self.id}, team_id={self.team_id}, staff_id={self.staff_id}"
+
+
+class TeamAllocationSummary(db.Model):
+    """
+    Сводные показатели состава команды. Строка есть только у команд, в составе которых есть записи.
+
+    :cvar team_id: Идентификатор команды.
+    :cvar allocation_count: Количество записей TeamSet команды.
+    :cvar headcount: Количество различных сотрудников в команде.
+    :cvar total_fte: Суммарный FTE по записям команды.
+    """
+    __tablename__ = 'team_allocation_summary'
+
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id', ondelete='CASCADE'), primary_key=True)
+    allocation_count = db.Column(db.Integer, nullable=False, default=0)
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    total_fte = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<TeamAllocationSummary(team_id={self.team_id}, headcount={self.headcount}, total_fte={self.total_fte})>"
+
+
+class StaffAllocationSummary(db.Model):
+    """
+    Сводные показатели загрузки сотрудника. Строка есть только у сотрудников, у которых есть записи TeamSet.
+
+    :cvar staff_id: Идентификатор сотрудника.
+    :cvar allocation_count: Количество записей TeamSet сотрудника.
+    :cvar team_count: Количество различных команд, в которых состоит сотрудник.
+    :cvar total_fte: Суммарный FTE по записям сотрудника.
+    """
+    __tablename__ = 'staff_allocation_summary'
+
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.id', ondelete='CASCADE'), primary_key=True)
+    allocation_count = db.Column(db.Integer, nullable=False, default=0)
+    team_count = db.Column(db.Integer, nullable=False, default=0)
+    total_fte = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<StaffAllocationSummary(staff_id={self.staff_id}, team_count={self.team_count}, total_fte={self.total_fte})>"
+
+
+def _summary_column(column, key_column, model_id, default):
+    """
+    Возвращает колонку сводной таблицы для column_property: подзапрос по первичному ключу сводной таблицы.
+
+    :param column: Колонка сводной таблицы.
+    :param key_column: Первичный ключ сводной таблицы (идентификатор команды или сотрудника).
+    :param model_id: Первичный ключ модели, к которой добавляется колонка.
+    :param default: Значение для записей, у которых нет строки в сводной таблице.
+    """
+    return db.column_property(
+        db.func.coalesce(
+            db.select(column).where(key_column == model_id).correlate_except(column.table).scalar_subquery(),
+            default
+        ),
+        deferred=True,
+        group='team_set_aggregates'
+    )
+
+
+# Агрегаты по записям TeamSet для сотрудника и для команды читаются из сводных таблиц
+# по первичному ключу, поэтому их стоимость не зависит от количества записей TeamSet,
+# и по ним можно сортировать и фильтровать в SQL.
+# Колонки отложенные (deferred) и объединены в группу 'team_set_aggregates': в запрос они
+# попадают только там, где явно запрошены через db.undefer() или db.undefer_group().
+# Объявлены здесь, а не в моделях Staff и Team, чтобы избежать циклического импорта.
+Staff.team_sets_count = _summary_column(StaffAllocationSummary.allocation_count, StaffAllocationSummary.staff_id, Staff.id, 0)
+Staff.team_count = _summary_column(StaffAllocationSummary.team_count, StaffAllocationSummary.staff_id, Staff.id, 0)
+Staff.fte_total = _summary_column(StaffAllocationSummary.total_fte, StaffAllocationSummary.staff_id, Staff.id, 0.0)
+
+Team.team_sets_count = _summary_column(TeamAllocationSummary.allocation_count, TeamAllocationSummary.team_id, Team.id, 0)
+Team.headcount = _summary_column(TeamAllocationSummary.headcount, TeamAllocationSummary.team_id, Team.id, 0)
+Team.fte_total = _summary_column(TeamAllocationSummary.total_fte, TeamAllocationSummary.team_id, Team.id, 0.0)
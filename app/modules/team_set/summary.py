@@ -0,0 +1,279 @@
+# app/modules/team_set/summary.py
+"""
+Модуль для поддержки сводных таблиц составов команд в актуальном состоянии.
+
+Сводные таблицы TeamAllocationSummary и StaffAllocationSummary обновляются инкрементально
+обработчиками событий ``after_insert``, ``after_update`` и ``after_delete`` модели TeamSet в той же
+транзакции, что и сама запись. Обработчики только накапливают изменения в сессии, а после flush
+каждая затронутая строка сводной таблицы обновляется одним запросом. Признак «первая/последняя
+запись пары команда-сотрудник», нужный для численности команды и числа команд сотрудника,
+проверяется по индексу (team_id, staff_id).
+
+Массовые операции, которые обходят ORM (``Query.delete()``, ``Query.update()``, ``executemany``
+через Core), события не вызывают. После них сводные таблицы нужно пересчитать командой
+``flask rebuild-allocation-summary``. Команда ``flask check-allocation-summary`` сравнивает
+сводные таблицы с данными TeamSet и завершается с ошибкой при расхождении.
+"""
+from collections import namedtuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from app.db import db
+from app.modules.team_set.models import TeamSet, TeamAllocationSummary, StaffAllocationSummary
+
+#: Допустимая погрешность при сравнении суммарного FTE (накапливается при инкрементальном обновлении)
+FTE_TOLERANCE = 1e-6
+
+#: Расхождение сводной таблицы с данными TeamSet
+SummaryMismatch = namedtuple('SummaryMismatch', ['table', 'key', 'field', 'expected', 'actual'])
+
+#: Сводная таблица, колонка ее ключа в TeamSet и колонка «число различных» для каждой стороны пары
+_SIDES = (
+    (TeamAllocationSummary, TeamSet.team_id, 'headcount'),
+    (StaffAllocationSummary, TeamSet.staff_id, 'team_count'),
+)
+
+
+def _record_delta(target, team_id, staff_id, count, fte):
+    """
+    Запоминает в сессии изменение записи TeamSet для пары команда-сотрудник.
+
+    Сводные таблицы обновляются один раз после flush (см. :func:`_apply_deltas`): при пакетной
+    вставке или удалении SQLAlchemy вызывает обработчики после выполнения всего пакета,
+    поэтому проверять наличие пары по базе в каждом обработчике нельзя.
+
+    :param target: Измененная запись TeamSet.
+    :param team_id: Идентификатор команды.
+    :param staff_id: Идентификатор сотрудника.
+    :param count: Изменение количества записей пары (+1, -1 или 0).
+    :param fte: Изменение суммарного FTE пары.
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    delta = session.info.setdefault('allocation_deltas', {}).setdefault((team_id, staff_id), [0, 0.0])
+    delta[0] += count
+    delta[1] += fte
+
+
+@event.listens_for(TeamSet, 'after_insert')
+def _team_set_inserted(mapper, connection, target):
+    _record_delta(target, target.team_id, target.staff_id, 1, target.fte)
+
+
+@event.listens_for(TeamSet, 'after_delete')
+def _team_set_deleted(mapper, connection, target):
+    _record_delta(target, target.team_id, target.staff_id, -1, -target.fte)
+
+
+@event.listens_for(TeamSet, 'after_update')
+def _team_set_updated(mapper, connection, target):
+    state = inspect(target)
+
+    def old_value(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    old_team_id, old_staff_id, old_fte = old_value('team_id'), old_value('staff_id'), old_value('fte')
+    if (old_team_id, old_staff_id, old_fte) == (target.team_id, target.staff_id, target.fte):
+        return
+
+    # Запись уходит из старой пары команда-сотрудник и добавляется в новую (или в ту же с другим FTE)
+    _record_delta(target, old_team_id, old_staff_id, -1, -old_fte)
+    _record_delta(target, target.team_id, target.staff_id, 1, target.fte)
+
+
+def _pair_count(connection, team_id, staff_id):
+    """
+    Возвращает количество записей TeamSet с указанной парой команда-сотрудник (по индексу).
+
+    :rtype: int
+    """
+    query = db.select(db.func.count()).where(TeamSet.team_id == team_id, TeamSet.staff_id == staff_id)
+    return connection.execute(query).scalar()
+
+
+def _update_summary(connection, summary, distinct_field, key, count, fte, distinct):
+    """
+    Прибавляет изменения к строке сводной таблицы, создавая ее при необходимости.
+
+    Строка удаляется, когда у нее не остается записей.
+
+    :param connection: Соединение, в транзакции которого выполнялся flush.
+    :param summary: Модель сводной таблицы.
+    :param distinct_field: Имя колонки с числом различных значений второй стороны пары.
+    :param key: Идентификатор команды или сотрудника.
+    :param count: Изменение количества записей.
+    :param fte: Изменение суммарного FTE.
+    :param distinct: Изменение числа различных пар.
+    """
+    table = summary.__table__
+    key_field = table.primary_key.columns.values()[0]
+    result = connection.execute(
+        table.update()
+        .where(key_field == key)
+        .values({
+            'allocation_count': table.c.allocation_count + count,
+            distinct_field: table.c[distinct_field] + distinct,
+            'total_fte': table.c.total_fte + fte,
+        })
+    )
+    if result.rowcount == 0:
+        if count > 0:
+            connection.execute(table.insert().values({
+                key_field.name: key,
+                'allocation_count': count,
+                distinct_field: distinct,
+                'total_fte': fte,
+            }))
+    elif count < 0:
+        connection.execute(table.delete().where(key_field == key, table.c.allocation_count <= 0))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_deltas(session, flush_context):
+    """
+    Применяет накопленные за flush изменения к сводным таблицам.
+
+    Для каждой затронутой пары команда-сотрудник по индексу считается количество ее записей после flush;
+    по нему и изменению количества определяется, появилась ли пара впервые или исчезла.
+    Изменения суммируются по командам и сотрудникам, и каждая строка сводной таблицы
+    обновляется одним запросом.
+    """
+    deltas = session.info.pop('allocation_deltas', None)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    per_side = ({}, {})
+    for (team_id, staff_id), (count, fte) in deltas.items():
+        distinct = 0
+        if count:
+            after = _pair_count(connection, team_id, staff_id)
+            distinct = int(after > 0) - int(after - count > 0)
+        for totals, key in zip(per_side, (team_id, staff_id)):
+            total = totals.setdefault(key, [0, 0.0, 0])
+            total[0] += count
+            total[1] += fte
+            total[2] += distinct
+
+    for (summary, _, distinct_field), totals in zip(_SIDES, per_side):
+        for key, (count, fte, distinct) in totals.items():
+            if count or fte or distinct:
+                _update_summary(connection, summary, distinct_field, key, count, fte, distinct)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_deltas(session):
+    session.info.pop('allocation_deltas', None)
+
+
+def _aggregate_query(key_column, other_column):
+    """
+    Возвращает запрос, который считает сводные показатели по данным TeamSet.
+
+    :param key_column: Колонка TeamSet, по которой группируются записи.
+    :param other_column: Колонка TeamSet, различные значения которой считаются.
+    """
+    return (
+        db.select(
+            key_column,
+            db.func.count(TeamSet.id),
+            db.func.count(db.distinct(other_column)),
+            db.func.sum(TeamSet.fte),
+        )
+        .group_by(key_column)
+    )
+
+
+def rebuild_allocation_summary(session):
+    """
+    Полностью пересчитывает сводные таблицы по данным TeamSet.
+
+    Пересчет выполняется в транзакции сессии, фиксация (commit) остается за вызывающим кодом.
+
+    :param session: Сессия SQLAlchemy.
+    :return: Количество строк в сводных таблицах команд и сотрудников.
+    :rtype: tuple
+    """
+    counts = []
+    for (summary, key_column, distinct_field), other_column in zip(_SIDES, (TeamSet.staff_id, TeamSet.team_id)):
+        table = summary.__table__
+        key_field = table.primary_key.columns.values()[0]
+        session.execute(table.delete())
+        result = session.execute(
+            table.insert().from_select(
+                [key_field.name, 'allocation_count', distinct_field, 'total_fte'],
+                _aggregate_query(key_column, other_column)
+            )
+        )
+        counts.append(result.rowcount)
+    return tuple(counts)
+
+
+def check_allocation_summary(session):
+    """
+    Сравнивает сводные таблицы с показателями, посчитанными по данным TeamSet.
+
+    :param session: Сессия SQLAlchemy.
+    :return: Список расхождений (пустой, если сводные таблицы актуальны).
+    :rtype: list[SummaryMismatch]
+    """
+    mismatches = []
+    for (summary, key_column, distinct_field), other_column in zip(_SIDES, (TeamSet.staff_id, TeamSet.team_id)):
+        table = summary.__table__
+        key_field = table.primary_key.columns.values()[0]
+        fields = ('allocation_count', distinct_field, 'total_fte')
+
+        expected = {row[0]: row[1:] for row in session.execute(_aggregate_query(key_column, other_column))}
+        actual = {
+            row[0]: row[1:]
+            for row in session.execute(db.select(key_field, *(table.c[field] for field in fields)))
+        }
+
+        for key in sorted(expected.keys() | actual.keys()):
+            expected_row = expected.get(key, (0, 0, 0.0))
+            actual_row = actual.get(key, (0, 0, 0.0))
+            for field, expected_value, actual_value in zip(fields, expected_row, actual_row):
+                if field == 'total_fte':
+                    equal = abs(expected_value - actual_value) <= FTE_TOLERANCE
+                else:
+                    equal = expected_value == actual_value
+                if not equal:
+                    mismatches.append(SummaryMismatch(table.name, key, field, expected_value, actual_value))
+    return mismatches
+
+
+@click.command('rebuild-allocation-summary')
+@with_appcontext
+def rebuild_allocation_summary_command():
+    """
+    Пересчитывает сводные таблицы составов команд по данным TeamSet.
+    """
+    teams, staff = rebuild_allocation_summary(db.session)
+    db.session.commit()
+    click.echo(f'Сводные таблицы пересчитаны: команд - {teams}, сотрудников - {staff}.')
+
+
+@click.command('check-allocation-summary')
+@with_appcontext
+def check_allocation_summary_command():
+    """
+    Проверяет соответствие сводных таблиц данным TeamSet и завершается с ошибкой при расхождении.
+    """
+    mismatches = check_allocation_summary(db.session)
+
+    if not mismatches:
+        click.echo('Сводные таблицы соответствуют данным TeamSet.')
+        return
+
+    for mismatch in mismatches:
+        click.echo(
+            f'{mismatch.table}[{mismatch.key}].{mismatch.field}: '
+            f'ожидалось {mismatch.expected}, в таблице {mismatch.actual}',
+            err=True
+        )
+    raise SystemExit(f'Найдено расхождений: {len(mismatches)}. Выполните flask rebuild-allocation-summary.')
@@ -6,22 +6,58 @@
 
 Используется для организации и управления маршрутами (routes) и обработчиками запросов, связанными с этим модулем.
 """
-from flask import Blueprint, render_template
+from flask import Blueprint
 from flask_login import login_required
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
 from app.modules.team_set.models import TeamSet
 from app.db import db
+from utils.data_versions import conditional_response
+from utils.export import export_response
+from utils.pagination import render_member_list
 
 blueprint = Blueprint('team_set', __name__, url_prefix='/team_set')
 
+#: Таблицы, от которых зависят страница и выгрузка (названия команд и имена сотрудников)
+DATA_TABLES = (TeamSet, Team, Staff)
+
 
 @blueprint.route('/')
 @login_required
+@conditional_response(*DATA_TABLES)
 def team_set():
     title = 'Состав команд'
-    # Загружаем все записи из TeamSet с подгрузкой связанных команд и сотрудников
-    team_set_items = TeamSet.query.options(
+    # Загружаем записи из TeamSet с подгрузкой связанных команд и сотрудников
+    query = TeamSet.query.options(
         db.joinedload(TeamSet.team),  # Подгружаем связанные данные из Team
         db.joinedload(TeamSet.staff)  # Подгружаем связанные данные из Staff
-    ).all()
+    )
+
+    return render_member_list(
+        'member/team_set/index.html', query, TeamSet.id, 'team_set_items',
+        title=title, data_tables=DATA_TABLES
+    )
+
+
+@blueprint.route('/export.<fmt>')
+@login_required
+@conditional_response(*DATA_TABLES)
+def export(fmt):
+    """
+    Потоковая выгрузка составов команд в формате CSV или JSON Lines (см. :mod:`utils.export`).
+
+    Названия команд и имена сотрудников присоединяются в том же запросе.
 
-    return render_template('member/team_set/index.html', title=title, team_set_items=team_set_items)
+    :param fmt: Формат выгрузки ('csv' или 'jsonl').
+    :type fmt: str
+    """
+    columns = {
+        'id': TeamSet.id,
+        'team_id': TeamSet.team_id,
+        'team_name': Team.team_name,
+        'staff_id': TeamSet.staff_id,
+        'staff_name': Staff.staff_name,
+        'fte': TeamSet.fte,
+    }
+    select_from = db.join(TeamSet, Team, TeamSet.team_id == Team.id).join(Staff, TeamSet.staff_id == Staff.id)
+    return export_response('team_set', fmt, columns, select_from=select_from)
@@ -0,0 +1,186 @@
+# app/modules/user/identity.py
+"""
+Кэш идентичности пользователей для загрузчика Flask-Login.
+
+Flask-Login вызывает загрузчик пользователя на каждом запросе авторизованного пользователя.
+Чтобы не обращаться за этим к базе данных, загрузчик возвращает облегченную запись
+:class:`UserIdentity` (id, имя, email, роль) из ограниченного по размеру LRU-кэша с временем жизни записей.
+
+Запись удаляется из кэша после фиксации (commit) транзакции, в которой пользователь был изменен
+или удален: изменения отслеживаются событиями SQLAlchemy, поэтому это работает и для правок через
+админку (UserAdmin), и для смены пароля через User.set_password.
+
+Кэш свой у каждого процесса. В других процессах (воркерах) измененная запись может использоваться
+до истечения ``IDENTITY_CACHE_TTL``.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.db import db
+from app.modules.user.models import User
+
+
+class UserIdentity(UserMixin):
+    """
+    Облегченная запись о пользователе, которая хранится в кэше и используется как current_user.
+
+    :param id: Идентификатор пользователя.
+    :param user_name: Имя пользователя.
+    :param user_email: Email пользователя.
+    :param role: Роль пользователя.
+    """
+
+    def __init__(self, id, user_name, user_email, role):
+        self.id = id
+        self.user_name = user_name
+        self.user_email = user_email
+        self.role = role
+
+    def __repr__(self):
+        return f"<UserIdentity(id={self.id}, user_name={self.user_name})>"
+
+
+class IdentityCache:
+    """
+    Потокобезопасный LRU-кэш записей :class:`UserIdentity` с ограничением размера и временем жизни.
+
+    :param maxsize: Максимальное количество записей в кэше.
+    :type maxsize: int
+    :param ttl: Время жизни записи в секундах.
+    :type ttl: float
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Возвращает запись из кэша или None, если ее нет или срок ее жизни истек.
+
+        :param user_id: Идентификатор пользователя.
+        :type user_id: int
+        :rtype: UserIdentity or None
+        """
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+
+            identity, expires_at = item
+            if expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+
+            self._items.move_to_end(user_id)
+            return identity
+
+    def put(self, identity):
+        """
+        Добавляет запись в кэш, вытесняя самую давно использованную при переполнении.
+
+        :param identity: Запись о пользователе.
+        :type identity: UserIdentity
+        """
+        with self._lock:
+            self._items[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._items.move_to_end(identity.id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        """
+        Удаляет записи указанных пользователей из кэша.
+
+        :param user_ids: Идентификаторы пользователей.
+        """
+        with self._lock:
+            for user_id in user_ids:
+                self._items.pop(user_id, None)
+
+    def clear(self):
+        """
+        Очищает кэш.
+        """
+        with self._lock:
+            self._items.clear()
+
+
+def init_identity_cache(app):
+    """
+    Создает кэш идентичности для приложения по настройкам IDENTITY_CACHE_SIZE и IDENTITY_CACHE_TTL.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    app.extensions['identity_cache'] = IdentityCache(
+        maxsize=app.config['IDENTITY_CACHE_SIZE'],
+        ttl=app.config['IDENTITY_CACHE_TTL']
+    )
+
+
+def load_identity(user_id):
+    """
+    Возвращает запись о пользователе из кэша, а при промахе загружает ее из базы данных.
+
+    Из базы выбираются только нужные колонки, без хэша пароля и без создания ORM-объекта.
+
+    :param user_id: Идентификатор пользователя (строка из сессии Flask-Login).
+    :return: Запись о пользователе или None, если пользователь не найден.
+    :rtype: UserIdentity or None
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    cache = current_app.extensions['identity_cache']
+    identity = cache.get(user_id)
+    if identity is not None:
+        return identity
+
+    row = db.session.query(User.id, User.user_name, User.user_email, User.role).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    identity = UserIdentity(*row)
+    cache.put(identity)
+    return identity
+
+
+def _remember_changed_user(mapper, connection, target):
+    """
+    Запоминает в сессии идентификатор измененного или удаленного пользователя.
+
+    Сам кэш очищается только после фиксации транзакции, чтобы параллельный запрос
+    не успел положить в кэш еще не зафиксированные старые данные.
+    """
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop('changed_user_ids', None)
+    if user_ids and current_app:
+        cache = current_app.extensions.get('identity_cache')
+        if cache is not None:
+            cache.invalidate(*user_ids)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('changed_user_ids', None)
+
+
+event.listen(User, 'after_update', _remember_changed_user)
+event.listen(User, 'after_delete', _remember_changed_user)
@@ -9,9 +9,8 @@
 """
 
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-
 from app.db import db
+from app.modules.user.passwords import get_password_hasher
 
 
 class User(db.Model, UserMixin):
@@ -19,17 +18,17 @@ class User(db.Model, UserMixin):
 
     id = db.Column(db.Integer, primary_key=True)
     user_name = db.Column(db.String(255), nullable=False)
-    user_email = db.Column(db.String(255), nullable=False)
+    user_email = db.Column(db.String(255), nullable=False, unique=True, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(255), nullable=False)
 
     def set_password(self, password):
         """
-        Устанавливает хэшированный пароль пользователя.
+        Устанавливает хэшированный пароль пользователя (с параметрами из настройки PASSWORD_HASH_METHOD).
 
         :param str password: Пароль, который необходимо захэшировать и сохранить.
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
         """
@@ -39,7 +38,16 @@ class User(db.Model, UserMixin):
         :return: Возвращает True, если пароль корректен, иначе False.
         :rtype: bool
         """
-        return check_password_hash(self.password_hash, password)
+        return get_password_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """
+        Проверяет, создан ли хэш пароля с параметрами, отличными от текущих (тогда после успешного
+        входа пароль хэшируется заново).
+
+        :rtype: bool
+        """
+        return get_password_hasher().needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<User(id={self.id}, user_name={self.user_name})>"
@@ -0,0 +1,200 @@
+# app/modules/user/passwords.py
+"""
+Хэширование и проверка паролей пользователей с настраиваемыми параметрами.
+
+- ``PASSWORD_HASH_METHOD`` задает алгоритм и его параметры в формате Werkzeug, например
+  ``'scrypt:32768:8:1'`` (n, r, p) или ``'pbkdf2:sha256:600000'`` (хэш-функция, число итераций).
+  От параметров зависят время входа и нагрузка на процессор (и память для scrypt) на одну проверку.
+- Хэш, созданный с другими параметрами, после успешного входа пересчитывается с текущими
+  (:meth:`User.password_needs_rehash`), поэтому смена параметров не требует сброса паролей.
+- При ``PASSWORD_VERIFY_WORKERS > 0`` хэширование и проверка выполняются в ограниченном пуле потоков:
+  одновременно хэшируют не больше ``PASSWORD_VERIFY_WORKERS`` потоков, а очередь ограничена
+  ``PASSWORD_VERIFY_MAX_PENDING`` запросами. Запрос, не дождавшийся места в очереди за
+  ``PASSWORD_VERIFY_TIMEOUT`` секунд, получает ответ 503, поэтому всплеск входов не занимает
+  процессор и потоки сервера, обслуживающие остальные страницы.
+
+Команда ``flask benchmark-password-hash`` измеряет время проверки пароля для наборов параметров.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+#: Наборы параметров, которые команда flask benchmark-password-hash измеряет по умолчанию (вместе с текущим)
+BENCHMARK_METHODS = (
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+)
+
+
+class PasswordHasherBusy(ServiceUnavailable):
+    """
+    Очередь проверки паролей заполнена: запрос завершается ответом 503 с заголовком Retry-After.
+    """
+
+    description = 'Слишком много одновременных попыток входа. Повторите попытку позже.'
+
+
+def normalize_method(method):
+    """
+    Дополняет параметры алгоритма значениями Werkzeug по умолчанию, чтобы их можно было сравнить
+    с параметрами, записанными в хэше (например, ``'scrypt'`` -> ``'scrypt:32768:8:1'``).
+
+    :param method: Алгоритм и параметры в формате Werkzeug.
+    :type method: str
+    :rtype: str
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class PasswordHasher:
+    """
+    Хэширование и проверка паролей с заданными параметрами, при необходимости - в ограниченном пуле потоков.
+
+    :param method: Алгоритм и параметры хэширования в формате Werkzeug.
+    :type method: str
+    :param salt_length: Длина соли в символах.
+    :type salt_length: int
+    :param workers: Количество потоков пула (0 - хэширование в потоке запроса).
+    :type workers: int
+    :param max_pending: Максимальное количество запросов, ожидающих свободный поток пула.
+    :type max_pending: int
+    :param timeout: Максимальное время ожидания места в очереди (в секундах).
+    :type timeout: float
+    """
+
+    def __init__(self, method, salt_length=16, workers=0, max_pending=0, timeout=5.0):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self.rejected = 0
+        self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+            self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def _run(self, function, *args):
+        if self._executor is None:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            self.rejected += 1
+            raise PasswordHasherBusy(retry_after=max(1, round(self.timeout)))
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """
+        Возвращает хэш пароля с текущими параметрами.
+
+        :param password: Пароль.
+        :type password: str
+        :rtype: str
+        """
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        """
+        Проверяет пароль по хэшу (параметры берутся из хэша).
+
+        :param password_hash: Сохраненный хэш пароля.
+        :type password_hash: str
+        :param password: Пароль для проверки.
+        :type password: str
+        :rtype: bool
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Проверяет, создан ли хэш с параметрами, отличными от текущих.
+
+        :param password_hash: Сохраненный хэш пароля.
+        :type password_hash: str
+        :rtype: bool
+        """
+        return password_hash.split('$', 1)[0] != self.method
+
+
+def init_password_hasher(app):
+    """
+    Создает объект хэширования паролей для приложения по настройкам PASSWORD_*.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_VERIFY_WORKERS'],
+        max_pending=app.config['PASSWORD_VERIFY_MAX_PENDING'],
+        timeout=app.config['PASSWORD_VERIFY_TIMEOUT']
+    )
+
+
+def get_password_hasher():
+    """
+    Возвращает объект хэширования паролей текущего приложения.
+
+    :rtype: PasswordHasher
+    """
+    return current_app.extensions['password_hasher']
+
+
+def benchmark_method(method, rounds=5, password='benchmark-password'):
+    """
+    Измеряет время проверки пароля для набора параметров.
+
+    :param method: Алгоритм и параметры в формате Werkzeug.
+    :type method: str
+    :param rounds: Количество проверок.
+    :type rounds: int
+    :param password: Пароль для проверки.
+    :type password: str
+    :return: Медианное и максимальное время одной проверки (в секундах).
+    :rtype: tuple
+    """
+    password_hash = generate_password_hash(password, normalize_method(method))
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        check_password_hash(password_hash, password)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), max(timings)
+
+
+@click.command('benchmark-password-hash')
+@click.option('--method', '-m', 'methods', multiple=True,
+              help='Алгоритм и параметры в формате Werkzeug (можно указать несколько раз).')
+@click.option('--rounds', default=5, show_default=True, help='Количество проверок для каждого набора параметров.')
+@with_appcontext
+def benchmark_password_hash_command(methods, rounds):
+    """
+    Измеряет время проверки пароля для наборов параметров хэширования.
+    """
+    current = get_password_hasher().method
+    methods = [normalize_method(method) for method in methods] or [current, *BENCHMARK_METHODS]
+    for method in dict.fromkeys(methods):
+        median, worst = benchmark_method(method, rounds)
+        marker = '  (текущие параметры)' if method == current else ''
+        click.echo(
+            f'{method:<24} {median * 1000:8.1f} мс (макс. {worst * 1000:.1f} мс), '
+            f'~{1 / median:.0f} проверок/с на поток{marker}'
+        )
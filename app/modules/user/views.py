@@ -9,6 +9,7 @@ from flask_login import login_required
 from app.modules.user.models import User
 from utils.decorators import admin_required
 from app.db import db
+from utils.data_versions import conditional_response
 
 blueprint = Blueprint('user', __name__, url_prefix='/user')
 
@@ -16,6 +17,7 @@ blueprint = Blueprint('user', __name__, url_prefix='/user')
 @blueprint.route('/')
 @login_required
 @admin_required  # Применяем наш декоратор
+@conditional_response(User)
 def user():
     title = 'User'
     user_items = User.query.all()
@@ -0,0 +1,54 @@
+# tests/conftest.py
+"""
+Общие фикстуры тестов: приложение на временной базе SQLite с примененными миграциями.
+"""
+import os
+
+import pytest
+
+from app.config.development import DevelopmentConfig
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'config(**settings): настройки приложения фикстуры app')
+
+
+@pytest.fixture
+def app_config(request, tmp_path):
+    """
+    Класс настроек разработки с временной базой и временными директориями.
+
+    Дополнительные настройки задаются маркером ``@pytest.mark.config(NAME=value)``.
+    """
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'app.db'),
+        'LOGS_DIR': str(tmp_path),
+        'LOG_FILE': str(tmp_path / 'app.log'),
+        'SLOW_REQUEST_LOG_FILE': str(tmp_path / 'slow_requests.log'),
+        'DATA_VERSIONS_DIR': str(tmp_path / 'data_versions'),
+        'IMPORT_REJECTS_DIR': str(tmp_path / 'imports'),
+        'PROFILER_DIR': str(tmp_path / 'profiles'),
+        'WTF_CSRF_ENABLED': False,
+        'TESTING': True,
+    }
+    marker = request.node.get_closest_marker('config')
+    if marker is not None:
+        overrides.update(marker.kwargs)
+    return type('TestConfig', (DevelopmentConfig,), overrides)
+
+
+@pytest.fixture
+def app(app_config):
+    """
+    Приложение Flask с настройками :func:`app_config` и примененными миграциями.
+    """
+    from flask_migrate import upgrade
+
+    from app import create_app
+    from app.db import init_migrate
+
+    app = create_app(app_config)
+    init_migrate(app)
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+    yield app
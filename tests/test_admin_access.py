@@ -0,0 +1,15 @@
+# tests/test_admin_access.py
+"""
+Тесты доступа к разделам административной панели.
+"""
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/admin/', '/admin/team_admin/', '/admin/import_admin/', '/admin/profiler_admin/'])
+def test_anonymous_is_redirected_to_login(app, path):
+    """
+    Анонимный пользователь перенаправляется на страницу входа с возвратом на запрошенную страницу.
+    """
+    response = app.test_client().get(path)
+    assert response.status_code == 302
+    assert response.location.startswith('/login/?next=')
@@ -0,0 +1,54 @@
+# tests/test_analytics.py
+"""
+Тесты расчета аналитики FTE из :mod:`app.modules.analytics.engine`.
+"""
+from datetime import date
+
+from app.db import db
+from app.modules.analytics.engine import cached_fte_analytics, compute_fte_analytics
+from app.modules.staff.models import Staff
+from app.modules.team.models import Team
+from app.modules.team_set.models import TeamSet
+
+
+def seed(teams, staff_per_team):
+    """
+    Создает команды с возрастающей численностью: в команде i состоит i * staff_per_team сотрудников.
+    """
+    for number in range(1, teams + 1):
+        team = Team(team_name=f'Команда {number}')
+        for index in range(number * staff_per_team):
+            staff = Staff(staff_name=f'Сотрудник {number}-{index}', staff_date=date.today(), staff_active=True)
+            db.session.add(TeamSet(team=team, staff=staff, fte=0.5))
+    db.session.commit()
+
+
+def test_payload_is_bounded(app):
+    """
+    График команд ограничен team_limit командами с наибольшим FTE, численность команд разбита
+    на интервалы, а суммарный FTE каждого сотрудника в ответ не попадает.
+    """
+    with app.app_context():
+        seed(teams=12, staff_per_team=1)
+        result = compute_fte_analytics(team_limit=5, headcount_edges=[1, 5, 10])
+
+    assert 'staff' not in result
+    assert result['totals']['teams'] == 12
+    assert result['teams']['names'] == [f'Команда {number}' for number in range(12, 7, -1)]
+    assert result['teams']['headcount'] == [12, 11, 10, 9, 8]
+    assert result['histograms']['team_headcount'] == {'labels': ['1–5', '5–10', '≥10'], 'counts': [4, 5, 3]}
+
+
+def test_result_is_cached_until_tables_change(app):
+    """
+    Результат пересчитывается только после изменения таблиц, от которых он зависит.
+    """
+    with app.app_context():
+        seed(teams=2, staff_per_team=1)
+        first = cached_fte_analytics(team_limit=5)
+        assert cached_fte_analytics(team_limit=5) is first
+        assert cached_fte_analytics(team_limit=1) is not first
+
+        db.session.add(TeamSet(team_id=1, staff_id=1, fte=0.25))
+        db.session.commit()
+        assert cached_fte_analytics(team_limit=5)['totals']['allocations'] == 4
@@ -0,0 +1,23 @@
+# tests/test_benchmark.py
+"""
+Тесты расчета перцентилей нагрузочного теста из :mod:`utils.benchmark`.
+"""
+import pytest
+
+from utils.benchmark import percentile
+
+
+@pytest.mark.parametrize('count, fraction, expected', [
+    (50, 0.5, 25),
+    (100, 0.95, 95),
+    (100, 0.99, 99),
+    (100, 0.07, 7),
+    (10, 0.95, 10),
+    (1, 0.5, 1),
+    (100, 1.0, 100),
+])
+def test_percentile_uses_nearest_rank(count, fraction, expected):
+    """
+    Перцентиль - значение с рангом ceil(fraction * n) в отсортированном списке.
+    """
+    assert percentile(list(range(1, count + 1)), fraction) == expected
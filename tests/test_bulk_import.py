@@ -0,0 +1,59 @@
+# tests/test_bulk_import.py
+"""
+Тесты массового импорта из :mod:`utils.bulk_import`.
+"""
+import io
+
+import pytest
+
+from utils.bulk_import import FileEncodingError, import_file
+
+
+def test_non_utf8_file_is_rejected(app, tmp_path):
+    """
+    Файл CSV в кодировке cp1251 (так его сохраняет Excel) отклоняется с указанием кодировки и строки,
+    а не завершается необработанным UnicodeDecodeError.
+    """
+    content = 'team_name\nTeam A\n' + 'Команда\n' * 10
+    stream = io.TextIOWrapper(io.BytesIO(content.encode('cp1251')), encoding='utf-8-sig', newline='')
+    with app.app_context(), pytest.raises(FileEncodingError) as error:
+        import_file('team', stream, 'csv', str(tmp_path / 'team.rejected.csv'))
+    assert error.value.encoding == 'utf-8'
+    assert 'utf-8' in str(error.value)
+
+
+def test_import_data_command_reports_encoding(app, tmp_path):
+    """
+    Команда ``flask import-data`` завершается сообщением об ошибке кодировки.
+    """
+    path = tmp_path / 'team.csv'
+    path.write_bytes('team_name\nКоманда\n'.encode('cp1251'))
+    result = app.test_cli_runner().invoke(args=['import-data', 'team', str(path)])
+    assert result.exit_code == 1
+    assert 'Файл не в кодировке utf-8' in result.output
+
+
+def test_admin_import_reports_encoding(app):
+    """
+    Загрузка файла не в UTF-8 через админку показывает сообщение об ошибке вместо ответа 500.
+    """
+    from app.db import db
+    from app.modules.user.models import User
+
+    with app.app_context():
+        admin = User(user_name='Администратор', user_email='admin@example.com', role='admin')
+        admin.set_password('admin')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    response = client.post('/admin/import_admin/', data={
+        'entity': 'team',
+        'file': (io.BytesIO('team_name\nКоманда\n'.encode('cp1251')), 'team.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert 'Файл team.csv отклонен' in response.get_data(as_text=True)
@@ -0,0 +1,90 @@
+# tests/test_data_versions.py
+"""
+Тесты условных ответов из :mod:`utils.data_versions`.
+"""
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import utils.data_versions
+
+SECOND = 1_000_000_000
+
+#: Начало отсчета подмененных часов: позже версий, записанных при подготовке данных
+BASE = time.time_ns() // SECOND + 1000
+
+
+class FakeClock:
+    """
+    Подмена модуля time в utils.data_versions: время задается тестом.
+    """
+
+    def __init__(self, seconds):
+        self.now = int(seconds * SECOND)
+
+    def time_ns(self):
+        return self.now
+
+
+def http_date(seconds):
+    return format_datetime(datetime.fromtimestamp(seconds, timezone.utc), usegmt=True)
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """
+    Клиент, авторизованный как администратор, с подмененными часами модуля версий данных.
+    """
+    from app.db import db
+    from app.modules.user.models import User
+
+    with app.app_context():
+        admin = User(user_name='Администратор', user_email='admin@example.com', role='admin')
+        admin.set_password('admin')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    client.clock = FakeClock(BASE)
+    monkeypatch.setattr(utils.data_versions, 'time', client.clock)
+    return client
+
+
+def test_same_second_change_is_not_hidden_by_if_modified_since(app, client):
+    """
+    Два изменения в одну секунду: клиент, который проверяет только If-Modified-Since, не получает
+    устаревший 304 после второго изменения.
+    """
+    versions = app.extensions['data_versions']
+    clock = client.clock
+
+    clock.now = (BASE + 10) * SECOND + SECOND // 5
+    versions.bump('user')
+    # Секунда изменения еще не закончилась: Last-Modified не отправляется
+    assert client.get('/user/').last_modified is None
+    # Клиент, получивший Last-Modified той же секунды, не должен получить 304 после второго изменения
+    clock.now = (BASE + 10) * SECOND + SECOND * 4 // 5
+    versions.bump('user')
+    assert client.get('/user/', headers={'If-Modified-Since': http_date(BASE + 10)}).status_code == 200
+
+    clock.now = (BASE + 11) * SECOND + SECOND // 2
+    response = client.get('/user/')
+    assert response.headers['Last-Modified'] == http_date(BASE + 10)
+
+    # Второе изменение в ту же секунду, что и ответ клиенту
+    clock.now = (BASE + 11) * SECOND + SECOND * 3 // 5
+    versions.bump('user')
+    clock.now = (BASE + 11) * SECOND + SECOND * 4 // 5
+    assert client.get('/user/', headers={'If-Modified-Since': http_date(BASE + 10)}).status_code == 200
+
+    clock.now = (BASE + 20) * SECOND
+    response = client.get('/user/', headers={'If-Modified-Since': http_date(BASE + 10)})
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] == http_date(BASE + 11)
+    assert client.get('/user/', headers={'If-Modified-Since': http_date(BASE + 11)}).status_code == 304
@@ -0,0 +1,75 @@
+# tests/test_logging.py
+"""
+Тесты обработчиков логов из :mod:`utils.logging`.
+"""
+import io
+import json
+import logging
+import queue
+import sys
+
+from utils.logging import BoundedQueueHandler, BoundedQueueListener, JsonFormatter
+
+
+class ReprCounter:
+    """
+    Аргумент сообщения, который считает вызовы ``__repr__``.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __repr__(self):
+        self.calls += 1
+        return '<ReprCounter>'
+
+
+def make_record(msg, *args, exc_info=None):
+    return logging.LogRecord('app', logging.ERROR, __file__, 1, msg, args, exc_info)
+
+
+def test_queue_handler_enqueues_record_unformatted():
+    """
+    Аргументы сообщения и исключение передаются в очередь без форматирования в потоке запроса.
+    """
+    handler = BoundedQueueHandler(queue.Queue(maxsize=10))
+    argument = ReprCounter()
+    try:
+        raise ValueError('ошибка')
+    except ValueError:
+        record = make_record('Запись %r', argument, exc_info=sys.exc_info())
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    assert argument.calls == 0
+    assert queued.msg == 'Запись %r' and queued.args == (argument,)
+    assert queued.exc_info is not None and queued.exc_text is None
+
+
+def test_json_through_queue_keeps_exception_separate():
+    """
+    Запись с исключением, прошедшая через очередь, выводится в JSON с трассировкой в поле exc,
+    а не в тексте сообщения.
+    """
+    stream = io.StringIO()
+    json_handler = logging.StreamHandler(stream)
+    json_handler.setFormatter(JsonFormatter())
+    queue_handler = BoundedQueueHandler(queue.Queue(maxsize=10))
+    listener = BoundedQueueListener(queue_handler.queue, json_handler)
+
+    logger = logging.getLogger('tests.json_queue')
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        try:
+            raise ValueError('ошибка')
+        except ValueError:
+            logger.exception('Сбой при обработке %s', 'записи')
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+
+    data = json.loads(stream.getvalue())
+    assert data['message'] == 'Сбой при обработке записи'
+    assert 'Traceback' in data['exc'] and "ValueError: ошибка" in data['exc']
@@ -0,0 +1,111 @@
+# tests/test_metrics.py
+"""
+Тесты реестра метрик из :mod:`utils.metrics`: суммирование значений потоков и процессов
+и вывод в текстовом формате Prometheus.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from sqlalchemy import text
+
+from app.db import db
+from utils.metrics import NO_REQUEST_LABELS, MetricsRegistry
+
+
+def _run_in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _write_process_file(directory, pid, counter_value, gauge_value):
+    data = {
+        'requests_total': {
+            'type': 'counter', 'help': 'Запросы', 'labelnames': ['endpoint'], 'buckets': None,
+            'values': [[['index'], counter_value]],
+        },
+        'in_progress': {
+            'type': 'gauge', 'help': 'В обработке', 'labelnames': [], 'buckets': None,
+            'values': [[[], gauge_value]],
+        },
+    }
+    with open(os.path.join(directory, f'metrics-{pid}.json'), 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+
+def test_thread_shards_are_merged():
+    """
+    Значения потоков суммируются, а значения завершившихся потоков сохраняются после их завершения.
+    """
+    counter = MetricsRegistry().counter('requests_total', 'Запросы', ('endpoint',))
+    counter.inc(('index',))
+    for _ in range(3):
+        _run_in_thread(lambda: counter.inc(('index',), 2))
+    _run_in_thread(lambda: counter.inc(('login',)))
+
+    assert counter.snapshot() == {('index',): 7, ('login',): 1}
+    # Значения завершившихся потоков перенесены в общий словарь, повторное чтение дает тот же итог
+    assert len(counter._shards) == 1
+    assert counter.snapshot() == {('index',): 7, ('login',): 1}
+
+
+def test_histogram_exposition():
+    """
+    Гистограмма выводится накопительными корзинами _bucket, суммой _sum и количеством _count.
+    """
+    registry = MetricsRegistry()
+    histogram = registry.histogram('duration_seconds', 'Длительность', ('endpoint',), (0.1, 1.0))
+    histogram.observe(0.05, ('index',))
+    _run_in_thread(lambda: histogram.observe(0.5, ('index',)))
+    histogram.observe(2.0, ('index',))
+
+    lines = registry.expose().splitlines()
+    assert lines == [
+        '# HELP duration_seconds Длительность',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{endpoint="index",le="0.1"} 1',
+        'duration_seconds_bucket{endpoint="index",le="1.0"} 2',
+        'duration_seconds_bucket{endpoint="index",le="+Inf"} 3',
+        'duration_seconds_sum{endpoint="index"} 2.55',
+        'duration_seconds_count{endpoint="index"} 3',
+    ]
+
+
+def test_process_files_are_summed(tmp_path):
+    """
+    Счетчики суммируются по файлам всех процессов, датчики завершившихся процессов не учитываются.
+    """
+    registry = MetricsRegistry(str(tmp_path))
+    registry.counter('requests_total', 'Запросы', ('endpoint',)).inc(('index',), 1)
+    registry.gauge('in_progress', 'В обработке').inc()
+    registry.flush()
+    assert os.path.exists(tmp_path / f'metrics-{os.getpid()}.json')
+
+    # Родительский процесс работает, процесс-потомок уже завершился
+    _write_process_file(tmp_path, os.getppid(), 10, 2)
+    _write_process_file(tmp_path, _dead_pid(), 100, 5)
+
+    lines = registry.expose().splitlines()
+    assert 'requests_total{endpoint="index"} 111' in lines
+    assert 'in_progress 3' in lines
+
+
+def test_sql_statements_counted_once(app):
+    """
+    SQL-запрос учитывается в метриках один раз через общий с замерами запросов обработчик событий движка.
+    """
+    queries_total = app.extensions['metrics'].metrics['db_queries_total']
+    with app.app_context():
+        before = queries_total.snapshot().get(NO_REQUEST_LABELS, 0)
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        assert queries_total.snapshot()[NO_REQUEST_LABELS] == before + 1
@@ -0,0 +1,52 @@
+# tests/test_profiler.py
+"""
+Тесты профилирования запросов по требованию администратора из :mod:`utils.profiler`.
+"""
+import pytest
+
+from utils.profiler import _strip_profile_arg
+
+
+@pytest.mark.parametrize('query_string, expected', [
+    ('_profile=1', ''),
+    ('_profile', ''),
+    ('team_name=A&_profile=1&limit=10', 'team_name=A&limit=10'),
+    ('q=%D0%90+%D0%91&%5Fprofile=1', 'q=%D0%90+%D0%91'),
+    ('_profiler=1', '_profiler=1'),
+])
+def test_strip_profile_arg(query_string, expected):
+    """
+    Из строки запроса удаляется только параметр профилирования, остальные параметры не перекодируются.
+    """
+    assert _strip_profile_arg(query_string) == expected
+
+
+def test_profiled_export_request(app):
+    """
+    Профилированная выгрузка выполняется без ошибки неизвестного фильтра, а профиль сохраняется.
+    """
+    from app.db import db
+    from app.modules.user.models import User
+
+    with app.app_context():
+        admin = User(user_name='Администратор', user_email='admin@example.com', role='admin')
+        admin.set_password('admin')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    response = client.get('/staff/export.csv?_profile=1')
+    # Профиль сохраняется после отправки тела ответа
+    body = response.get_data(as_text=True)
+    response.close()
+    assert response.status_code == 200, body
+    profile_id = response.headers['X-Profile-Id']
+
+    with app.app_context():
+        meta = app.extensions['profile_store'].meta(profile_id)
+    assert meta['path'] == '/staff/export.csv?_profile=1'
+    assert meta['status'] == 200
@@ -0,0 +1,16 @@
+# tests/test_query_plans.py
+"""
+Тест планов SQL-запросов на горячих маршрутах: ни один запрос не должен проходить таблицу целиком
+(см. :mod:`utils.query_plans`).
+"""
+from app.config.development import DevelopmentConfig
+from utils.query_plans import check_query_plans
+
+
+def test_hot_paths_have_no_full_scans():
+    """
+    Проверяет планы запросов горячих маршрутов на временной базе с примененными миграциями.
+    """
+    config = {key: getattr(DevelopmentConfig, key) for key in dir(DevelopmentConfig) if key.isupper()}
+    scans = check_query_plans(config)
+    assert not scans, '\n'.join(f'{scan.path}: {scan.detail}\n    {scan.statement}' for scan in scans)
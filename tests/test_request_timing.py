@@ -0,0 +1,32 @@
+# tests/test_request_timing.py
+"""
+Тесты замеров запросов из :mod:`utils.request_timing`.
+"""
+import json
+
+import pytest
+
+
+def test_static_response_does_not_vary_on_cookie(app):
+    """
+    Замеры запросов не читают сессию: ответы на статические файлы не получают Vary: Cookie
+    и могут храниться общими кэшами.
+    """
+    assert app.config['REQUEST_TIMING_ENABLED']
+    response = app.test_client().get('/static/js/custom.js')
+    assert response.status_code == 200
+    assert 'Cookie' not in response.headers.get('Vary', '')
+    assert 'Server-Timing' not in response.headers
+
+
+@pytest.mark.config(SLOW_REQUEST_MAX_QUERIES=-1)
+def test_slow_request_record_includes_user(app):
+    """
+    Пользователь определяется при записи медленного запроса.
+    """
+    response = app.test_client().get('/login/')
+    assert response.status_code == 200
+    with open(app.config['SLOW_REQUEST_LOG_FILE'], encoding='utf-8') as file:
+        record = json.loads(file.readlines()[-1])
+    assert record['endpoint'] == 'login.login'
+    assert 'user' in record and record['user'] is None
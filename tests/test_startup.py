@@ -0,0 +1,28 @@
+# tests/test_startup.py
+"""
+Тесты отложенной инициализации из :mod:`utils.startup`.
+"""
+import click
+import pytest
+
+from app import create_app
+
+
+@pytest.mark.config(ADMIN_LAZY_INIT=False)
+def test_admin_is_initialized_eagerly_when_serving(app_config):
+    """
+    При ``ADMIN_LAZY_INIT = False`` приложение сервера создает админку сразу.
+    """
+    assert 'admin' in create_app(app_config).blueprints
+
+
+@pytest.mark.config(ADMIN_LAZY_INIT=False)
+def test_admin_is_deferred_under_cli(app_config):
+    """
+    Команда CLI откладывает админку до первого запроса и при ``ADMIN_LAZY_INIT = False``.
+    """
+    with click.Context(click.Command('upgrade')):
+        app = create_app(app_config)
+    assert 'admin' not in app.blueprints
+    app.test_client().get('/login/')
+    assert 'admin' in app.blueprints
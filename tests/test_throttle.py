@@ -0,0 +1,175 @@
+# tests/test_throttle.py
+"""
+Тесты ограничения частоты запросов из :mod:`utils.throttle` и лимита попыток входа.
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+
+import utils.throttle
+from utils.throttle import MemoryBucketStore, SqliteBucketStore
+
+#: Лимиты входа для тестов: две попытки на учетную запись
+LOGIN_LIMITS = {'ip': (20, 60), 'account': (2, 300)}
+
+
+class FakeClock:
+    """
+    Управляемые часы вместо модуля time в :mod:`utils.throttle`.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils.throttle, 'time', clock)
+    return clock
+
+
+def _keys(path):
+    with sqlite3.connect(path) as connection:
+        return sorted(key for key, in connection.execute('SELECT key FROM throttle_bucket'))
+
+
+def test_memory_store_refill_and_wait(clock):
+    """
+    Ведро отдает жетоны до исчерпания, сообщает время до следующего жетона и равномерно пополняется.
+    """
+    store = MemoryBucketStore()
+    assert store.take('key', 2, 1.0) == 0
+    assert store.take('key', 2, 1.0) == 0
+    assert store.take('key', 2, 1.0) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert store.take('key', 2, 1.0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert store.take('key', 2, 1.0) == 0
+    # Пополнение не превышает емкость ведра
+    clock.now += 100
+    assert [store.take('key', 2, 1.0) for _ in range(3)] == [0, 0, pytest.approx(1.0)]
+    store.reset('key')
+    assert store.take('key', 2, 1.0) == 0
+
+
+def test_memory_store_evicts_least_recently_used(clock):
+    """
+    При превышении количества ключей вытесняется давно не использованное ведро.
+    """
+    store = MemoryBucketStore(max_keys=2)
+    store.take('a', 1, 1.0)
+    store.take('b', 1, 1.0)
+    store.take('a', 1, 1.0)
+    store.take('c', 1, 1.0)
+    assert list(store._buckets) == ['a', 'c']
+    # Вытесненное ведро снова полное
+    assert store.take('b', 1, 1.0) == 0
+
+
+def test_sqlite_store_is_shared(clock, tmp_path):
+    """
+    Состояние ведер в файле SQLite общее для хранилищ разных процессов.
+    """
+    path = str(tmp_path / 'throttle' / 'throttle.db')
+    first, second = SqliteBucketStore(path), SqliteBucketStore(path)
+    assert first.take('key', 2, 1.0) == 0
+    assert second.take('key', 2, 1.0) == 0
+    assert first.take('key', 2, 1.0) == pytest.approx(1.0)
+    second.reset('key')
+    assert first.take('key', 2, 1.0) == 0
+
+
+def test_sqlite_store_prunes_full_and_old_buckets(clock, tmp_path):
+    """
+    Очистка удаляет уже полные ведра и давно не использованные сверх ``max_keys``.
+    """
+    path = str(tmp_path / 'throttle.db')
+    store = SqliteBucketStore(path, max_keys=2, prune_every=1)
+    store.take('a', 1, 1.0)
+    clock.now += 10
+    # Ведро 'a' успело пополниться
+    store.take('b', 1, 1.0)
+    assert _keys(path) == ['b']
+
+    for key in ('c', 'd'):
+        clock.now += 0.1
+        store.take(key, 1, 1.0)
+    assert _keys(path) == ['c', 'd']
+
+
+@pytest.mark.config(LOGIN_THROTTLE_LIMITS=LOGIN_LIMITS)
+def test_login_over_budget_is_rejected_before_user_lookup(app, monkeypatch):
+    """
+    Попытка входа сверх лимита получает 429 с Retry-After без поиска пользователя и проверки хэша.
+    """
+    from app.db import db
+    from app.modules.user.models import User
+
+    with app.app_context():
+        user = User(user_name='Пользователь', user_email='user@example.com', role='user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        engine = db.engine
+
+    checked = []
+    check_password = User.check_password
+
+    def counting_check_password(user, password):
+        checked.append(password)
+        return check_password(user, password)
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    monkeypatch.setattr(User, 'check_password', counting_check_password)
+    client = app.test_client()
+    form = {'email': 'user@example.com', 'password': 'wrong'}
+    for _ in range(2):
+        assert client.post('/login/', data=form).status_code == 302
+    assert checked == ['wrong', 'wrong']
+
+    event.listen(engine, 'before_cursor_execute', record_statement)
+    try:
+        response = client.post('/login/', data=form)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record_statement)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert not [statement for statement in statements if 'user' in statement]
+    assert checked == ['wrong', 'wrong']
+
+
+@pytest.mark.config(LOGIN_THROTTLE_LIMITS=LOGIN_LIMITS)
+def test_successful_login_resets_account_limit(app):
+    """
+    Успешный вход сбрасывает лимит учетной записи.
+    """
+    from app.db import db
+    from app.modules.user.models import User
+
+    with app.app_context():
+        user = User(user_name='Пользователь', user_email='user@example.com', role='user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+
+    wrong = {'email': 'user@example.com', 'password': 'wrong'}
+    client = app.test_client()
+    assert client.post('/login/', data=wrong).status_code == 302
+    response = client.post('/login/', data={'email': 'user@example.com', 'password': 'secret'})
+    assert response.location == '/profile/'
+
+    # Без сброса лимит был бы исчерпан первой же попыткой
+    client = app.test_client()
+    assert [client.post('/login/', data=wrong).status_code for _ in range(3)] == [302, 302, 429]
@@ -0,0 +1,319 @@
+# utils/assets.py
+"""
+Модуль сборки и раздачи статических бандлов (CSS и JS).
+
+Команда ``flask build-assets`` собирает бандлы, описанные в настройке ``ASSETS_BUNDLES``:
+
+- склеивает исходные файлы из статической директории приложения в один файл на бандл;
+- минифицирует CSS, если исходный файл еще не минифицирован (``*.min.*`` и JS берутся как есть),
+  удаляет ссылки на source map и пересчитывает относительные ``url(...)`` под новое расположение;
+- добавляет к имени файла хэш содержимого (``dist/member.3f2a9c0d1b7e.css``);
+- сохраняет рядом сжатые копии ``.gz`` и ``.br`` (``.br`` - только если установлен пакет brotli);
+- записывает соответствие имен бандлов и файлов в ``manifest.json``.
+
+В шаблонах адреса бандла возвращает функция ``asset_urls(name)``: при ``ASSETS_BUNDLED = True`` и собранном
+манифесте - один адрес файла с хэшем, иначе - адреса исходных файлов (режим разработки)::
+
+    {% for url in asset_urls('member.css') %}<link rel="stylesheet" href="{{ url }}">{% endfor %}
+
+Файлы бандлов отдаются обработчиком ``static`` в сжатом виде по заголовку ``Accept-Encoding`` клиента,
+с заголовками ``Vary: Accept-Encoding`` и ``Cache-Control: public, max-age=..., immutable``: имя файла
+меняется вместе с содержимым, поэтому браузер не перепроверяет его до истечения срока.
+
+Основные классы и функции:
+- minify_css: Минифицирует CSS.
+- build_assets: Собирает бандлы и записывает манифест.
+- Assets: Манифест бандлов приложения, адреса для шаблонов и раздача сжатых файлов.
+- init_assets: Подключает бандлы к приложению.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен, без него .br не создаются
+    brotli = None
+
+#: Имя файла манифеста в директории бандлов
+MANIFEST_NAME = 'manifest.json'
+
+#: Суффиксы сжатых копий в порядке предпочтения при выборе кодировки ответа
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Комментарии и строки CSS: строки сохраняются как есть, комментарии удаляются
+_CSS_TOKEN_RE = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,])\s*')
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_SOURCE_MAP_RE = re.compile(r'^\s*(?://# sourceMappingURL=.*|/\*# sourceMappingURL=.*?\*/)\s*$', re.M)
+
+
+def minify_css(text):
+    """
+    Минифицирует CSS: удаляет комментарии, сокращает пробелы и убирает их вокруг ``{ } ; ,``.
+
+    Содержимое строк в кавычках не меняется. Пробелы вокруг ``:`` и ``>`` сохраняются, так как
+    в селекторах они значимы (``a :hover`` и ``a:hover`` - разные селекторы).
+
+    :param text: Исходный CSS.
+    :type text: str
+    :rtype: str
+    """
+    parts = []
+    position = 0
+    for match in _CSS_TOKEN_RE.finditer(text):
+        parts.append(_minify_css_code(text[position:match.start()]))
+        if not match.group().startswith('/*'):
+            parts.append(match.group())
+        position = match.end()
+    parts.append(_minify_css_code(text[position:]))
+    return ''.join(parts).strip()
+
+
+def _minify_css_code(code):
+    return _CSS_PUNCT_RE.sub(r'\1', _CSS_SPACE_RE.sub(' ', code)).replace(';}', '}')
+
+
+def _rebase_css_urls(text, source, target_dir):
+    """
+    Пересчитывает относительные адреса ``url(...)`` из директории исходного файла в директорию бандла.
+
+    :param text: CSS исходного файла.
+    :param source: Путь исходного файла относительно статической директории.
+    :param target_dir: Директория бандла относительно статической директории.
+    :rtype: str
+    """
+    source_dir = posixpath.dirname(source)
+
+    def rebase(match):
+        quote, address = match.groups()
+        if address.startswith(('data:', '/', '#')) or '://' in address:
+            return match.group()
+        # Параметры и якорь адреса (например, шрифтов '?v=4.7.0#iefix') переносятся без изменений
+        path, query = re.match(r'([^?#]*)(.*)', address, re.S).groups()
+        path = posixpath.relpath(posixpath.normpath(posixpath.join(source_dir, path)), target_dir)
+        return f'url({quote}{path}{query}{quote})'
+
+    return _CSS_URL_RE.sub(rebase, text)
+
+
+def _bundle_content(static_dir, dist_dir, name, sources):
+    """
+    Склеивает исходные файлы бандла.
+
+    :return: Содержимое бандла в UTF-8.
+    :rtype: bytes
+    """
+    is_css = name.endswith('.css')
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_dir, source), encoding='utf-8') as file:
+            text = _SOURCE_MAP_RE.sub('', file.read())
+        if is_css:
+            text = _rebase_css_urls(text, source, dist_dir)
+            if '.min.' not in posixpath.basename(source):
+                text = minify_css(text)
+        parts.append(text.strip())
+    # Точка с запятой между JS-файлами защищает от склейки выражений соседних файлов
+    return ('\n' if is_css else ';\n').join(parts).encode('utf-8') + b'\n'
+
+
+def _write(path, content):
+    with open(path, 'wb') as file:
+        file.write(content)
+
+
+def build_assets(static_dir, dist_dir, bundles, clean=False):
+    """
+    Собирает бандлы в ``static_dir/dist_dir`` и записывает манифест.
+
+    Файлы предыдущих сборок по умолчанию сохраняются, чтобы страницы, отданные воркерами со старым
+    манифестом, продолжали их загружать; ``clean`` удаляет их.
+
+    :param static_dir: Статическая директория приложения (в ней ищутся исходные файлы).
+    :type static_dir: str
+    :param dist_dir: Директория бандлов относительно статической директории.
+    :type dist_dir: str
+    :param bundles: Бандлы: имя (например, 'member.css') - список исходных файлов относительно статической директории.
+    :type bundles: dict
+    :param clean: Удалить файлы, не вошедшие в новую сборку.
+    :type clean: bool
+    :return: Манифест: имя бандла - словарь с именем файла, размером и размерами сжатых копий.
+    :rtype: dict
+    """
+    output_dir = os.path.join(static_dir, dist_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {}
+    for name, sources in bundles.items():
+        content = _bundle_content(static_dir, dist_dir, name, sources)
+        stem, extension = posixpath.splitext(name)
+        filename = f'{stem}.{hashlib.sha1(content).hexdigest()[:12]}{extension}'
+        _write(os.path.join(output_dir, filename), content)
+
+        compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(content, quality=11)
+        encodings = {}
+        for encoding, suffix in ENCODINGS:
+            # Сжатая копия сохраняется, только если она меньше исходного файла
+            if encoding in compressed and len(compressed[encoding]) < len(content):
+                _write(os.path.join(output_dir, filename + suffix), compressed[encoding])
+                encodings[encoding] = len(compressed[encoding])
+        manifest[name] = {'file': filename, 'size': len(content), 'encodings': encodings}
+
+    _write(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+
+    if clean:
+        keep = {MANIFEST_NAME}
+        for entry in manifest.values():
+            keep.add(entry['file'])
+            keep.update(entry['file'] + suffix for encoding, suffix in ENCODINGS if encoding in entry['encodings'])
+        for filename in os.listdir(output_dir):
+            if filename not in keep:
+                os.remove(os.path.join(output_dir, filename))
+
+    return manifest
+
+
+class Assets:
+    """
+    Манифест бандлов приложения: адреса бандлов для шаблонов и раздача их сжатых копий.
+
+    :param static_dir: Статическая директория приложения.
+    :type static_dir: str
+    :param dist_dir: Директория бандлов относительно статической директории.
+    :type dist_dir: str
+    :param bundles: Описание бандлов (настройка ASSETS_BUNDLES).
+    :type bundles: dict
+    :param bundled: Использовать собранные бандлы (иначе шаблоны подключают исходные файлы).
+    :type bundled: bool
+    :param max_age: Срок хранения файлов бандлов в кэше браузера (в секундах).
+    :type max_age: int
+    """
+
+    def __init__(self, static_dir, dist_dir, bundles, bundled, max_age):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self.bundles = bundles
+        self.max_age = max_age
+        self.manifest = self._load_manifest() if bundled else {}
+        # Путь файла бандла относительно статической директории - доступные сжатые копии
+        self._files = {
+            posixpath.join(dist_dir, entry['file']): tuple(entry['encodings'])
+            for entry in self.manifest.values()
+        }
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.static_dir, self.dist_dir, MANIFEST_NAME), encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    @property
+    def fingerprint(self):
+        """
+        Хэш манифеста: меняется при каждой сборке с новым содержимым бандлов.
+
+        :rtype: str
+        """
+        key = json.dumps({name: entry['file'] for name, entry in self.manifest.items()}, sort_keys=True)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+    def urls(self, name):
+        """
+        Возвращает адреса файлов бандла: файл с хэшем из манифеста или исходные файлы, если бандл не собран.
+
+        :param name: Имя бандла.
+        :type name: str
+        :rtype: list
+        """
+        entry = self.manifest.get(name)
+        if entry is not None:
+            return [url_for('static', filename=posixpath.join(self.dist_dir, entry['file']))]
+        return [url_for('static', filename=source) for source in self.bundles[name]]
+
+    def send(self, filename):
+        """
+        Отдает файл бандла в наилучшей кодировке из принимаемых клиентом.
+
+        :param filename: Путь файла относительно статической директории.
+        :type filename: str
+        :return: Ответ или None, если файл не является бандлом из манифеста.
+        :rtype: flask.Response or None
+        """
+        encodings = self._files.get(filename)
+        if encodings is None:
+            return None
+
+        encoding, suffix = next(
+            ((encoding, suffix) for encoding, suffix in ENCODINGS
+             if encoding in encodings and request.accept_encodings[encoding]),
+            (None, '')
+        )
+        response = send_from_directory(
+            self.static_dir, filename + suffix, mimetype=mimetypes.guess_type(filename)[0], max_age=self.max_age
+        )
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+def init_assets(app):
+    """
+    Загружает манифест бандлов, добавляет в шаблоны функцию ``asset_urls`` и подключает раздачу
+    сжатых бандлов к обработчику ``static``.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    assets = app.extensions['assets'] = Assets(
+        app.static_folder, app.config['ASSETS_DIST_DIR'], app.config['ASSETS_BUNDLES'],
+        app.config['ASSETS_BUNDLED'], app.config['ASSETS_MAX_AGE']
+    )
+    if app.config['ASSETS_BUNDLED'] and not assets.manifest:
+        app.logger.warning('Манифест бандлов не найден, подключаются исходные файлы (выполните flask build-assets)')
+
+    app.jinja_env.globals['asset_urls'] = assets.urls
+
+    # Адреса бандлов входят в страницы, поэтому после новой сборки ETag страниц тоже должен измениться
+    versions = app.extensions.get('data_versions')
+    if versions is not None and assets.manifest:
+        versions.salt = f'{versions.salt}:{assets.fingerprint}'
+
+    send_static_file = app.view_functions['static']
+
+    def static(filename):
+        return current_app.extensions['assets'].send(filename) or send_static_file(filename=filename)
+
+    app.view_functions['static'] = static
+
+
+@click.command('build-assets')
+@click.option('--clean', is_flag=True, help='Удалить файлы предыдущих сборок.')
+@with_appcontext
+def build_assets_command(clean):
+    """
+    Собирает, минифицирует и сжимает статические бандлы из настройки ASSETS_BUNDLES.
+    """
+    manifest = build_assets(
+        current_app.static_folder, current_app.config['ASSETS_DIST_DIR'], current_app.config['ASSETS_BUNDLES'], clean
+    )
+    for name, entry in manifest.items():
+        sizes = ', '.join(f'{encoding}: {size} байт' for encoding, size in entry['encodings'].items())
+        click.echo(f'{name} -> {entry["file"]} ({entry["size"]} байт; {sizes})')
+    if brotli is None:
+        click.echo('Пакет brotli не установлен: копии .br не созданы.')
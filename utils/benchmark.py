@@ -0,0 +1,291 @@
+# utils/benchmark.py
+"""
+Модуль нагрузочного тестирования приложения (команда ``flask benchmark``).
+
+Команда проходит по страницам кабинета, выгрузкам, JSON API, спискам админки (с поиском и сортировкой)
+и входу в систему через тестовый WSGI-клиент Flask - без HTTP-сервера, но со всеми слоями приложения.
+Каждый сценарий выполняется заданное количество раз в нескольких потоках. Для сценария выводятся
+перцентили задержки (p50, p95, p99), пропускная способность, среднее количество SQL-запросов на запрос
+и пиковый объем памяти процесса (RSS).
+
+Результаты можно сохранить как базовые (``--save-baseline``) и сравнить с ними следующий прогон
+(``--baseline``): команда завершается с ошибкой, если p95 какого-либо сценария вырос больше чем на
+``--max-regression`` или увеличилось количество запросов к базе.
+
+Данные для прогона создает команда ``flask seed``. Прогон выполняется на базе из настроек приложения.
+"""
+import json
+import math
+import resource
+import statistics
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+
+#: Сценарий нагрузки: имя, метод и путь запроса
+Scenario = namedtuple('Scenario', ['name', 'method', 'path'])
+
+#: Сценарии нагрузки (GET-запросы выполняются от имени администратора)
+SCENARIOS = [
+    Scenario('index', 'GET', '/index/'),
+    Scenario('profile', 'GET', '/profile/'),
+    Scenario('user', 'GET', '/user/'),
+    Scenario('staff', 'GET', '/staff/'),
+    Scenario('staff_next_page', 'GET', '/staff/?after=100'),
+    Scenario('staff_stream', 'GET', '/staff/?stream=1'),
+    Scenario('team', 'GET', '/team/'),
+    Scenario('team_set', 'GET', '/team_set/'),
+    Scenario('team_set_stream', 'GET', '/team_set/?stream=1'),
+    Scenario('analytics', 'GET', '/analytics/'),
+    Scenario('analytics_data', 'GET', '/analytics/data/'),
+    Scenario('staff_export_csv', 'GET', '/staff/export.csv'),
+    Scenario('team_export_csv', 'GET', '/team/export.csv'),
+    Scenario('team_set_export_jsonl', 'GET', '/team_set/export.jsonl'),
+    Scenario('api_staff', 'GET', '/api/v1/staff/?embed=team_sets'),
+    Scenario('api_team_sets', 'GET', '/api/v1/team_sets/?embed=team,staff'),
+    Scenario('admin_users', 'GET', '/admin/users_admin/'),
+    Scenario('admin_staff', 'GET', '/admin/staff_admin/'),
+    Scenario('admin_staff_search', 'GET', '/admin/staff_admin/?search=Иванов'),
+    Scenario('admin_staff_sort', 'GET', '/admin/staff_admin/?sort=5&desc=1'),
+    Scenario('admin_team', 'GET', '/admin/team_admin/'),
+    Scenario('admin_team_search', 'GET', '/admin/team_admin/?search=аналитики'),
+    Scenario('admin_team_sort', 'GET', '/admin/team_admin/?sort=2&desc=1'),
+    Scenario('admin_team_set', 'GET', '/admin/team_set_admin/'),
+    Scenario('admin_team_set_search', 'GET', '/admin/team_set_admin/?search=Платформа'),
+    Scenario('admin_team_set_sort', 'GET', '/admin/team_set_admin/?sort=2&desc=1'),
+    Scenario('login', 'POST', '/login/'),
+]
+
+#: Итоги сценария
+ScenarioResult = namedtuple(
+    'ScenarioResult', ['name', 'requests', 'errors', 'p50', 'p95', 'p99', 'rps', 'queries', 'peak_rss_mb']
+)
+
+
+def percentile(values, fraction):
+    """
+    Возвращает перцентиль отсортированного списка (метод ближайшего ранга).
+
+    :param values: Отсортированные значения.
+    :type values: list
+    :param fraction: Доля от 0 до 1 (например, 0.95).
+    :type fraction: float
+    """
+    # Ранг - ceil(fraction * n); округление до 9 знаков убирает погрешность вида 0.07 * 100 = 7.000000000000001
+    index = max(0, min(len(values) - 1, math.ceil(round(fraction * len(values), 9)) - 1))
+    return values[index]
+
+
+def peak_rss_mb():
+    """
+    Возвращает пиковый объем резидентной памяти процесса в мегабайтах.
+
+    :rtype: float
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в килобайтах, в macOS - в байтах
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class _QueryCounter:
+    """
+    Счетчик SQL-запросов текущего потока.
+    """
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def take(self):
+        count = getattr(self._local, 'count', 0)
+        self._local.count = 0
+        return count
+
+
+class Benchmark:
+    """
+    Прогон сценариев нагрузки против приложения через тестовые клиенты (по одному на поток).
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    :param user_id: Идентификатор пользователя, от имени которого выполняются GET-запросы.
+    :type user_id: int
+    :param login_data: Данные формы входа для сценария login (None - сценарий пропускается).
+    :type login_data: dict or None
+    """
+
+    def __init__(self, app, user_id, login_data=None):
+        from app.db import db
+
+        self.app = app
+        self.user_id = user_id
+        self.login_data = login_data
+        with app.app_context():
+            self.queries = _QueryCounter(db.engine)
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(self.user_id)
+                session['_fresh'] = True
+        return client
+
+    def _request(self, scenario):
+        if scenario.method == 'POST':
+            # Каждый вход выполняется новым анонимным клиентом
+            send, kwargs = self.app.test_client().post, {'data': self.login_data}
+        else:
+            send, kwargs = self._client().get, {}
+
+        self.queries.take()
+        started = time.perf_counter()
+        response = send(scenario.path, **kwargs)
+        # Потоковые ответы выполняют запросы при чтении тела, поэтому тело читается целиком
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        return elapsed, self.queries.take(), response.status_code >= 400
+
+    def run(self, scenario, requests, concurrency, warmup=1):
+        """
+        Выполняет сценарий и возвращает его итоги.
+
+        :param scenario: Сценарий.
+        :type scenario: Scenario
+        :param requests: Количество измеряемых запросов.
+        :type requests: int
+        :param concurrency: Количество потоков.
+        :type concurrency: int
+        :param warmup: Количество запросов прогрева на поток (не измеряются).
+        :type warmup: int
+        :rtype: ScenarioResult
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda _: self._request(scenario), range(warmup * concurrency)))
+            started = time.perf_counter()
+            samples = list(executor.map(lambda _: self._request(scenario), range(requests)))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        return ScenarioResult(
+            name=scenario.name,
+            requests=requests,
+            errors=sum(sample[2] for sample in samples),
+            p50=percentile(latencies, 0.50),
+            p95=percentile(latencies, 0.95),
+            p99=percentile(latencies, 0.99),
+            rps=requests / elapsed,
+            queries=statistics.mean(sample[1] for sample in samples),
+            peak_rss_mb=peak_rss_mb(),
+        )
+
+
+def compare_with_baseline(results, baseline, max_regression):
+    """
+    Сравнивает итоги с базовыми.
+
+    :param results: Итоги текущего прогона.
+    :type results: list[ScenarioResult]
+    :param baseline: Базовые итоги: имя сценария - словарь полей ScenarioResult.
+    :type baseline: dict
+    :param max_regression: Допустимый относительный рост p95 (например, 0.2 - на 20%).
+    :type max_regression: float
+    :return: Строки отчета и список сценариев с ухудшением.
+    :rtype: tuple
+    """
+    lines, regressions = [], []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            lines.append(f'{result.name:<24} нет в базовых итогах')
+            continue
+        p95_change = (result.p95 - base['p95']) / base['p95'] if base['p95'] else 0.0
+        rps_change = (result.rps - base['rps']) / base['rps'] if base['rps'] else 0.0
+        worse = p95_change > max_regression or result.queries > base['queries']
+        if worse:
+            regressions.append(result.name)
+        lines.append(
+            f'{result.name:<24} p95 {p95_change:+7.1%}  rps {rps_change:+7.1%}  '
+            f'запросы {base["queries"]:.1f} -> {result.queries:.1f}{"  УХУДШЕНИЕ" if worse else ""}'
+        )
+    return lines, regressions
+
+
+def _format_result(result):
+    return (
+        f'{result.name:<24} {result.p50:8.1f} {result.p95:8.1f} {result.p99:8.1f} {result.rps:8.1f} '
+        f'{result.queries:7.1f} {result.errors:6} {result.peak_rss_mb:8.1f}'
+    )
+
+
+@click.command('benchmark')
+@click.option('--requests', 'requests_count', type=click.IntRange(1), default=50, show_default=True,
+              help='Количество измеряемых запросов в каждом сценарии.')
+@click.option('--concurrency', type=click.IntRange(1), default=4, show_default=True, help='Количество потоков.')
+@click.option('--scenario', 'names', multiple=True, type=click.Choice([scenario.name for scenario in SCENARIOS]),
+              help='Выполнить только указанные сценарии (можно указать несколько раз).')
+@click.option('--email', help='Email администратора для GET-запросов и сценария login (по умолчанию - первый администратор).')
+@click.option('--password', help='Пароль для сценария login (без него сценарий пропускается).')
+@click.option('--baseline', 'baseline_path', type=click.Path(dir_okay=False, exists=True),
+              help='Файл базовых итогов для сравнения.')
+@click.option('--save-baseline', 'save_path', type=click.Path(dir_okay=False), help='Сохранить итоги как базовые.')
+@click.option('--max-regression', type=float, default=0.2, show_default=True,
+              help='Допустимый относительный рост p95 по сравнению с базовыми итогами.')
+@with_appcontext
+def benchmark_command(requests_count, concurrency, names, email, password, baseline_path, save_path, max_regression):
+    """
+    Нагрузочный прогон страниц кабинета, выгрузок, API, админки и входа через тестовый WSGI-клиент.
+    """
+    from app.modules.user.models import User
+
+    app = current_app._get_current_object()
+    query = User.query.filter_by(user_email=email) if email else User.query.filter_by(role='admin')
+    user = query.order_by(User.id).first()
+    if user is None:
+        raise click.ClickException('Пользователь для прогона не найден.')
+
+    login_data = None
+    if password:
+        login_data = {'email': user.user_email, 'password': password}
+        # Вход измеряется без CSRF-токена и без ограничения частоты попыток (иначе все попытки получат 429)
+        app.config['WTF_CSRF_ENABLED'] = False
+        app.extensions.pop('login_throttle', None)
+
+    scenarios = [scenario for scenario in SCENARIOS if not names or scenario.name in names]
+    if login_data is None:
+        scenarios = [scenario for scenario in scenarios if scenario.method != 'POST']
+
+    benchmark = Benchmark(app, user.id, login_data)
+    click.echo(f'{"сценарий":<24} {"p50, мс":>8} {"p95, мс":>8} {"p99, мс":>8} {"rps":>8} '
+               f'{"запросы":>7} {"ошибки":>6} {"RSS, МБ":>8}')
+    results = []
+    for scenario in scenarios:
+        result = benchmark.run(scenario, requests_count, concurrency)
+        results.append(result)
+        click.echo(_format_result(result))
+
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as file:
+            json.dump({result.name: result._asdict() for result in results}, file, ensure_ascii=False, indent=2)
+        click.echo(f'Базовые итоги сохранены в {save_path}')
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        lines, regressions = compare_with_baseline(results, baseline, max_regression)
+        click.echo('Сравнение с базовыми итогами:')
+        click.echo('\n'.join(lines))
+        if regressions:
+            raise SystemExit(f'Ухудшение по сравнению с базовыми итогами: {", ".join(regressions)}')
@@ -0,0 +1,477 @@
+# utils/bulk_import.py
+"""
+Модуль для массового импорта сотрудников, команд и составов команд из файлов CSV и JSON Lines.
+
+Файл читается построчно, поэтому память не зависит от его размера. Каждая строка проверяется
+и приводится к значениям колонок таблицы. Названия команд и имена сотрудников переводятся
+в идентификаторы по словарям, которые загружаются из базы один раз в начале импорта.
+Проверенные строки записываются пакетами через ``executemany`` (SQLAlchemy Core, без создания
+ORM-объектов), и каждый пакет фиксируется отдельной транзакцией. Строки, не прошедшие проверку,
+записываются в файл отклоненных строк вместе с номером строки и причиной.
+
+Поддерживаемые сущности и поля:
+
+- ``staff``: staff_name, staff_date (ГГГГ-ММ-ДД), staff_datetime (ISO 8601, необязательно),
+  staff_active (true/false, 1/0, да/нет; по умолчанию true);
+- ``team``: team_name;
+- ``team_set``: team (название) или team_id, staff (имя) или staff_id, fte.
+
+Имена сотрудников и названия команд, которые уже есть в базе или повторяются в файле, отклоняются:
+иначе их нельзя однозначно указать при импорте составов команд.
+
+Записи TeamSet добавляются в обход событий ORM, поэтому после импорта составов команд
+сводные таблицы пересчитываются целиком (см. :mod:`app.modules.team_set.summary`).
+По той же причине версии данных таблиц (ETag страниц, см. :mod:`utils.data_versions`)
+повышаются явно после каждого пакета.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+from datetime import date, datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+#: Поддерживаемые форматы файлов
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+#: Значения логических полей
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', 'да', 't'}
+_FALSE_VALUES = {'0', 'false', 'no', 'n', 'нет', 'f'}
+
+#: Итог импорта: количество прочитанных, добавленных и отклоненных строк, путь к файлу отклоненных строк
+ImportResult = namedtuple('ImportResult', ['processed', 'inserted', 'rejected', 'rejects_path'])
+
+
+class RowError(ValueError):
+    """
+    Ошибка проверки строки импортируемого файла. Строка отклоняется, импорт продолжается.
+    """
+
+
+class FileEncodingError(ValueError):
+    """
+    Файл не удалось прочитать в кодировке UTF-8 (например, CSV, сохраненный Excel в cp1251).
+    Импорт останавливается, пакеты, записанные до ошибки, сохраняются.
+
+    :param encoding: Кодировка, в которой читался файл.
+    :type encoding: str
+    :param line: Номер последней прочитанной строки (ошибка находится после нее).
+    :type line: int
+    :param result: Итог импорта до ошибки.
+    :type result: ImportResult
+    """
+
+    def __init__(self, encoding, line, result):
+        self.encoding = encoding
+        self.line = line
+        self.result = result
+        position = f'после строки {line}' if line else 'в начале файла'
+        super().__init__(
+            f'Файл не в кодировке {encoding}: ошибка чтения {position}. '
+            f'Добавлено строк до ошибки: {result.inserted}. Сохраните файл в UTF-8 и повторите импорт.'
+        )
+
+
+def detect_format(filename):
+    """
+    Определяет формат файла по расширению.
+
+    :param filename: Имя файла.
+    :type filename: str
+    :return: 'csv' или 'jsonl'.
+    :rtype: str
+    :raises ValueError: Если расширение не поддерживается.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f'Неподдерживаемый формат файла: {filename}. Ожидается .csv или .jsonl')
+
+
+def read_rows(stream, fmt):
+    """
+    Читает строки файла по одной.
+
+    :param stream: Текстовый поток.
+    :param fmt: Формат файла ('csv' или 'jsonl').
+    :type fmt: str
+    :return: Итератор пар (номер строки, исходная строка): для CSV - словарь, для JSON Lines - текст строки.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_no, line
+
+
+def _as_mapping(raw, fmt):
+    """
+    Приводит исходную строку к словарю полей.
+
+    :raises RowError: Если строка JSON Lines не является JSON-объектом.
+    """
+    if fmt == 'csv':
+        return raw
+    try:
+        row = json.loads(raw)
+    except ValueError as error:
+        raise RowError(f'некорректный JSON: {error}')
+    if not isinstance(row, dict):
+        raise RowError('строка должна быть JSON-объектом')
+    return row
+
+
+def _text(row, field, required=True):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if not value and required:
+        raise RowError(f'не заполнено поле {field}')
+    return value or None
+
+
+def _float(row, field):
+    value = row.get(field)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float(_text(row, field).replace(',', '.'))
+    except ValueError:
+        raise RowError(f'поле {field} должно быть числом')
+
+
+def _int(row, field):
+    value = row.get(field)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(_text(row, field))
+    except ValueError:
+        raise RowError(f'поле {field} должно быть целым числом')
+
+
+def _bool(row, field, default):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    value = _text(row, field, required=False)
+    if value is None:
+        return default
+    value = value.lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise RowError(f'поле {field} должно быть логическим значением (true/false)')
+
+
+def _date(row, field):
+    try:
+        return date.fromisoformat(_text(row, field))
+    except ValueError:
+        raise RowError(f'поле {field} должно быть датой в формате ГГГГ-ММ-ДД')
+
+
+def _datetime(row, field):
+    value = _text(row, field, required=False)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'поле {field} должно быть датой и временем в формате ISO 8601')
+
+
+class NameMap:
+    """
+    Словарь «название -> идентификатор» для команд или сотрудников, загружаемый из базы один раз.
+
+    Названия, которые встречаются в таблице несколько раз, считаются неоднозначными.
+
+    :param connection: Соединение с базой данных.
+    :param id_column: Колонка идентификатора.
+    :param name_column: Колонка названия.
+    """
+
+    #: Метка неоднозначного названия
+    AMBIGUOUS = object()
+
+    def __init__(self, connection, id_column, name_column):
+        self.ids = set()
+        self.names = {}
+        for row_id, name in connection.execute(select(id_column, name_column)):
+            self.ids.add(row_id)
+            self.names[name] = self.AMBIGUOUS if name in self.names else row_id
+
+    def resolve(self, row, name_field, id_field):
+        """
+        Возвращает идентификатор по полю названия или по полю идентификатора строки.
+
+        :raises RowError: Если запись не найдена или название неоднозначно.
+        """
+        if row.get(id_field) not in (None, ''):
+            row_id = _int(row, id_field)
+            if row_id not in self.ids:
+                raise RowError(f'запись {id_field}={row_id} не найдена')
+            return row_id
+
+        name = _text(row, name_field)
+        row_id = self.names.get(name)
+        if row_id is None:
+            raise RowError(f'{name_field} «{name}» не найден')
+        if row_id is self.AMBIGUOUS:
+            raise RowError(f'{name_field} «{name}» неоднозначен: в базе несколько записей с таким названием')
+        return row_id
+
+    def add_new(self, name, field):
+        """
+        Регистрирует новое название, проверяя, что его еще нет в базе и в файле.
+
+        :raises RowError: Если название уже есть.
+        """
+        if name in self.names:
+            raise RowError(f'{field} «{name}» уже существует')
+        self.names[name] = self.AMBIGUOUS
+
+
+class RejectWriter:
+    """
+    Файл отклоненных строк в формате исходного файла с номером строки и причиной отклонения.
+
+    Файл создается при первой отклоненной строке.
+
+    :param path: Путь к файлу.
+    :param fmt: Формат файла ('csv' или 'jsonl').
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line_no, raw, error):
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8', newline='')
+        self.count += 1
+
+        if self.fmt == 'csv':
+            if self._writer is None:
+                fieldnames = [key for key in raw if key is not None] + ['_line', '_error']
+                self._writer = csv.DictWriter(self._file, fieldnames, extrasaction='ignore', restval='')
+                self._writer.writeheader()
+            self._writer.writerow(dict(raw, _line=line_no, _error=str(error)))
+        else:
+            try:
+                row = json.loads(raw)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                row = {'_raw': raw.rstrip('\n')}
+            row.update(_line=line_no, _error=str(error))
+            self._file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _import_targets():
+    """
+    Возвращает описания импортируемых сущностей: таблицу и функцию проверки строки.
+
+    Функция проверки получает строку и словари названий и возвращает значения колонок таблицы.
+
+    :rtype: dict
+    """
+    from app.modules.staff.models import Staff
+    from app.modules.team.models import Team
+    from app.modules.team_set.models import TeamSet
+
+    def parse_staff(row, teams, staff):
+        name = _text(row, 'staff_name')
+        values = {
+            'staff_name': name,
+            'staff_date': _date(row, 'staff_date'),
+            'staff_datetime': _datetime(row, 'staff_datetime'),
+            'staff_active': _bool(row, 'staff_active', True),
+        }
+        staff.add_new(name, 'staff_name')
+        return values
+
+    def parse_team(row, teams, staff):
+        name = _text(row, 'team_name')
+        teams.add_new(name, 'team_name')
+        return {'team_name': name}
+
+    def parse_team_set(row, teams, staff):
+        fte = _float(row, 'fte')
+        if fte < 0:
+            raise RowError('поле fte не может быть отрицательным')
+        return {
+            'team_id': teams.resolve(row, 'team', 'team_id'),
+            'staff_id': staff.resolve(row, 'staff', 'staff_id'),
+            'fte': fte,
+        }
+
+    return {
+        'staff': (Staff.__table__, parse_staff),
+        'team': (Team.__table__, parse_team),
+        'team_set': (TeamSet.__table__, parse_team_set),
+    }
+
+
+#: Импортируемые сущности
+IMPORT_ENTITIES = ('staff', 'team', 'team_set')
+
+
+def _write_batch(engine, table, batch, rejects):
+    """
+    Записывает пакет строк одной транзакцией через executemany.
+
+    Если пакет не удалось записать (например, из-за ограничения базы данных), строки
+    записываются по одной, а ошибочные отправляются в файл отклоненных строк.
+
+    :return: Количество добавленных строк.
+    :rtype: int
+    """
+    try:
+        with engine.begin() as connection:
+            connection.execute(table.insert(), [values for _, _, values in batch])
+        return len(batch)
+    except DBAPIError:
+        pass
+
+    inserted = 0
+    for line_no, raw, values in batch:
+        try:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), values)
+            inserted += 1
+        except DBAPIError as error:
+            rejects.write(line_no, raw, getattr(error, 'orig', error))
+    return inserted
+
+
+def import_file(entity, stream, fmt, rejects_path, batch_size=None, progress=None):
+    """
+    Импортирует строки из потока в таблицу сущности.
+
+    :param entity: Сущность: 'staff', 'team' или 'team_set'.
+    :type entity: str
+    :param stream: Текстовый поток с содержимым файла.
+    :param fmt: Формат файла ('csv' или 'jsonl').
+    :type fmt: str
+    :param rejects_path: Путь к файлу отклоненных строк (создается, только если такие строки есть).
+    :type rejects_path: str
+    :param batch_size: Количество строк в одном пакете и одной транзакции (по умолчанию IMPORT_BATCH_SIZE).
+    :type batch_size: int
+    :param progress: Функция, вызываемая после каждого пакета с промежуточным :class:`ImportResult`.
+    :return: Итог импорта.
+    :rtype: ImportResult
+    """
+    from app.db import db
+    from app.modules.staff.models import Staff
+    from app.modules.team.models import Team
+    from app.modules.team_set.models import TeamAllocationSummary, StaffAllocationSummary
+    from app.modules.team_set.summary import rebuild_allocation_summary
+    from utils.data_versions import bump_data_versions
+
+    if entity not in IMPORT_ENTITIES:
+        raise ValueError(f'Неизвестная сущность: {entity}')
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Неизвестный формат: {fmt}')
+
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    table, parse = _import_targets()[entity]
+    engine = db.engine
+
+    with engine.connect() as connection:
+        teams = NameMap(connection, Team.__table__.c.id, Team.__table__.c.team_name)
+        staff = NameMap(connection, Staff.__table__.c.id, Staff.__table__.c.staff_name)
+
+    rejects = RejectWriter(rejects_path, fmt)
+    processed = inserted = line_no = 0
+    batch = []
+    try:
+        for line_no, raw in read_rows(stream, fmt):
+            processed += 1
+            try:
+                batch.append((line_no, raw, parse(_as_mapping(raw, fmt), teams, staff)))
+            except RowError as error:
+                rejects.write(line_no, raw, error)
+                continue
+
+            if len(batch) >= batch_size:
+                inserted += _write_batch(engine, table, batch, rejects)
+                bump_data_versions(table.name)
+                batch = []
+                if progress:
+                    progress(ImportResult(processed, inserted, rejects.count, None))
+
+        if batch:
+            inserted += _write_batch(engine, table, batch, rejects)
+            bump_data_versions(table.name)
+    except UnicodeDecodeError as error:
+        # Поток декодируется блоками, поэтому известна только последняя прочитанная строка
+        result = ImportResult(processed, inserted, rejects.count, rejects_path if rejects.count else None)
+        raise FileEncodingError(error.encoding, line_no, result) from error
+    finally:
+        rejects.close()
+
+        # Сводные таблицы пересчитываются и после прерванного импорта: часть пакетов уже зафиксирована
+        if entity == 'team_set' and inserted:
+            with engine.begin() as connection:
+                rebuild_allocation_summary(connection)
+            bump_data_versions(TeamAllocationSummary, StaffAllocationSummary)
+
+    result = ImportResult(processed, inserted, rejects.count, rejects_path if rejects.count else None)
+    if progress:
+        progress(result)
+    return result
+
+
+@click.command('import-data')
+@click.argument('entity', type=click.Choice(IMPORT_ENTITIES))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Формат файла (по умолчанию по расширению).')
+@click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False),
+              help='Файл отклоненных строк (по умолчанию <файл>.rejected.<расширение>).')
+@click.option('--batch-size', type=click.IntRange(min=1), help='Количество строк в пакете и транзакции.')
+@with_appcontext
+def import_data_command(entity, path, fmt, rejects_path, batch_size):
+    """
+    Импортирует сотрудников, команды или составы команд из файла CSV или JSON Lines.
+    """
+    try:
+        fmt = fmt or detect_format(path)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint='PATH')
+
+    if rejects_path is None:
+        root, _ = os.path.splitext(path)
+        rejects_path = f'{root}.rejected.{fmt}'
+
+    def progress(result):
+        click.echo(f'Обработано строк: {result.processed}, добавлено: {result.inserted}, отклонено: {result.rejected}')
+
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        try:
+            result = import_file(entity, stream, fmt, rejects_path, batch_size=batch_size, progress=progress)
+        except FileEncodingError as error:
+            current_app.logger.warning('Импорт %s из %s отклонен: %s', entity, path, error)
+            raise click.ClickException(str(error))
+
+    current_app.logger.info('Импорт %s из %s: добавлено %s, отклонено %s', entity, path, result.inserted, result.rejected)
+    if result.rejects_path:
+        click.echo(f'Отклоненные строки записаны в {result.rejects_path}')
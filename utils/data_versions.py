@@ -0,0 +1,255 @@
+# utils/data_versions.py
+"""
+Модуль версий данных таблиц для условных ответов (ETag, Last-Modified и 304 Not Modified).
+
+У каждой таблицы есть версия - время ее последнего изменения в наносекундах. Версия хранится как
+время модификации (mtime) пустого файла с именем таблицы в директории ``DATA_VERSIONS_DIR``, поэтому
+ее видят все процессы (воркеры) на сервере, а чтение версии - это один вызов ``os.stat`` без обращения
+к базе данных.
+
+Версии повышаются после фиксации (commit) транзакции сессии, в которой изменялись объекты моделей
+(события ``after_flush`` и ``do_orm_execute`` сессии). Запись, которая обходит сессию (массовый
+импорт через Core), повышает версии сама через :func:`bump_data_versions`. Повышение после фиксации,
+а не во время flush, гарантирует, что параллельный запрос не получит новую версию вместе со старыми данными.
+
+Декоратор :func:`conditional_response` вычисляет сильный ETag по версиям таблиц, от которых зависит
+страница, адресу запроса и пользователю. Если клиент прислал совпадающий ``If-None-Match`` (или, без него,
+не более старый ``If-Modified-Since``), представление не вызывается: ответ 304 отдается без запросов
+к базе данных и без отрисовки шаблона.
+
+Last-Modified передается с точностью до секунды, а версии - в наносекундах. Пока секунда последнего
+изменения не закончилась, следующее изменение в ту же секунду не изменит Last-Modified, поэтому
+в это время заголовок Last-Modified не отправляется и If-Modified-Since не проверяется.
+
+Основные классы и функции:
+- DataVersions: Хранилище версий таблиц.
+- init_data_versions: Создает хранилище версий для приложения.
+- bump_data_versions: Повышает версии таблиц в текущем приложении.
+- current_versions: Возвращает текущие версии таблиц.
+- conditional_response: Декоратор условных ответов для представлений.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+
+from app.db import db
+
+
+class DataVersions:
+    """
+    Версии таблиц, хранящиеся как время модификации файлов в общей директории.
+
+    :param directory: Директория файлов версий (создается при необходимости).
+    :type directory: str
+    :param salt: Строка, добавляемая к ETag (меняется при обновлении шаблонов приложения).
+    :type salt: str
+    """
+
+    def __init__(self, directory, salt=''):
+        self.directory = directory
+        self.salt = salt
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table):
+        return os.path.join(self.directory, table)
+
+    def get(self, table):
+        """
+        Возвращает версию таблицы. Для таблицы без файла версии файл создается с текущим временем.
+
+        :param table: Имя таблицы.
+        :type table: str
+        :return: Время последнего изменения таблицы в наносекундах.
+        :rtype: int
+        """
+        path = self._path(table)
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            open(path, 'a').close()
+            return os.stat(path).st_mtime_ns
+
+    def bump(self, *tables):
+        """
+        Повышает версии таблиц до текущего времени (но не меньше чем на единицу от прежней версии).
+
+        :param tables: Имена таблиц.
+        """
+        for table in tables:
+            path = self._path(table)
+            try:
+                current = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                open(path, 'a').close()
+                current = 0
+            version = max(time.time_ns(), current + 1)
+            os.utime(path, ns=(version, version))
+
+
+def _templates_salt(app):
+    """
+    Возвращает строку, которая меняется при изменении шаблонов приложения, чтобы после обновления
+    кода клиенты не получили 304 на страницу, отрисованную старым шаблоном.
+    """
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    latest = count = 0
+    for root, _, files in os.walk(template_dir):
+        for name in files:
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            count += 1
+    return f'{count}:{latest}'
+
+
+def init_data_versions(app):
+    """
+    Создает хранилище версий таблиц для приложения по настройке DATA_VERSIONS_DIR.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    app.extensions['data_versions'] = DataVersions(app.config['DATA_VERSIONS_DIR'], salt=_templates_salt(app))
+
+
+def bump_data_versions(*tables):
+    """
+    Повышает версии таблиц в текущем приложении (для записи в базу в обход сессии).
+
+    :param tables: Имена таблиц или модели.
+    """
+    versions = current_app.extensions.get('data_versions') if current_app else None
+    if versions is not None:
+        versions.bump(*(_table_name(table) for table in tables))
+
+
+def _table_name(table):
+    return table if isinstance(table, str) else table.__table__.name
+
+
+def current_versions(tables):
+    """
+    Возвращает текущие версии таблиц приложения.
+
+    :param tables: Модели или имена таблиц.
+    :return: Кортеж пар (имя таблицы, версия) в порядке перечисления таблиц.
+    :rtype: tuple
+    """
+    versions = current_app.extensions['data_versions']
+    return tuple((name, versions.get(name)) for name in map(_table_name, tables))
+
+
+def _remember_tables(session, tables):
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _remember_flushed_tables(session, flush_context):
+    """
+    Запоминает в сессии таблицы объектов, добавленных, измененных или удаленных при flush.
+
+    Версии повышаются только после фиксации транзакции (см. :func:`_bump_after_commit`).
+    """
+    tables = {inspect(obj).mapper.local_table.name for obj in session.new}
+    tables.update(inspect(obj).mapper.local_table.name for obj in session.deleted)
+    tables.update(
+        inspect(obj).mapper.local_table.name
+        for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    )
+    if tables:
+        _remember_tables(session, tables)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _remember_bulk_tables(orm_execute_state):
+    """
+    Запоминает таблицы массовых INSERT, UPDATE и DELETE, выполненных через сессию (без flush).
+    """
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _remember_tables(orm_execute_state.session, {orm_execute_state.statement.table.name})
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_after_commit(session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        bump_data_versions(*tables)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('changed_tables', None)
+
+
+def _not_modified(etag, last_modified):
+    """
+    Проверяет условные заголовки запроса. If-None-Match, если он есть, имеет приоритет над If-Modified-Since.
+
+    :param etag: ETag текущей версии ответа.
+    :type etag: str
+    :param last_modified: Время последнего изменения или None, если If-Modified-Since проверять нельзя.
+    :type last_modified: datetime or None
+    :rtype: bool
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return (last_modified is not None and request.if_modified_since is not None
+            and request.if_modified_since >= last_modified)
+
+
+def conditional_response(*tables):
+    """
+    Декоратор условных ответов для представлений, данные которых зависят от указанных таблиц.
+
+    ETag вычисляется по версиям таблиц, пути и параметрам запроса, пользователю и его роли. Ответ 304
+    отдается до вызова представления. Заголовки ETag и Last-Modified добавляются только к ответам 200.
+    Если в сессии есть flash-сообщения, страница отрисовывается заново и не кэшируется клиентом,
+    чтобы сообщения не потерялись.
+
+    Декоратор ставится после ``login_required``.
+
+    :param tables: Модели или имена таблиц, от которых зависит ответ.
+    :return: Декоратор представления.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            versions = current_app.extensions.get('data_versions')
+            if versions is None or request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            stamps = current_versions(tables)
+            key = '|'.join([
+                versions.salt, request.full_path, str(current_user.get_id()), str(getattr(current_user, 'role', '')),
+                *(f'{table}={stamp}' for table, stamp in stamps)
+            ])
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            # Last-Modified передается с точностью до секунды и только после того, как секунда последнего
+            # изменения закончилась: иначе изменение в ту же секунду не изменит заголовок
+            modified_second = max(stamp for _, stamp in stamps) // 1_000_000_000
+            last_modified = None
+            if time.time_ns() // 1_000_000_000 > modified_second:
+                last_modified = datetime.fromtimestamp(modified_second, timezone.utc)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Клиент может хранить ответ, но обязан каждый раз проверять его актуальность
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,174 @@
+# utils/export.py
+"""
+Модуль для потоковой выгрузки списков кабинета в форматах CSV и JSON Lines.
+
+Выгрузка строится по словарю «имя поля -> SQL-выражение» и выполняется одним SELECT
+только по нужным колонкам, без создания ORM-объектов. Строки читаются из курсора порциями
+через ``yield_per`` (``EXPORT_CHUNK_SIZE``) и сразу отдаются клиенту, поэтому память на запрос
+не зависит от размера таблицы, а заголовок файла уходит клиенту до выполнения запроса.
+
+Параметры запроса:
+
+- ``fields=id,name,...`` - выгружаемые поля и их порядок (по умолчанию все);
+- ``<поле>=<значение>`` - точное совпадение;
+- ``<поле>__gte=<значение>``, ``<поле>__lte=<значение>`` - границы диапазона;
+- ``<поле>__prefix=<значение>`` - начало строки (по диапазону, поэтому может использовать индекс).
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from flask import current_app, request, stream_with_context
+
+from app.db import db
+
+#: Поддерживаемые форматы выгрузки и их MIME-типы
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+#: Операторы фильтров
+_OPERATORS = {
+    'gte': lambda column, value: column >= value,
+    'lte': lambda column, value: column <= value,
+    'prefix': lambda column, value: db.and_(column >= value, column < value + '\uffff'),
+}
+
+#: Строковые значения логических фильтров
+_BOOLEAN_VALUES = {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}
+
+
+class ExportError(ValueError):
+    """
+    Ошибка в параметрах выгрузки (неизвестное поле, некорректное значение фильтра).
+    """
+
+
+def _convert(column, value):
+    """
+    Приводит значение фильтра из строки запроса к типу колонки.
+
+    :param column: SQL-выражение колонки.
+    :param value: Значение из строки запроса.
+    :type value: str
+    :raises ExportError: Если значение нельзя привести к типу колонки.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    try:
+        if python_type is bool:
+            return _BOOLEAN_VALUES[value.lower()]
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+    except (KeyError, ValueError):
+        raise ExportError(f'Некорректное значение фильтра: {value}')
+
+
+def build_export_query(columns, select_from=None, args=None):
+    """
+    Строит запрос выгрузки по параметрам запроса: выбранные поля и фильтры.
+
+    :param columns: Словарь «имя поля -> SQL-выражение»; поле ``id`` задает порядок выгрузки.
+    :type columns: dict
+    :param select_from: Источник строк (таблица или соединение таблиц), если он не выводится из колонок.
+    :param args: Параметры запроса (по умолчанию ``request.args``).
+    :return: Список выгружаемых полей и запрос SQLAlchemy Core.
+    :rtype: tuple
+    :raises ExportError: Если в параметрах указано неизвестное поле или некорректное значение.
+    """
+    args = request.args if args is None else args
+
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()] or list(columns)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ExportError(f'Неизвестные поля: {", ".join(unknown)}')
+
+    query = db.select(*(columns[field].label(field) for field in fields))
+    if select_from is not None:
+        query = query.select_from(select_from)
+
+    for key, value in args.items(multi=True):
+        if key in ('fields', 'format'):
+            continue
+        field, _, operator = key.partition('__')
+        if field not in columns or (operator and operator not in _OPERATORS):
+            raise ExportError(f'Неизвестный фильтр: {key}')
+        column = columns[field]
+        value = _convert(column, value) if operator != 'prefix' else value
+        query = query.where(_OPERATORS[operator](column, value) if operator else column == value)
+
+    return fields, query.order_by(columns['id'])
+
+
+def _jsonable(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(fields, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def _jsonl_chunks(fields, partitions):
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(fields, map(_jsonable, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def export_response(filename, fmt, columns, select_from=None):
+    """
+    Возвращает потоковый ответ с выгрузкой в формате CSV или JSON Lines.
+
+    :param filename: Имя файла выгрузки без расширения.
+    :type filename: str
+    :param fmt: Формат выгрузки ('csv' или 'jsonl').
+    :type fmt: str
+    :param columns: Словарь «имя поля -> SQL-выражение».
+    :type columns: dict
+    :param select_from: Источник строк (таблица или соединение таблиц).
+    :return: Ответ Flask. При ошибке в параметрах - ответ 400 с текстом ошибки.
+    """
+    if fmt not in EXPORT_FORMATS:
+        return current_app.response_class(f'Неизвестный формат: {fmt}\n', status=400, mimetype='text/plain')
+
+    try:
+        fields, query = build_export_query(columns, select_from)
+    except ExportError as error:
+        return current_app.response_class(f'{error}\n', status=400, mimetype='text/plain')
+
+    chunk_size = current_app.config['EXPORT_CHUNK_SIZE']
+
+    def partitions():
+        result = db.session.execute(query.execution_options(yield_per=chunk_size))
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    chunks = _csv_chunks if fmt == 'csv' else _jsonl_chunks
+    response = current_app.response_class(
+        stream_with_context(chunks(fields, partitions())),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
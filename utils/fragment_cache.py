@@ -0,0 +1,164 @@
+# utils/fragment_cache.py
+"""
+Модуль кэширования фрагментов шаблонов Jinja с ключом по версиям данных таблиц.
+
+Тег ``{% cache %}`` сохраняет отрисованный фрагмент в LRU-кэше процесса с ограничением суммарного
+размера (``FRAGMENT_CACHE_MAX_BYTES``). Ключ фрагмента состоит из его имени, текущих версий таблиц
+(см. :mod:`utils.data_versions`) и дополнительных значений, например параметров запроса::
+
+    {% cache 'staff_rows' if not streaming, data_tables, request.query_string %}
+        ... строки таблицы ...
+    {% endcache %}
+
+- первый аргумент - имя фрагмента; если оно ложно (например, в потоковом режиме), фрагмент
+  выводится как обычно, без кэширования и без буферизации;
+- второй аргумент - модели или имена таблиц, от которых зависит фрагмент;
+- остальные аргументы (хэшируемые значения) добавляются к ключу.
+
+После изменения таблицы ключ меняется, а устаревшие фрагменты вытесняются из кэша по мере его
+заполнения. Данные, из которых строится фрагмент, должны загружаться лениво (при обращении
+из шаблона), тогда при попадании в кэш не выполняются ни запрос к базе данных, ни отрисовка.
+
+Основные классы и функции:
+- FragmentCache: Потокобезопасный LRU-кэш строк с ограничением размера и счетчиками.
+- FragmentCacheExtension: Расширение Jinja с тегом ``{% cache %}``.
+- init_fragment_cache: Создает кэш и подключает расширение к приложению.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from utils.data_versions import current_versions
+
+
+class FragmentCache:
+    """
+    Потокобезопасный LRU-кэш отрисованных фрагментов с ограничением суммарного размера в байтах.
+
+    Фрагмент больше ``max_bytes`` не сохраняется. Счетчики попаданий, промахов, вытеснений
+    и слишком больших фрагментов возвращает :meth:`stats`.
+
+    :param max_bytes: Максимальный суммарный размер фрагментов в памяти (0 - кэш отключен).
+    :type max_bytes: int
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.oversized = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Возвращает фрагмент по ключу или None, если его нет в кэше.
+
+        :param key: Хэшируемый ключ фрагмента.
+        :rtype: str or None
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        Сохраняет фрагмент, вытесняя самые давно использованные при превышении размера.
+
+        :param key: Хэшируемый ключ фрагмента.
+        :param value: Отрисованный фрагмент.
+        :type value: str
+        """
+        size = sys.getsizeof(value)
+        with self._lock:
+            if size > self.max_bytes:
+                self.oversized += 1
+                return
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.bytes -= sys.getsizeof(previous)
+            self._items[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Очищает кэш (счетчики сохраняются).
+        """
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Возвращает счетчики кэша.
+
+        :return: Словарь с количеством и размером фрагментов, попаданиями, промахами,
+            вытеснениями и отклоненными слишком большими фрагментами.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'entries': len(self._items),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'oversized': self.oversized,
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Расширение Jinja с тегом ``{% cache name, tables, *keys %}...{% endcache %}``.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+
+        # Без имени фрагмент выводится напрямую, чтобы не буферизовать его в потоковом режиме
+        cached = nodes.CallBlock(self.call_method('_render_cached', [nodes.List(args)]), [], [], body)
+        return nodes.If(args[0], [cached.set_lineno(lineno)], [], body).set_lineno(lineno)
+
+    def _render_cached(self, args, caller):
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None or cache.max_bytes <= 0:
+            return caller()
+
+        name, tables, *keys = args
+        key = (name, current_versions(tables), *keys)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.put(key, str(value))
+        return Markup(value)
+
+
+def init_fragment_cache(app):
+    """
+    Создает кэш фрагментов по настройке FRAGMENT_CACHE_MAX_BYTES и подключает тег ``{% cache %}``.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
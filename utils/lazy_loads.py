@@ -0,0 +1,181 @@
+# utils/lazy_loads.py
+"""
+Модуль обнаружения повторных ленивых загрузок отношений (N+1) в запросах.
+
+Все отношения моделей объявлены с ``lazy='select'``: обращение к ``team_set.team`` или
+``staff.team_sets`` у объекта, отношение которого еще не загружено, выполняет отдельный SQL-запрос.
+В цикле по строкам списка (форматтеры колонок админки, выражения шаблонов) это дает по запросу
+на строку. Модуль подсчитывает ленивые загрузки каждого отношения за время обработки запроса
+(событие сессии ``do_orm_execute``) и, если одно отношение загружено лениво ``LAZY_LOAD_THRESHOLD``
+или больше раз, сообщает о нем.
+
+Режимы (``LAZY_LOAD_DETECTION``):
+- None: обнаружение отключено (события не обрабатываются);
+- 'warn': в конце запроса в лог приложения пишется предупреждение с представлением, отношением,
+  количеством загрузок, местом вызова (файл и строка кода приложения или шаблона) и подходящим
+  вариантом загрузки (``joinedload`` для связи «многие к одному», ``selectinload`` для коллекций);
+- 'raise': повторная ленивая загрузка завершается исключением LazyLoadError, как для отношения
+  с ``lazy='raise'`` (строгий режим для тестов и тестового стенда).
+
+Загрузки, которые не выполняют SQL (объект уже есть в сессии), не учитываются.
+"""
+import os
+import sys
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import RelationshipDirection
+
+from app.db import db
+
+#: Режимы обнаружения
+LAZY_LOAD_MODES = (None, 'warn', 'raise')
+
+
+class LazyLoadError(InvalidRequestError):
+    """
+    Отношение повторно загружено лениво в строгом режиме обнаружения.
+    """
+
+
+def loader_option(relationship):
+    """
+    Возвращает вариант загрузки, который следует указать в запросе вместо ленивой загрузки отношения.
+
+    :param relationship: Отношение модели.
+    :type relationship: RelationshipProperty
+    :return: Выражение вида ``joinedload(TeamSet.team)``.
+    :rtype: str
+    """
+    loader = 'joinedload' if relationship.direction is RelationshipDirection.MANYTOONE else 'selectinload'
+    return f'{loader}({relationship})'
+
+
+def call_site(root):
+    """
+    Возвращает место вызова в коде приложения: ближайший к точке вызова кадр шаблона Jinja
+    или файла внутри ``root`` (кроме установленных пакетов и этого модуля).
+
+    :param root: Корневая директория проекта.
+    :type root: str
+    :return: Строка вида ``member/team_set/index.html:25`` или ``app/modules/.../views.py:170 (func)``.
+    :rtype: str
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            return f'{template.name or "<строка>"}:{template.get_corresponding_lineno(frame.f_lineno)}'
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and 'site-packages' not in filename and filename != __file__:
+            return f'{os.path.relpath(filename, root)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return 'неизвестно'
+
+
+class LazyLoadTracker:
+    """
+    Счетчики ленивых загрузок отношений в одном запросе.
+
+    :param mode: Режим обнаружения ('warn' или 'raise').
+    :type mode: str
+    :param threshold: Количество ленивых загрузок одного отношения, начиная с которого оно считается N+1.
+    :type threshold: int
+    :param root: Корневая директория проекта (для определения места вызова).
+    :type root: str
+    """
+
+    def __init__(self, mode, threshold, root):
+        self.mode = mode
+        self.threshold = threshold
+        self.root = root
+        #: Отношение - количество ленивых загрузок
+        self.counts = {}
+        #: Отношение - место вызова повторной загрузки
+        self.sites = {}
+
+    def record(self, relationship):
+        """
+        Учитывает ленивую загрузку отношения.
+
+        :param relationship: Отношение модели.
+        :type relationship: RelationshipProperty
+        :raises LazyLoadError: Отношение загружено повторно в режиме 'raise'.
+        """
+        count = self.counts[relationship] = self.counts.get(relationship, 0) + 1
+        if count != self.threshold:
+            return
+        # Место вызова определяется один раз на отношение, когда загрузка становится повторной
+        site = self.sites[relationship] = call_site(self.root)
+        if self.mode == 'raise':
+            raise LazyLoadError(
+                f'Отношение {relationship} загружено лениво {count} раз в {request.endpoint} ({site}). '
+                f'Загрузите его в запросе: {loader_option(relationship)}'
+            )
+
+    def repeated(self):
+        """
+        Возвращает отношения, загруженные лениво не меньше порога раз.
+
+        :return: Список кортежей (отношение, количество загрузок, место вызова).
+        :rtype: list
+        """
+        return [
+            (relationship, count, self.sites[relationship])
+            for relationship, count in self.counts.items() if count >= self.threshold
+        ]
+
+
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.lazy_loaded_from is None or not has_request_context():
+        return
+    tracker = g.get('lazy_loads')
+    if tracker is not None:
+        tracker.record(orm_execute_state.loader_strategy_path.path[-1])
+
+
+def init_lazy_load_detection(app):
+    """
+    Подключает обнаружение повторных ленивых загрузок по настройкам LAZY_LOAD_*.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    mode = app.config['LAZY_LOAD_DETECTION']
+    if mode not in LAZY_LOAD_MODES:
+        raise ValueError(f'Неизвестный режим LAZY_LOAD_DETECTION: {mode!r}')
+    if mode is None:
+        return
+
+    # Сессия db.session общая для всех приложений процесса: обработчик подключается один раз
+    # и учитывает загрузки только в запросах приложений, создавших счетчики
+    if not event.contains(db.session, 'do_orm_execute', _on_orm_execute):
+        event.listen(db.session, 'do_orm_execute', _on_orm_execute)
+
+    threshold = app.config['LAZY_LOAD_THRESHOLD']
+    root = os.path.dirname(app.root_path) + os.sep
+
+    def report(tracker, endpoint, method, path):
+        for relationship, count, site in tracker.repeated():
+            app.logger.warning(
+                'N+1: отношение %s загружено лениво %s раз в %s (%s %s), место вызова %s. Загрузите его в запросе: %s',
+                relationship, count, endpoint, method, path, site, loader_option(relationship)
+            )
+
+    @app.before_request
+    def start_lazy_load_tracking():
+        g.lazy_loads = LazyLoadTracker(mode, threshold, root)
+
+    @app.after_request
+    def report_lazy_loads(response):
+        tracker = g.get('lazy_loads')
+        if tracker is None:
+            return response
+        args = (tracker, request.endpoint, request.method, request.full_path.rstrip('?'))
+        if response.is_streamed:
+            # Тело потокового ответа формируется после after_request: отчет пишется при закрытии ответа
+            response.call_on_close(lambda: report(*args))
+        else:
+            report(*args)
+        return response
@@ -7,35 +7,61 @@
 Логирование выполняется как в файл, так и в консоль с возможностью цветного форматирования для консоли.
 Логи включают детальную информацию о месте возникновения события, что облегчает отладку и мониторинг
 приложения в процессе эксплуатации.
+
+При включенной настройке LOG_QUEUE_ENABLED записи логов не пишутся в файл и консоль в потоке запроса:
+они помещаются в ограниченную очередь, а форматирование и запись выполняет фоновый поток
+(QueueHandler/QueueListener). Контекст запроса (пользователь, IP, эндпоинт) добавляется к записи
+один раз, в момент постановки в очередь.
+
+При LOG_FORMAT = 'json' файл логов пишется в формате JSON Lines (одна запись - один JSON-объект
+со стабильным набором полей). Настройка LOG_SAMPLE_RATES позволяет записывать только часть
+многочисленных DEBUG/INFO-записей отдельных логгеров. Сообщения логов передаются в виде шаблона
+с аргументами в стиле %, чтобы отброшенные записи не форматировались.
 """
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
-from flask import current_app, request, flash
+from flask import current_app, request, flash, g
 from flask_login import current_user
-from logging.handlers import RotatingFileHandler
 
 from colorlog import ColoredFormatter
 
 
-
-
 class RequestUserFilter(logging.Filter):
     """
-    Класс для добавления информации о пользователе и IP-адресе в каждый лог.
+    Класс для добавления информации о пользователе, IP-адресе, эндпоинте и запросе в каждый лог.
 
-    Этот фильтр добавляет в записи логов информацию о текущем пользователе и его IP-адресе.
+    Этот фильтр добавляет в записи логов информацию о текущем пользователе, его IP-адресе,
+    эндпоинте, идентификаторе запроса и времени, прошедшем с начала запроса. Если запись уже содержит
+    эти данные (например, фильтр стоит на нескольких обработчиках), повторно они не вычисляются.
 
     Методы:
-        filter(record): Добавляет email пользователя и IP-адрес к записи лога.
+        filter(record): Добавляет email пользователя, IP-адрес, эндпоинт и данные запроса к записи лога.
 
     :param record.user: Email пользователя, если он авторизован, иначе 'ANONYMOUS' или 'UNKNOWN'.
     :type record.user: str
     :param record.ip: IP-адрес пользователя, если он доступен, иначе 'UNKNOWN IP'.
     :type record.ip: str
+    :param record.endpoint: Эндпоинт запроса, если он доступен, иначе '-'.
+    :type record.endpoint: str
+    :param record.request_id: Идентификатор запроса, если он доступен, иначе None.
+    :type record.request_id: str
+    :param record.duration: Время с начала запроса в миллисекундах, если оно доступно, иначе None.
+    :type record.duration: float
     """
 
     def filter(self, record):
+        if hasattr(record, 'user'):
+            return True
+
         try:
             # Проверяем, авторизован ли пользователь
             if current_user.is_authenticated:
@@ -51,9 +77,149 @@ class RequestUserFilter(logging.Filter):
         except Exception:
             record.ip = 'UNKNOWN IP'
 
+        try:
+            record.endpoint = (request.endpoint or '-') if request else '-'
+        except Exception:
+            record.endpoint = '-'
+
+        request_id = started_at = None
+        if g:
+            request_id = g.get('request_id')
+            started_at = g.get('request_started_at')
+        record.request_id = request_id
+        record.duration = round((time.perf_counter() - started_at) * 1000, 2) if started_at else None
+
         return True
 
 
+class SamplingFilter(logging.Filter):
+    """
+    Фильтр, который пропускает только заданную долю записей отдельных логгеров и уровней.
+
+    Доли задаются словарем вида ``{'app': {'DEBUG': 0.1, 'INFO': 0.5}}``: для логгера ищется
+    ближайшая запись по иерархии имен (``app.sql`` -> ``app``). Записи уровня WARNING и выше
+    не отбрасываются никогда. Решение принимается один раз на запись и сохраняется в ней,
+    поэтому все обработчики видят одинаковый результат.
+
+    :param rates: Доли записей по логгерам и уровням (от 0 до 1).
+    :type rates: dict
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, record):
+        name = record.name
+        while name:
+            levels = self.rates.get(name)
+            if levels is not None:
+                return levels.get(record.levelname, 1.0)
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        sampled = getattr(record, 'sampled', None)
+        if sampled is None:
+            sampled = record.levelno >= logging.WARNING or random.random() < self._rate(record)
+            record.sampled = sampled
+        return sampled
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматтер, который выводит запись лога одной строкой JSON (формат JSON Lines).
+
+    Поля: ts, level, logger, message, user, ip, endpoint, request_id, duration (мс), location,
+    а также exc с текстом исключения, если оно есть.
+    """
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'user': getattr(record, 'user', None),
+            'ip': getattr(record, 'ip', None),
+            'endpoint': getattr(record, 'endpoint', None),
+            'request_id': getattr(record, 'request_id', None),
+            'duration': getattr(record, 'duration', None),
+            'location': f'{record.pathname}:{record.lineno}',
+        }
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Обработчик, который помещает записи логов в ограниченную очередь.
+
+    При переполнении очереди применяется политика LOG_QUEUE_POLICY:
+    - 'drop': запись отбрасывается сразу, поток запроса не ждет;
+    - 'block': поток запроса ждет освобождения места не дольше ``timeout`` секунд, затем запись отбрасывается.
+
+    Количество отброшенных записей хранится в атрибуте ``dropped``.
+
+    Записи помещаются в очередь без форматирования: подстановка аргументов сообщения и форматирование
+    трассировки исключения выполняются в фоновом потоке обработчиками QueueListener. Исключение -
+    объекты моделей SQLAlchemy в аргументах: они привязаны к сессии потока запроса (после commit
+    их атрибуты перезагружаются из базы), поэтому вместо них в очередь передается их строковое
+    представление.
+
+    :param log_queue: Очередь с ограниченным размером.
+    :type log_queue: queue.Queue
+    :param policy: Политика при переполнении ('drop' или 'block').
+    :type policy: str
+    :param timeout: Максимальное время ожидания для политики 'block' (в секундах).
+    :type timeout: float
+    """
+
+    def __init__(self, log_queue, policy='drop', timeout=1.0):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Стандартный prepare форматирует запись в потоке запроса и убирает из нее exc_info;
+        # здесь запись передается как есть, вместе с контекстом запроса от фильтров обработчика
+        if isinstance(record.args, tuple) and any(hasattr(arg, '_sa_instance_state') for arg in record.args):
+            record.args = tuple(
+                str(arg) if hasattr(arg, '_sa_instance_state') else arg for arg in record.args
+            )
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BoundedQueueListener(QueueListener):
+    """
+    Фоновый поток, который забирает записи из ограниченной очереди и передает их обработчикам.
+
+    В отличие от стандартного QueueListener, при остановке ждет места в очереди для служебной
+    записи-сигнала (стандартный вызывает put_nowait и падает на заполненной очереди) и допускает
+    повторный вызов stop().
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
 def configure_logging(app):
     """
     Настраивает логирование для приложения Flask.
@@ -62,6 +228,9 @@ def configure_logging(app):
     информация о пользователе и его IP-адресе. Логи в консоли выводятся с цветным форматированием
     для улучшения визуального восприятия.
 
+    Если включена настройка LOG_QUEUE_ENABLED, обработчики файла и консоли подключаются к фоновому
+    потоку QueueListener, а к логгеру приложения добавляется только обработчик очереди.
+
     :param app: Приложение Flask, для которого настраивается логирование.
     :type app: Flask
     """
@@ -69,18 +238,27 @@ def configure_logging(app):
     if not os.path.exists(app.config['LOGS_DIR']):
         os.makedirs(app.config['LOGS_DIR'])
 
-    # Создаем фильтр для добавления email и IP пользователя
-    user_filter = RequestUserFilter()
+    # Фильтр выборки стоит первым, чтобы для отброшенных записей не вычислялся контекст запроса
+    filters = []
+    if app.config.get('LOG_SAMPLE_RATES'):
+        filters.append(SamplingFilter(app.config['LOG_SAMPLE_RATES']))
+
+    # Создаем фильтр для добавления email, IP пользователя, эндпоинта и данных запроса
+    filters.append(RequestUserFilter())
+    use_queue = app.config.get('LOG_QUEUE_ENABLED', False)
+
+    register_request_context(app)
 
     # Настройка логирования в файл
     file_handler = RotatingFileHandler(app.config['LOG_FILE'], maxBytes=10240, backupCount=10)
     file_handler.setLevel(app.config['LOGGING_LEVEL'])
-    file_formatter = logging.Formatter(
-        '%(asctime)s %(levelname)s: [%(user)s] [%(ip)s] %(message)s [in %(pathname)s:%(lineno)d]'
-    )
+    if app.config.get('LOG_FORMAT') == 'json':
+        file_formatter = JsonFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            '%(asctime)s %(levelname)s: [%(user)s] [%(ip)s] %(message)s [in %(pathname)s:%(lineno)d]'
+        )
     file_handler.setFormatter(file_formatter)
-    file_handler.addFilter(user_filter)
-    app.logger.addHandler(file_handler)
 
     # Настройка логирования в консоль с цветами
     console_handler = logging.StreamHandler()
@@ -96,8 +274,29 @@ def configure_logging(app):
         }
     )
     console_handler.setFormatter(console_formatter)
-    console_handler.addFilter(user_filter)
-    app.logger.addHandler(console_handler)
+
+    if use_queue:
+        # Фильтр стоит на обработчике очереди: контекст запроса добавляется к записи один раз,
+        # в потоке запроса, а форматирование и запись выполняются в фоновом потоке.
+        queue_handler = BoundedQueueHandler(
+            queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE']),
+            policy=app.config['LOG_QUEUE_POLICY'],
+            timeout=app.config['LOG_QUEUE_TIMEOUT']
+        )
+        for log_filter in filters:
+            queue_handler.addFilter(log_filter)
+        app.logger.addHandler(queue_handler)
+
+        listener = BoundedQueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        # При завершении процесса дописываем оставшиеся в очереди записи
+        atexit.register(listener.stop)
+        app.extensions['log_listener'] = listener
+    else:
+        for handler in (file_handler, console_handler):
+            for log_filter in filters:
+                handler.addFilter(log_filter)
+            app.logger.addHandler(handler)
 
     # Устанавливаем уровень логирования для логгера приложения
     app.logger.setLevel(logging.DEBUG)
@@ -105,30 +304,58 @@ def configure_logging(app):
     app.logger.info('Flask приложение запущено')
 
 
-def log_and_flash(message, category='info'):
+def register_request_context(app):
+    """
+    Регистрирует обработчики, которые сохраняют идентификатор и время начала каждого запроса.
+
+    Идентификатор берется из заголовка X-Request-ID (если его передал прокси) или генерируется,
+    и возвращается клиенту в том же заголовке ответа.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+
+    @app.before_request
+    def start_request_context():
+        g.request_started_at = time.perf_counter()
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers.setdefault('X-Request-ID', request_id)
+        return response
+
+
+def log_and_flash(message, category='info', *args):
     """
     Универсальная функция для логирования и вывода flash-сообщений.
 
     Эта функция позволяет одновременно выводить flash-сообщения для пользователя и логировать их
     с указанием уровня логирования, соответствующего категории сообщения.
 
-    :param message: Текст сообщения, которое нужно вывести пользователю и записать в лог.
+    Сообщение может быть шаблоном с аргументами в стиле %: в лог передаются шаблон и аргументы,
+    а подстановка выполняется, только если запись действительно будет записана.
+
+    :param message: Текст (или шаблон) сообщения, которое нужно вывести пользователю и записать в лог.
     :type message: str
     :param category: Категория сообщения (info, warning, error, critical и т.д.).
     :type category: str
+    :param args: Аргументы для подстановки в шаблон сообщения.
     """
     # Отправляем flash-сообщение пользователю
-    flash(message, category)
+    flash(message % args if args else message, category)
 
     # Логируем сообщение в зависимости от категории
     logger = current_app.logger
     if category == 'info':
-        logger.info(message)
+        logger.info(message, *args, stacklevel=2)
     elif category == 'warning':
-        logger.warning(message)
+        logger.warning(message, *args, stacklevel=2)
     elif category == 'danger':
-        logger.error(message)
+        logger.error(message, *args, stacklevel=2)
     elif category == 'critical':
-        logger.critical(message)
+        logger.critical(message, *args, stacklevel=2)
     else:
-        logger.debug(message)
+        logger.debug(message, *args, stacklevel=2)
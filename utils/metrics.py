@@ -0,0 +1,586 @@
+# utils/metrics.py
+"""
+Модуль метрик приложения: реестр счетчиков, датчиков и гистограмм в памяти процесса
+и их вывод в текстовом формате Prometheus.
+
+Метрики заполняются обработчиками before_request/after_request (количество и длительность запросов
+по blueprint и эндпоинту), общими с :mod:`utils.request_timing` обработчиками событий движка SQLAlchemy
+(количество и длительность SQL-запросов),
+представлением входа (исходы попыток входа) и обработчиками ошибок. Показатели, которые считают
+другие компоненты (кэш фрагментов, пул хэширования паролей, ограничитель попыток входа), читаются
+функциями-сборщиками при выводе метрик.
+
+Запись значения не берет блокировок: каждый поток ведет свои значения, которые суммируются
+при чтении, поэтому учет события стоит несколько сотен наносекунд.
+
+Несколько процессов (воркеры сервера приложений)
+------------------------------------------------
+Если задан ``METRICS_DIR``, каждый процесс не чаще раза в ``METRICS_FLUSH_INTERVAL`` секунд (в конце
+очередного запроса) и при завершении записывает свои значения в файл ``metrics-<pid>.json`` этой
+директории. При выводе метрик значения текущего процесса суммируются со значениями из файлов
+остальных: счетчики и гистограммы - по всем файлам (в том числе завершившихся процессов, чтобы
+итоги не уменьшались при перезапуске воркеров), датчики - только по работающим процессам.
+Значения других процессов отстают не больше чем на интервал записи. Директорию следует очищать
+при развертывании новой версии.
+
+Основные классы и функции:
+- Counter, Gauge, Histogram: Метрики с метками.
+- MetricsRegistry: Реестр метрик, запись в файл и вывод в формате Prometheus.
+- init_metrics: Создает реестр и подключает обработчики запросов и событий движка.
+- record_login, record_error: Учет исходов входа и ошибок HTTP.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import current_app, g, has_app_context, request
+
+from app.db import db
+from utils.request_timing import add_statement_listener
+
+#: Границы корзин гистограммы длительности HTTP-запросов (в секундах)
+REQUEST_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+#: Границы корзин гистограммы длительности SQL-запросов (в секундах)
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+#: Тип содержимого текстового формата Prometheus
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+#: Метки blueprint и эндпоинта вне запроса (команды CLI, фоновые задачи)
+NO_REQUEST_LABELS = ('', '')
+
+
+class _Metric:
+    """
+    Базовый класс метрики: значения по кортежам значений меток.
+
+    Значения ведутся отдельно в каждом потоке, поэтому запись не берет блокировок. При чтении
+    значения потоков суммируются, а значения завершившихся потоков переносятся в общий словарь.
+
+    :param name: Имя метрики.
+    :type name: str
+    :param documentation: Описание (строка HELP).
+    :type documentation: str
+    :param labelnames: Имена меток.
+    :type labelnames: tuple
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._reset()
+
+    def _reset(self):
+        # После fork дочерний процесс начинает с нуля: значения родителя уже учтены в его файле
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._fixed = {}
+        self._lock = threading.Lock()
+
+    def _new_shard(self):
+        values = self._local.values = {}
+        with self._lock:
+            self._shards.append((weakref.ref(threading.current_thread()), values))
+        return values
+
+    def snapshot(self):
+        """
+        Возвращает сумму значений метрики по всем потокам.
+
+        :return: Словарь: кортеж значений меток - значение.
+        :rtype: dict
+        """
+        metric_type = type(self)
+        with self._lock:
+            live = []
+            for thread_ref, values in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    _merge(metric_type, self._retired, values)
+                else:
+                    live.append((thread_ref, values))
+            self._shards = live
+            result = {}
+            _merge(metric_type, result, self._retired)
+            for _, values in live:
+                # Копия словаря создается атомарно, поток может продолжать запись
+                _merge(metric_type, result, dict(values))
+            result.update(self._fixed)
+        return result
+
+
+class Counter(_Metric):
+    """
+    Счетчик: значение только увеличивается.
+    """
+
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        """
+        Увеличивает значение.
+
+        :param labels: Значения меток в порядке labelnames.
+        :type labels: tuple
+        :param amount: Приращение.
+        :type amount: int or float
+        """
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._new_shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def set(self, labels, value):
+        """
+        Устанавливает значение, которое ведет другой компонент (используется сборщиками;
+        для тех же меток не сочетается с inc).
+
+        :param labels: Значения меток.
+        :type labels: tuple
+        :param value: Текущее значение.
+        :type value: int or float
+        """
+        with self._lock:
+            self._fixed[labels] = value
+
+
+class Gauge(Counter):
+    """
+    Датчик: текущее значение, которое может и уменьшаться (например, количество запросов в обработке).
+    """
+
+    type = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        """
+        Уменьшает значение.
+
+        :param labels: Значения меток.
+        :type labels: tuple
+        :param amount: Уменьшение.
+        :type amount: int or float
+        """
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """
+    Гистограмма с фиксированными границами корзин. Значение по меткам - список количеств наблюдений
+    в каждой корзине (последняя - больше всех границ) и их сумма в конце списка.
+
+    :param buckets: Возрастающие границы корзин.
+    :type buckets: tuple
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        """
+        Учитывает наблюдение.
+
+        :param value: Наблюдаемое значение.
+        :type value: float
+        :param labels: Значения меток.
+        :type labels: tuple
+        """
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._new_shard()
+        state = values.get(labels)
+        if state is None:
+            state = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+
+#: Классы метрик по типам (для чтения файлов других процессов)
+METRIC_TYPES = {metric_type.type: metric_type for metric_type in (Counter, Gauge, Histogram)}
+
+#: Все реестры процесса (для сброса значений после fork)
+_registries = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for registry in list(_registries):
+        registry._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _escape(value, quotes=True):
+    value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quotes else value
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _merge(metric_type, values, other):
+    """
+    Прибавляет значения другого процесса к значениям метрики.
+    """
+    for labels, value in other.items():
+        current = values.get(labels)
+        if current is None:
+            values[labels] = list(value) if isinstance(value, list) else value
+        elif metric_type is Histogram:
+            values[labels] = [a + b for a, b in zip(current, value)]
+        else:
+            values[labels] = current + value
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс существует, но принадлежит другому пользователю
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса.
+
+    :param directory: Директория файлов значений процессов (None - только текущий процесс).
+    :type directory: str or None
+    :param flush_interval: Минимальный интервал записи значений в файл (в секундах).
+    :type flush_interval: float
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self._collectors = []
+        self._next_flush = 0.0
+        self._flush_lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+        _registries.add(self)
+
+    def _add(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f'Метрика {metric.name} уже зарегистрирована с другим типом или метками')
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Регистрирует счетчик (или возвращает уже зарегистрированный).
+
+        :rtype: Counter
+        """
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        """
+        Регистрирует датчик (или возвращает уже зарегистрированный).
+
+        :rtype: Gauge
+        """
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=REQUEST_DURATION_BUCKETS):
+        """
+        Регистрирует гистограмму (или возвращает уже зарегистрированную).
+
+        :rtype: Histogram
+        """
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Добавляет функцию, которая обновляет значения метрик перед их выводом и записью в файл.
+
+        :param collector: Функция без аргументов.
+        :type collector: callable
+        """
+        self._collectors.append(collector)
+
+    def _after_fork(self):
+        for metric in self.metrics.values():
+            metric._reset()
+        self._next_flush = 0.0
+        self._flush_lock = threading.Lock()
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+
+    def collect(self):
+        """
+        Вызывает сборщики и возвращает значения метрик текущего процесса.
+
+        :return: Словарь: имя метрики - снимок значений.
+        :rtype: dict
+        """
+        for collector in self._collectors:
+            collector()
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """
+        Записывает значения текущего процесса в его файл (атомарно, через временный файл).
+        """
+        if not self.directory:
+            return
+        with self._flush_lock:
+            pid = os.getpid()
+            data = {
+                name: {
+                    'type': self.metrics[name].type,
+                    'help': self.metrics[name].documentation,
+                    'labelnames': self.metrics[name].labelnames,
+                    'buckets': getattr(self.metrics[name], 'buckets', None),
+                    'values': [[list(labels), value] for labels, value in values.items()],
+                }
+                for name, values in self.collect().items()
+            }
+            path = self._path(pid)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, path)
+
+    def maybe_flush(self):
+        """
+        Записывает значения в файл, если с прошлой записи прошло больше ``flush_interval`` секунд.
+        """
+        if self.directory and time.monotonic() >= self._next_flush:
+            self._next_flush = time.monotonic() + self.flush_interval
+            self.flush()
+
+    def _other_processes(self):
+        """
+        Читает значения из файлов остальных процессов.
+
+        :return: Список пар (работает ли процесс, данные файла).
+        :rtype: list
+        """
+        result = []
+        own_path = self._path(os.getpid())
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            path = os.path.join(self.directory, filename)
+            if path == own_path:
+                continue
+            try:
+                with open(path, encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                # Файл удален или записывается другим процессом на файловой системе без атомарной замены
+                continue
+            pid = int(filename[len('metrics-'):-len('.json')])
+            result.append((_process_alive(pid), data))
+        return result
+
+    def expose(self):
+        """
+        Возвращает значения метрик (с учетом других процессов) в текстовом формате Prometheus.
+
+        :rtype: str
+        """
+        families = {}
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            families[name] = (
+                type(metric), metric.documentation, metric.labelnames, getattr(metric, 'buckets', None), values
+            )
+        if self.directory:
+            for alive, data in self._other_processes():
+                for name, info in data.items():
+                    metric_type = METRIC_TYPES[info['type']]
+                    if metric_type is Gauge and not alive:
+                        continue
+                    if name not in families:
+                        families[name] = (
+                            metric_type, info['help'], tuple(info['labelnames']),
+                            tuple(info['buckets']) if info['buckets'] else None, {}
+                        )
+                    values = {tuple(labels): value for labels, value in info['values']}
+                    _merge(metric_type, families[name][4], values)
+
+        lines = []
+        for name, (metric_type, documentation, labelnames, buckets, values) in families.items():
+            lines.append(f'# HELP {name} {_escape(documentation, quotes=False)}')
+            lines.append(f'# TYPE {name} {metric_type.type}')
+            for labels, value in sorted(values.items()):
+                if metric_type is not Histogram:
+                    lines.append(f'{name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    bucket_labels = _format_labels(labelnames, labels, f'le="{le}"')
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labelnames, labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(labelnames, labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _request_labels():
+    return g.get('metrics_labels', NO_REQUEST_LABELS) if has_app_context() else NO_REQUEST_LABELS
+
+
+def _add_collectors(app, registry):
+    """
+    Подключает сборщики показателей кэша фрагментов, пула хэширования паролей и ограничителя входа.
+    """
+    cache = app.extensions.get('fragment_cache')
+    if cache is not None:
+        cache_bytes = registry.gauge('fragment_cache_bytes', 'Суммарный размер фрагментов в кэше (байт)')
+        cache_events = registry.counter('fragment_cache_events_total', 'События кэша фрагментов', ('event',))
+
+        def collect_fragment_cache():
+            stats = cache.stats()
+            cache_bytes.set((), stats['bytes'])
+            for name in ('hits', 'misses', 'evictions', 'oversized'):
+                cache_events.set((name,), stats[name])
+
+        registry.add_collector(collect_fragment_cache)
+
+    hasher = app.extensions.get('password_hasher')
+    if hasher is not None:
+        hasher_rejected = registry.counter(
+            'password_hash_rejected_total', 'Проверки паролей, отклоненные из-за заполненной очереди пула'
+        )
+        registry.add_collector(lambda: hasher_rejected.set((), hasher.rejected))
+
+    throttle = app.extensions.get('login_throttle')
+    if throttle is not None:
+        throttle_rejected = registry.counter(
+            'login_throttle_rejected_total', 'Попытки входа, отклоненные ограничителем', ('limit',)
+        )
+
+        def collect_login_throttle():
+            for limit, count in list(throttle.rejected.items()):
+                throttle_rejected.set((limit,), count)
+
+        registry.add_collector(collect_login_throttle)
+
+
+def init_metrics(app):
+    """
+    Создает реестр метрик по настройкам METRICS_* и подключает обработчики запросов,
+    события движка и сборщики показателей других компонентов.
+
+    Вызывается после инициализации кэша фрагментов, хэширования паролей и ограничителя входа.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    registry = app.extensions['metrics'] = MetricsRegistry(
+        app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL']
+    )
+    requests_total = registry.counter(
+        'http_requests_total', 'Обработанные HTTP-запросы', ('blueprint', 'endpoint', 'method', 'status')
+    )
+    request_duration = registry.histogram(
+        'http_request_duration_seconds', 'Время обработки HTTP-запроса до отправки заголовков ответа',
+        ('blueprint', 'endpoint'), REQUEST_DURATION_BUCKETS
+    )
+    in_progress = registry.gauge('http_requests_in_progress', 'HTTP-запросы в обработке')
+    queries_total = registry.counter('db_queries_total', 'Выполненные SQL-запросы', ('blueprint', 'endpoint'))
+    query_duration = registry.histogram(
+        'db_query_duration_seconds', 'Время выполнения SQL-запроса', (), QUERY_DURATION_BUCKETS
+    )
+    registry.counter('login_attempts_total', 'Попытки входа по исходам', ('outcome',))
+    registry.counter('http_errors_total', 'Ответы обработчиков ошибок', ('code', 'blueprint', 'endpoint'))
+    _add_collectors(app, registry)
+
+    def record_statement(statement, seconds):
+        query_duration.observe(seconds)
+        queries_total.inc(_request_labels())
+
+    # Время SQL-запросов замеряют общие с замерами запросов обработчики событий движка
+    with app.app_context():
+        add_statement_listener(db.engine, record_statement)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_labels = (request.blueprint or '', request.endpoint or '')
+        in_progress.inc()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        # Время начала запроса сохраняет register_request_context (utils.logging)
+        started = g.get('request_started_at')
+        labels = g.get('metrics_labels')
+        if started is None or labels is None:
+            return response
+        request_duration.observe(time.perf_counter() - started, labels)
+        requests_total.inc(labels + (request.method, str(response.status_code)))
+        registry.maybe_flush()
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exception=None):
+        # Метки нужны до конца запроса: тело потокового ответа выполняет SQL-запросы после after_request
+        if g.pop('metrics_labels', None) is not None:
+            in_progress.dec()
+
+
+def _counter(name):
+    registry = current_app.extensions.get('metrics')
+    return registry.metrics[name] if registry is not None else None
+
+
+def record_login(outcome):
+    """
+    Учитывает исход попытки входа.
+
+    :param outcome: Исход: 'success', 'failure' (неверный email или пароль), 'invalid_form'
+        (ошибки формы, в том числе CSRF) или 'throttled' (превышен лимит попыток).
+    :type outcome: str
+    """
+    counter = _counter('login_attempts_total')
+    if counter is not None:
+        counter.inc((outcome,))
+
+
+def record_error(code):
+    """
+    Учитывает ответ обработчика ошибки HTTP.
+
+    :param code: Код ответа.
+    :type code: int
+    """
+    counter = _counter('http_errors_total')
+    if counter is not None:
+        counter.inc((str(code),) + _request_labels())
@@ -0,0 +1,120 @@
+# utils/pagination.py
+"""
+Модуль для постраничного и потокового вывода списков на страницах кабинета.
+
+Поддерживаются два режима:
+
+1. Keyset-пагинация (по умолчанию). Страница выбирается условием ``id > after``
+   с сортировкой по ``id`` и лимитом, поэтому стоимость запроса не зависит от номера
+   страницы, а в памяти находится не больше ``MEMBER_PAGE_SIZE`` объектов. Страница
+   выбирается лениво, при первом обращении из шаблона, поэтому фрагмент, взятый из кэша
+   (см. :mod:`utils.fragment_cache`), не требует запроса к базе данных.
+2. Потоковый режим (``?stream=1``). Вся таблица читается из базы порциями через
+   ``yield_per``, а шаблон рендерится через ``stream_template`` и отдается клиенту
+   частями. Память на запрос остается постоянной, а первый байт уходит сразу.
+"""
+from flask import current_app, request, stream_template, render_template, get_flashed_messages
+
+
+def keyset_page(query, id_column, after_id, per_page):
+    """
+    Возвращает одну страницу записей, начиная с идентификатора больше ``after_id``.
+
+    :param query: Запрос SQLAlchemy, из которого выбираются записи.
+    :param id_column: Колонка первичного ключа, по которой строится курсор.
+    :param after_id: Идентификатор последней записи предыдущей страницы.
+    :type after_id: int
+    :param per_page: Количество записей на странице.
+    :type per_page: int
+    :return: Кортеж из списка записей и курсора следующей страницы (None, если страница последняя).
+    :rtype: tuple
+    """
+    # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+    items = query.filter(id_column > after_id).order_by(id_column).limit(per_page + 1).all()
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, items[-1].id
+    return items, None
+
+
+class LazyPage:
+    """
+    Страница записей, которая выбирается из базы при первом обращении (см. :func:`keyset_page`).
+
+    Итерация возвращает записи страницы, атрибут ``next_after`` - курсор следующей страницы.
+    """
+
+    def __init__(self, query, id_column, after_id, per_page):
+        self._args = (query, id_column, after_id, per_page)
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = keyset_page(*self._args)
+        return self._page
+
+    def __iter__(self):
+        return iter(self._load()[0])
+
+    def __len__(self):
+        return len(self._load()[0])
+
+    @property
+    def next_after(self):
+        return self._load()[1]
+
+
+def _buffered(chunks, size):
+    """
+    Склеивает мелкие фрагменты, которые выдает Jinja, в блоки не меньше ``size`` символов.
+
+    :param chunks: Итератор строк, полученный от ``stream_template``.
+    :param size: Минимальный размер блока, отправляемого клиенту.
+    :type size: int
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_member_list(template_name, query, id_column, items_name, **context):
+    """
+    Рендерит страницу со списком записей в режиме keyset-пагинации или в потоковом режиме.
+
+    Режим выбирается параметрами запроса: ``stream=1`` включает потоковую отдачу всей
+    таблицы, ``after=<id>`` задает курсор для постраничного режима.
+
+    :param template_name: Имя шаблона страницы.
+    :type template_name: str
+    :param query: Запрос SQLAlchemy с нужными опциями загрузки.
+    :param id_column: Колонка первичного ключа, по которой сортируется список.
+    :param items_name: Имя переменной шаблона, в которую передаются записи.
+    :type items_name: str
+    :param context: Дополнительные переменные шаблона.
+    :return: Ответ Flask со сгенерированной страницей.
+    """
+    config = current_app.config
+
+    if request.args.get('stream') == '1':
+        # Забираем flash-сообщения из сессии до отправки заголовков,
+        # иначе измененная сессия не попадет в cookies ответа.
+        get_flashed_messages(with_categories=True)
+
+        context[items_name] = query.order_by(id_column).yield_per(config['MEMBER_STREAM_CHUNK_SIZE'])
+        stream = stream_template(template_name, page=None, streaming=True, **context)
+        return current_app.response_class(
+            _buffered(stream, config['MEMBER_STREAM_BUFFER_SIZE']),
+            mimetype='text/html'
+        )
+
+    after_id = request.args.get('after', 0, type=int)
+    context[items_name] = page = LazyPage(query, id_column, after_id, config['MEMBER_PAGE_SIZE'])
+    return render_template(template_name, page=page, streaming=False, **context)
@@ -0,0 +1,380 @@
+# utils/profiler.py
+"""
+Модуль профилирования отдельных запросов по требованию администратора.
+
+Администратор добавляет к адресу параметр ``?_profile=1`` (или заголовок ``X-Profile: 1``), и запрос
+выполняется под детерминированным профилировщиком cProfile: вся обработка во Flask, от загрузки сессии
+до отправки тела ответа (в том числе потокового). Результат сохраняется в директорию
+``PROFILER_DIR`` - файл статистики ``<id>.prof`` (открывается pstats, snakeviz и т.п.) и описание
+запроса ``<id>.json``; хранятся не больше ``PROFILER_MAX_PROFILES`` последних профилей, старые
+удаляются. Идентификатор профиля возвращается в заголовке ``X-Profile-Id``, а сами профили
+доступны в админке на странице Profiler (дерево вызовов и самые долгие функции).
+
+Для остальных запросов профилирование обходится в проверку двух ключей окружения WSGI. Право
+администратора проверяется только у запросов с параметром или заголовком; запросы пользователей
+без роли 'admin' не профилируются.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import unquote_plus
+
+from flask import current_app, request
+from flask_login import current_user
+from werkzeug.wsgi import ClosingIterator
+
+#: Параметр запроса и заголовок, включающие профилирование
+PROFILE_QUERY_ARG = '_profile'
+PROFILE_HEADER = 'X-Profile'
+
+#: Формат идентификатора профиля
+PROFILE_ID_RE = re.compile(r'^\d{20}-[0-9a-f]{8}$')
+
+#: Узлы дерева вызовов короче этой доли общего времени не показываются
+CALL_TREE_MIN_FRACTION = 0.005
+
+#: Максимальная глубина и количество узлов дерева вызовов
+CALL_TREE_MAX_DEPTH = 60
+CALL_TREE_MAX_NODES = 400
+
+
+def new_profile_id():
+    """
+    Возвращает новый идентификатор профиля. Идентификатор начинается со времени создания,
+    поэтому сортировка по имени - это сортировка по времени.
+
+    :rtype: str
+    """
+    return f'{time.time_ns():020d}-{uuid.uuid4().hex[:8]}'
+
+
+class ProfileStore:
+    """
+    Кольцевое хранилище профилей на диске: после записи нового профиля удаляются самые старые
+    сверх ``max_profiles``.
+
+    :param directory: Директория профилей (создается при первой записи).
+    :type directory: str
+    :param max_profiles: Максимальное количество хранимых профилей.
+    :type max_profiles: int
+    """
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id, extension):
+        if not PROFILE_ID_RE.match(profile_id):
+            raise ValueError(f'Некорректный идентификатор профиля: {profile_id!r}')
+        return os.path.join(self.directory, f'{profile_id}.{extension}')
+
+    def save(self, profile_id, profiler, meta):
+        """
+        Сохраняет профиль и его описание.
+
+        :param profile_id: Идентификатор профиля (см. :func:`new_profile_id`).
+        :type profile_id: str
+        :param profiler: Остановленный профилировщик.
+        :type profiler: cProfile.Profile
+        :param meta: Описание запроса (метод, путь, длительность и т.п.).
+        :type meta: dict
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, 'prof'))
+        with open(self._path(profile_id, 'json'), 'w', encoding='utf-8') as file:
+            json.dump(dict(meta, id=profile_id), file, ensure_ascii=False)
+        self._prune()
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len('.json')] for name in names if name.endswith('.json'))
+
+    def _prune(self):
+        with self._lock:
+            for profile_id in self._ids()[:-self.max_profiles]:
+                for extension in ('json', 'prof'):
+                    try:
+                        os.remove(self._path(profile_id, extension))
+                    except FileNotFoundError:
+                        # Профиль уже удален другим процессом
+                        pass
+
+    def list(self):
+        """
+        Возвращает описания профилей, начиная с последнего.
+
+        :rtype: list[dict]
+        """
+        result = []
+        for profile_id in reversed(self._ids()):
+            meta = self.meta(profile_id)
+            if meta is not None:
+                result.append(meta)
+        return result
+
+    def meta(self, profile_id):
+        """
+        Возвращает описание профиля или None, если профиля нет.
+
+        :param profile_id: Идентификатор профиля.
+        :type profile_id: str
+        :rtype: dict or None
+        """
+        try:
+            with open(self._path(profile_id, 'json'), encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def stats_path(self, profile_id):
+        """
+        Возвращает путь к файлу статистики профиля.
+
+        :param profile_id: Идентификатор профиля.
+        :type profile_id: str
+        :rtype: str
+        """
+        return self._path(profile_id, 'prof')
+
+    def stats(self, profile_id):
+        """
+        Загружает статистику профиля.
+
+        :param profile_id: Идентификатор профиля.
+        :type profile_id: str
+        :rtype: pstats.Stats
+        :raises FileNotFoundError: Профиль удален.
+        """
+        return pstats.Stats(self.stats_path(profile_id))
+
+
+def function_label(func, root):
+    """
+    Возвращает читаемое имя функции из статистики pstats.
+
+    :param func: Ключ функции в статистике: (файл, строка, имя).
+    :type func: tuple
+    :param root: Корневая директория проекта (пути внутри нее показываются относительными).
+    :type root: str
+    :return: Имя функции и место ее определения.
+    :rtype: tuple
+    """
+    filename, line, name = func
+    if filename == '~':
+        # Встроенные функции: имя уже содержит описание, например <built-in method time.sleep>
+        return name, ''
+    if filename.startswith(root):
+        filename = os.path.relpath(filename, root)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return name, f'{filename}:{line}'
+
+
+def top_functions(stats, root, sort='cumulative', limit=40):
+    """
+    Возвращает функции с наибольшим собственным или полным временем.
+
+    :param stats: Статистика профиля.
+    :type stats: pstats.Stats
+    :param root: Корневая директория проекта.
+    :type root: str
+    :param sort: 'cumulative' - по полному времени (с вызванными функциями), 'tottime' - по собственному.
+    :type sort: str
+    :param limit: Количество функций.
+    :type limit: int
+    :return: Список словарей: имя, место, количество вызовов, собственное и полное время (мс).
+    :rtype: list[dict]
+    """
+    index = 3 if sort == 'cumulative' else 2
+    items = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    rows = []
+    for func, (primitive_calls, calls, own_time, cumulative_time, _) in items:
+        name, location = function_label(func, root)
+        rows.append({
+            'name': name,
+            'location': location,
+            'calls': calls if calls == primitive_calls else f'{calls}/{primitive_calls}',
+            'own_ms': own_time * 1000,
+            'cumulative_ms': cumulative_time * 1000,
+        })
+    return rows
+
+
+def call_tree(stats, root):
+    """
+    Строит дерево вызовов по статистике профиля.
+
+    Время узла - полное время функции при вызовах из родительской функции (как в gprof). Узлы короче
+    ``CALL_TREE_MIN_FRACTION`` общего времени и рекурсивные вызовы не разворачиваются.
+
+    :param stats: Статистика профиля.
+    :type stats: pstats.Stats
+    :param root: Корневая директория проекта.
+    :type root: str
+    :return: Список корневых узлов (словари с именем, местом, временем, долей, вызовами и дочерними узлами).
+    :rtype: list[dict]
+    """
+    total = stats.total_tt or 1e-9
+    min_time = total * CALL_TREE_MIN_FRACTION
+    children = {}
+    roots = []
+    for func, (_, calls, _, cumulative_time, callers) in stats.stats.items():
+        if not callers:
+            roots.append((func, calls, cumulative_time))
+        for caller, (_, caller_calls, _, caller_time) in callers.items():
+            children.setdefault(caller, []).append((func, caller_calls, caller_time))
+    for edges in children.values():
+        edges.sort(key=lambda edge: edge[2], reverse=True)
+
+    nodes = 0
+
+    def build(func, calls, cumulative_time, depth, path):
+        nonlocal nodes
+        nodes += 1
+        name, location = function_label(func, root)
+        node = {
+            'name': name,
+            'location': location,
+            'calls': calls,
+            'ms': cumulative_time * 1000,
+            'percent': min(100.0, cumulative_time / total * 100),
+            'children': [],
+        }
+        if depth >= CALL_TREE_MAX_DEPTH or func in path:
+            return node
+        path = path | {func}
+        for child, child_calls, child_time in children.get(func, ()):
+            if child_time < min_time or nodes >= CALL_TREE_MAX_NODES:
+                break
+            node['children'].append(build(child, child_calls, child_time, depth + 1, path))
+        return node
+
+    roots.sort(key=lambda item: item[2], reverse=True)
+    return [build(func, calls, cumulative_time, 0, frozenset())
+            for func, calls, cumulative_time in roots if cumulative_time >= min_time]
+
+
+def get_profile_store():
+    """
+    Возвращает хранилище профилей текущего приложения.
+
+    :rtype: ProfileStore
+    """
+    return current_app.extensions['profile_store']
+
+
+def _admin_request_meta(app, environ):
+    """
+    Проверяет, что запрос с параметром профилирования выполняет администратор,
+    и возвращает описание запроса (None - запрос не профилируется).
+    """
+    with app.request_context(environ):
+        if PROFILE_QUERY_ARG not in request.args and PROFILE_HEADER not in request.headers:
+            return None
+        # То же условие доступа, что у MyAdminIndexView, но без flash-сообщения
+        if not (current_user.is_authenticated and current_user.role == 'admin'):
+            return None
+        return {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'user': current_user.user_email,
+        }
+
+
+def _strip_profile_arg(query_string):
+    """
+    Удаляет параметр профилирования из строки запроса, не меняя кодирование остальных параметров.
+
+    :param query_string: Строка запроса из окружения WSGI.
+    :type query_string: str
+    :rtype: str
+    """
+    return '&'.join(
+        part for part in query_string.split('&')
+        if part and unquote_plus(part.split('=', 1)[0]) != PROFILE_QUERY_ARG
+    )
+
+
+def init_profiler(app):
+    """
+    Подключает профилирование запросов по требованию администратора (настройки PROFILER_*).
+
+    Профилировщик включается в WSGI-обработчике вокруг всей обработки запроса Flask. Запросы без
+    параметра и заголовка профилирования проходят через обработчик после проверки двух ключей окружения.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    if not app.config['PROFILER_ENABLED']:
+        return
+    store = app.extensions['profile_store'] = ProfileStore(
+        app.config['PROFILER_DIR'], app.config['PROFILER_MAX_PROFILES']
+    )
+    wsgi_app = app.wsgi_app
+
+    def profiling_wsgi_app(environ, start_response):
+        # Быстрая проверка без разбора запроса; точная - в _admin_request_meta
+        if 'HTTP_X_PROFILE' not in environ and PROFILE_QUERY_ARG not in environ.get('QUERY_STRING', ''):
+            return wsgi_app(environ, start_response)
+        meta = _admin_request_meta(app, environ)
+        # Представление не получает параметр профилирования: он не попадает в фильтры выгрузок,
+        # ETag и ключи кэша фрагментов
+        environ['QUERY_STRING'] = _strip_profile_arg(environ.get('QUERY_STRING', ''))
+        if meta is None:
+            return wsgi_app(environ, start_response)
+
+        profile_id = new_profile_id()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # В потоке уже работает другой профилировщик
+            app.logger.warning('Профилирование %s пропущено: профилировщик уже запущен', meta['path'])
+            return wsgi_app(environ, start_response)
+        started = time.perf_counter()
+
+        def profiled_start_response(status, headers, exc_info=None):
+            meta['status'] = int(status.split(' ', 1)[0])
+            return start_response(status, list(headers) + [('X-Profile-Id', profile_id)], exc_info)
+
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            profiler.disable()
+            meta['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            store.save(profile_id, profiler, meta)
+            app.logger.info('Профиль запроса %s %s сохранен: %s', meta['method'], meta['path'], profile_id)
+
+        def body(app_iter):
+            try:
+                yield from app_iter
+            finally:
+                finish()
+
+        try:
+            app_iter = wsgi_app(environ, profiled_start_response)
+        except BaseException:
+            finish()
+            raise
+        # Тело ответа (в том числе потокового) формируется при итерации: профилировщик отключается, когда
+        # тело отправлено полностью или сервер закрыл ответ раньше
+        callbacks = [app_iter.close, finish] if hasattr(app_iter, 'close') else [finish]
+        return ClosingIterator(body(app_iter), callbacks)
+
+    app.wsgi_app = profiling_wsgi_app
@@ -0,0 +1,233 @@
+# utils/query_plans.py
+"""
+Модуль для проверки планов SQL-запросов на «горячих» маршрутах приложения.
+
+Команда ``flask check-query-plans`` создает временную базу SQLite, применяет к ней все миграции,
+заполняет ее минимальным набором данных и проходит по страницам кабинета, спискам админки,
+AJAX-поиску и проверке логина. Все выполненные SELECT-запросы перехватываются через событие
+``before_cursor_execute`` и прогоняются через ``EXPLAIN QUERY PLAN``.
+
+Команда завершается с ненулевым кодом, если в плане есть полный проход по таблице или индексу
+(``SCAN <table>``, в том числе ``USING INDEX``) либо автоматический индекс, который SQLite строит
+заново при каждом выполнении запроса. Исключение — ведущая таблица запроса списка, которую проходят
+постранично (например, ``ORDER BY id LIMIT ? OFFSET ?`` или ``count(*)`` в админке): такие таблицы
+перечислены для каждого маршрута явно.
+
+Та же проверка выполняется тестом ``tests/test_query_plans.py`` (``python -m pytest``).
+"""
+import os
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+
+#: Маршруты, планы запросов которых проверяются.
+#: Для каждого маршрута указаны таблицы, полный проход по которым допустим как по ведущей таблице списка.
+HOT_PATHS = [
+    ('/staff/', ()),
+    ('/staff/?after=1', ()),
+    ('/staff/?stream=1', ('staff',)),
+    ('/staff/export.csv', ('staff',)),
+    ('/team/', ()),
+    ('/team/?after=1', ()),
+    ('/team/?stream=1', ('team',)),
+    ('/team/export.csv', ('team',)),
+    ('/team_set/', ()),
+    ('/team_set/?after=1', ()),
+    ('/team_set/?stream=1', ('team_set',)),
+    ('/team_set/export.csv', ('team_set',)),
+    ('/user/', ('user',)),
+    ('/analytics/data/', ('team_set', 'staff')),
+    ('/api/v1/staff/?fields=staff_name,fte_total,team_count&embed=team_sets', ()),
+    ('/api/v1/teams/?embed=team_sets&cursor=1', ()),
+    ('/api/v1/team_sets/?embed=team,staff', ()),
+    ('/api/v1/team_sets/?ids=1,2,3', ()),
+    ('/api/v1/staff/1?embed=team_sets', ()),
+    ('/admin/users_admin/', ('user',)),
+    ('/admin/users_admin/?sort=2', ('user',)),
+    ('/admin/team_admin/', ('team',)),
+    ('/admin/team_admin/?sort=1', ('team',)),
+    ('/admin/team_admin/?sort=2', ('team',)),
+    ('/admin/staff_admin/', ('staff',)),
+    ('/admin/staff_admin/?sort=1', ('staff',)),
+    ('/admin/staff_admin/?sort=5', ('staff',)),
+    ('/admin/team_set_admin/', ('team_set',)),
+    ('/admin/team_set_admin/?sort=1', ('team_set',)),
+    ('/admin/team_set_admin/?sort=2', ('team_set',)),
+    ('/admin/team_set_admin/ajax/lookup/?name=team&query=К', ()),
+    ('/admin/team_set_admin/ajax/lookup/?name=staff&query=И', ()),
+]
+
+#: Запись о полном проходе по таблице в плане запроса
+FullScan = namedtuple('FullScan', ['path', 'table', 'detail', 'statement'])
+
+
+@contextmanager
+def capture_statements(engine):
+    """
+    Перехватывает SQL-запросы, выполняемые через движок SQLAlchemy.
+
+    :param engine: Движок SQLAlchemy.
+    :return: Список пар (текст запроса, параметры), пополняемый внутри блока ``with``.
+    :rtype: list
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def find_full_scans(connection, path, statements, allowed_tables=()):
+    """
+    Прогоняет запросы через ``EXPLAIN QUERY PLAN`` и возвращает найденные полные проходы по таблицам.
+
+    Проход по таблице из ``allowed_tables`` допустим, только если это ведущая таблица запроса
+    верхнего уровня; в подзапросах и как внутренняя таблица соединения он считается ошибкой.
+
+    :param connection: DBAPI-соединение с базой SQLite.
+    :param path: Маршрут, на котором были выполнены запросы (для отчета).
+    :type path: str
+    :param statements: Список пар (текст запроса, параметры).
+    :param allowed_tables: Таблицы, которые допустимо проходить целиком как ведущие.
+    :return: Список найденных полных проходов.
+    :rtype: list[FullScan]
+    """
+    scans = []
+    for statement, parameters in statements:
+        plan = connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+
+        driving_seen = False
+        for node_id, parent, _, detail in plan:
+            if not detail.startswith(('SCAN ', 'SEARCH ')) or detail.startswith('SCAN CONSTANT ROW'):
+                continue
+
+            # Первая таблица верхнего уровня — ведущая таблица запроса
+            is_driving = parent == 0 and not driving_seen
+            if parent == 0:
+                driving_seen = True
+
+            if not detail.startswith('SCAN ') and 'AUTOMATIC' not in detail:
+                continue
+
+            table = detail.split()[1]
+            if is_driving and table in allowed_tables:
+                continue
+
+            scans.append(FullScan(path, table, detail, statement))
+    return scans
+
+
+def _seed(db):
+    """
+    Заполняет пустую базу минимальным набором записей, нужным для обхода маршрутов.
+
+    :param db: Экземпляр SQLAlchemy.
+    :return: Идентификатор и email пользователя с ролью администратора.
+    :rtype: tuple
+    """
+    from datetime import date
+
+    from app.modules.user.models import User
+    from app.modules.staff.models import Staff
+    from app.modules.team.models import Team
+    from app.modules.team_set.models import TeamSet
+
+    admin = User(user_name='Администратор', user_email='admin@example.com', role='admin')
+    admin.set_password('admin')
+    team = Team(team_name='Команда')
+    staff = Staff(staff_name='Иванов Иван', staff_date=date.today(), staff_active=True)
+    db.session.add_all([admin, team, staff, TeamSet(team=team, staff=staff, fte=1.0)])
+    db.session.commit()
+    return admin.id, admin.user_email
+
+
+def check_query_plans(config):
+    """
+    Проходит по горячим маршрутам на временной базе и собирает полные проходы по таблицам.
+
+    :param config: Настройки приложения, на основе которых создается проверяемое приложение.
+    :type config: dict
+    :return: Список найденных полных проходов.
+    :rtype: list[FullScan]
+    """
+    from flask_migrate import upgrade
+
+    from app import create_app
+    from app.db import db, init_migrate
+
+    scans = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        overrides = {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp_dir, 'query_plans.db'),
+            'LOGS_DIR': tmp_dir,
+            'LOG_FILE': os.path.join(tmp_dir, 'app.log'),
+            'SLOW_REQUEST_LOG_FILE': os.path.join(tmp_dir, 'slow_requests.log'),
+            'DATA_VERSIONS_DIR': os.path.join(tmp_dir, 'data_versions'),
+            'IMPORT_REJECTS_DIR': os.path.join(tmp_dir, 'imports'),
+            'PROFILER_DIR': os.path.join(tmp_dir, 'profiles'),
+            'METRICS_DIR': None,
+            'WTF_CSRF_ENABLED': False,
+            'TESTING': True,
+        }
+        config_class = type('QueryPlanConfig', (object,), dict(config, **overrides))
+        app = create_app(config_class)
+
+        init_migrate(app)
+        with app.app_context():
+            upgrade(directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+            admin_id, admin_email = _seed(db)
+            engine = db.engine
+
+        # Запросы выполняются вне контекста приложения, иначе пользователь, сохраненный
+        # Flask-Login в g, будет общим для всех клиентов.
+        admin_client = app.test_client()
+        with admin_client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+            session['_fresh'] = True
+
+        requests = [(path, allowed, admin_client.get, {}) for path, allowed in HOT_PATHS]
+        # Поиск пользователя по email при входе выполняется анонимным клиентом
+        requests.append(('/login/', (), app.test_client().post,
+                         {'data': {'email': admin_email, 'password': 'wrong-password'}}))
+
+        raw = engine.raw_connection()
+        try:
+            for path, allowed, send, kwargs in requests:
+                with capture_statements(engine) as statements:
+                    # Потоковые ответы выполняют запросы при чтении тела, поэтому тело читается целиком
+                    send(path, **kwargs).get_data()
+                scans.extend(find_full_scans(raw, path, statements, allowed))
+        finally:
+            raw.close()
+            engine.dispose()
+
+    return scans
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """
+    Проверяет планы запросов горячих маршрутов и завершается с ошибкой при полном проходе по таблице.
+    """
+    config = {key: value for key, value in current_app.config.items() if key.isupper()}
+    scans = check_query_plans(config)
+
+    if not scans:
+        click.echo('Полных проходов по таблицам на горячих маршрутах не найдено.')
+        return
+
+    for scan in scans:
+        click.echo(f'{scan.path}: {scan.detail}\n    {scan.statement}\n', err=True)
+    raise SystemExit(f'Найдено полных проходов по таблицам: {len(scans)}')
@@ -0,0 +1,327 @@
+# utils/request_timing.py
+"""
+Модуль замеров времени обработки запросов: SQL, шаблоны Jinja и логирование.
+
+Для каждого запроса собираются:
+- количество и суммарное время SQL-запросов (события ``before_cursor_execute``/``after_cursor_execute``
+  движка SQLAlchemy), а также время и количество повторов каждого текста запроса;
+- время отрисовки шаблонов (сигналы Flask ``before_render_template``/``template_rendered``;
+  вложенные шаблоны входят во время внешнего);
+- время записи логов обработчиками логгера приложения.
+
+Итоги добавляются к ответу в заголовке ``Server-Timing`` (при ``SERVER_TIMING_HEADER = True``), который
+показывают инструменты разработчика браузера. Если запрос длился дольше ``SLOW_REQUEST_THRESHOLD_MS``
+или выполнил больше ``SLOW_REQUEST_MAX_QUERIES`` SQL-запросов, в файл ``SLOW_REQUEST_LOG_FILE`` пишется
+запись в формате JSON с самыми долгими запросами, а в лог приложения - предупреждение.
+
+Заголовок отражает работу до отправки заголовков ответа. Запись о медленном запросе пишется при
+закрытии ответа, поэтому для потоковых ответов (выгрузки, ``?stream=1``) она включает и запросы,
+выполненные при передаче тела.
+
+Время SQL-запросов замеряется одной парой обработчиков событий движка на процесс; кроме замеров
+запроса его получают и другие компоненты (метрики), подключенные через :func:`add_statement_listener`.
+Начало запроса берется из ``g.request_started_at`` (см. :func:`utils.logging.register_request_context`).
+"""
+import json
+import logging
+import os
+import time
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+
+from app.db import db
+
+#: Максимальное количество различных текстов SQL-запросов, которые учитываются отдельно в одном запросе
+MAX_DISTINCT_STATEMENTS = 200
+
+#: Максимальная длина текста SQL-запроса в записи о медленном запросе
+MAX_STATEMENT_LENGTH = 2000
+
+
+class RequestTiming:
+    """
+    Замеры одного запроса.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_count = 0
+        self.template_time = 0.0
+        self.log_count = 0
+        self.log_time = 0.0
+        #: Текст SQL-запроса - [количество выполнений, суммарное время]
+        self.statements = {}
+        self._template_depth = 0
+        self._template_started = 0.0
+
+    def add_statement(self, statement, seconds):
+        """
+        Учитывает выполненный SQL-запрос.
+
+        :param statement: Текст запроса.
+        :type statement: str
+        :param seconds: Время выполнения.
+        :type seconds: float
+        """
+        self.sql_count += 1
+        self.sql_time += seconds
+        stats = self.statements.get(statement)
+        if stats is None:
+            if len(self.statements) >= MAX_DISTINCT_STATEMENTS:
+                return
+            stats = self.statements[statement] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+
+    def template_started(self):
+        if not self._template_depth:
+            self._template_started = time.perf_counter()
+        self._template_depth += 1
+
+    def template_finished(self):
+        self._template_depth = max(0, self._template_depth - 1)
+        if not self._template_depth:
+            self.template_count += 1
+            self.template_time += time.perf_counter() - self._template_started
+
+    def elapsed(self):
+        """
+        Возвращает время с начала запроса (в секундах).
+
+        :rtype: float
+        """
+        return time.perf_counter() - self.started
+
+    def slowest_statements(self, limit):
+        """
+        Возвращает тексты SQL-запросов с наибольшим суммарным временем.
+
+        :param limit: Количество запросов.
+        :type limit: int
+        :return: Список словарей с текстом запроса, количеством выполнений и суммарным временем (мс).
+        :rtype: list
+        """
+        items = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {'statement': statement[:MAX_STATEMENT_LENGTH], 'count': count, 'ms': round(seconds * 1000, 2)}
+            for statement, (count, seconds) in items
+        ]
+
+    def server_timing(self, total):
+        """
+        Формирует значение заголовка Server-Timing.
+
+        :param total: Полное время обработки (в секундах).
+        :type total: float
+        :rtype: str
+        """
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="SQL ({self.sql_count})"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="Templates ({self.template_count})"',
+            f'log;dur={self.log_time * 1000:.1f};desc="Logging ({self.log_count})"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_timing():
+    """
+    Возвращает замеры текущего запроса или None вне запроса (и при отключенных замерах).
+
+    :rtype: RequestTiming or None
+    """
+    return g.get('request_timing') if has_app_context() else None
+
+
+#: Движок SQLAlchemy - функции, получающие текст и время выполнения каждого SQL-запроса
+_statement_listeners = weakref.WeakKeyDictionary()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('request_timing_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['request_timing_started'].pop()
+    for listener in _statement_listeners.get(conn.engine, ()):
+        listener(statement, seconds)
+
+
+def _handle_error(exception_context):
+    # Для запроса с ошибкой after_cursor_execute не вызывается
+    stack = exception_context.connection.info.get('request_timing_started') if exception_context.connection else None
+    if stack:
+        stack.pop()
+
+
+def add_statement_listener(engine, listener):
+    """
+    Подключает функцию, которая вызывается после каждого SQL-запроса движка с текстом запроса и временем
+    его выполнения в секундах. Обработчики событий движка подключаются при первом вызове для движка.
+
+    :param engine: Движок SQLAlchemy.
+    :type engine: Engine
+    :param listener: Функция ``listener(statement, seconds)``.
+    """
+    listeners = _statement_listeners.get(engine)
+    if listeners is None:
+        listeners = _statement_listeners[engine] = []
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    listeners.append(listener)
+
+
+def _record_statement(statement, seconds):
+    timing = current_timing()
+    if timing is not None:
+        timing.add_statement(statement, seconds)
+
+
+def _template_started(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None:
+        timing.template_started()
+
+
+def _template_finished(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None:
+        timing.template_finished()
+
+
+def _timed_call_handlers(call_handlers):
+    """
+    Оборачивает Logger.callHandlers, чтобы учитывать время записи логов в замерах запроса.
+    """
+    def call_handlers_with_timing(record):
+        timing = current_timing()
+        if timing is None:
+            return call_handlers(record)
+        started = time.perf_counter()
+        try:
+            return call_handlers(record)
+        finally:
+            timing.log_count += 1
+            timing.log_time += time.perf_counter() - started
+
+    call_handlers_with_timing.timed = True
+    return call_handlers_with_timing
+
+
+def _loaded_user_id(request_g):
+    """
+    Возвращает идентификатор пользователя, если Flask-Login уже загрузил его в этом запросе, иначе None.
+    """
+    user = request_g.get('_login_user')
+    return user.get_id() if user is not None else None
+
+
+def _slow_request_logger(app):
+    """
+    Создает отдельный логгер (не входящий в иерархию logging) для файла медленных запросов.
+    """
+    path = app.config['SLOW_REQUEST_LOG_FILE']
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    logger = logging.Logger('slow_requests', logging.INFO)
+    handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def init_request_timing(app):
+    """
+    Подключает замеры запросов: обработчики событий движка, сигналов шаблонов и логгера приложения,
+    а также before_request/after_request, добавляющие заголовок Server-Timing и записывающие медленные запросы.
+
+    Вызывается после настройки логирования.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    """
+    if not app.config['REQUEST_TIMING_ENABLED']:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    add_statement_listener(engine, _record_statement)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    # Логгер приложения общий для всех приложений процесса с тем же именем: обертка ставится один раз
+    if not getattr(app.logger.callHandlers, 'timed', False):
+        app.logger.callHandlers = _timed_call_handlers(app.logger.callHandlers)
+
+    slow_logger = _slow_request_logger(app)
+    threshold = app.config['SLOW_REQUEST_THRESHOLD_MS'] / 1000
+    max_queries = app.config['SLOW_REQUEST_MAX_QUERIES']
+    max_statements = app.config['SLOW_REQUEST_MAX_STATEMENTS']
+    server_timing_header = app.config['SERVER_TIMING_HEADER']
+
+    def log_if_slow(timing, details, user_id):
+        total = timing.elapsed()
+        reasons = []
+        if total > threshold:
+            reasons.append('duration')
+        if timing.sql_count > max_queries:
+            reasons.append('queries')
+        if not reasons:
+            return
+
+        record = dict(
+            details,
+            user=user_id(),
+            ts=datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            reasons=reasons,
+            duration_ms=round(total * 1000, 2),
+            sql={'count': timing.sql_count, 'ms': round(timing.sql_time * 1000, 2)},
+            templates={'count': timing.template_count, 'ms': round(timing.template_time * 1000, 2)},
+            log={'count': timing.log_count, 'ms': round(timing.log_time * 1000, 2)},
+            statements=timing.slowest_statements(max_statements),
+        )
+        slow_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        app.logger.warning(
+            'Медленный запрос %s %s: %.1f мс, SQL-запросов %s (%.1f мс)', details['method'], details['path'],
+            total * 1000, timing.sql_count, timing.sql_time * 1000
+        )
+
+    @app.before_request
+    def start_request_timing():
+        # Статические файлы не замеряются: они не выполняют SQL и не отрисовывают шаблоны
+        if request.endpoint != 'static':
+            g.request_timing = RequestTiming(g.get('request_started_at'))
+
+    @app.after_request
+    def finish_request_timing(response):
+        timing = g.pop('request_timing', None)
+        if timing is None:
+            return response
+
+        if server_timing_header:
+            response.headers['Server-Timing'] = timing.server_timing(timing.elapsed())
+
+        details = {
+            'request_id': g.get('request_id'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+        }
+        # Пользователь определяется, только когда запись о медленном запросе действительно пишется:
+        # чтение сессии добавило бы ко всем ответам заголовок Vary: Cookie
+        if response.is_streamed:
+            # Тело потокового ответа формируется после after_request: замеры продолжаются до закрытия ответа.
+            # При закрытии ответа контекста запроса уже нет, поэтому берется пользователь, загруженный
+            # представлением (потоковые страницы требуют входа), без обращения к сессии
+            g.request_timing = timing
+            request_g = g._get_current_object()
+            response.call_on_close(lambda: log_if_slow(timing, details, lambda: _loaded_user_id(request_g)))
+        else:
+            log_if_slow(timing, details, current_user.get_id)
+        return response
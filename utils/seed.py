@@ -0,0 +1,241 @@
+# utils/seed.py
+"""
+Модуль генерации синтетических данных для нагрузочного тестирования (команда ``flask seed``).
+
+Генерируются сотрудники с русскими ФИО, команды и записи составов команд (TeamSet) в заданном
+количестве - от тысяч до миллионов строк. Распределение записей по командам неравномерное
+(закон Ципфа): несколько крупных команд и длинный хвост маленьких, как в реальной организации.
+Доли занятости (FTE) выбираются из типичных значений.
+
+Строки записываются пакетами через ``executemany`` (SQLAlchemy Core) отдельными транзакциями,
+как при массовом импорте (см. :mod:`utils.bulk_import`). После генерации сводные таблицы
+пересчитываются, а версии данных таблиц повышаются. Генерация воспроизводима: одинаковые
+параметры и ``--random-seed`` дают одинаковые данные.
+
+Имена сотрудников и названия команд уникальны, в том числе при повторном запуске: номер
+комбинации отсчитывается от наибольшего идентификатора в таблице.
+"""
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+#: Фамилии (мужская и женская формы)
+SURNAMES = (
+    ('Иванов', 'Иванова'), ('Смирнов', 'Смирнова'), ('Кузнецов', 'Кузнецова'), ('Попов', 'Попова'),
+    ('Васильев', 'Васильева'), ('Петров', 'Петрова'), ('Соколов', 'Соколова'), ('Михайлов', 'Михайлова'),
+    ('Новиков', 'Новикова'), ('Федоров', 'Федорова'), ('Морозов', 'Морозова'), ('Волков', 'Волкова'),
+    ('Алексеев', 'Алексеева'), ('Лебедев', 'Лебедева'), ('Семенов', 'Семенова'), ('Егоров', 'Егорова'),
+    ('Павлов', 'Павлова'), ('Козлов', 'Козлова'), ('Степанов', 'Степанова'), ('Николаев', 'Николаева'),
+    ('Орлов', 'Орлова'), ('Андреев', 'Андреева'), ('Макаров', 'Макарова'), ('Никитин', 'Никитина'),
+    ('Захаров', 'Захарова'), ('Зайцев', 'Зайцева'), ('Соловьев', 'Соловьева'), ('Борисов', 'Борисова'),
+    ('Яковлев', 'Яковлева'), ('Григорьев', 'Григорьева'), ('Романов', 'Романова'), ('Воробьев', 'Воробьева'),
+)
+
+#: Мужские имена
+MALE_NAMES = (
+    'Александр', 'Алексей', 'Андрей', 'Антон', 'Артем', 'Борис', 'Вадим', 'Виктор', 'Владимир', 'Дмитрий',
+    'Евгений', 'Иван', 'Игорь', 'Илья', 'Кирилл', 'Максим', 'Михаил', 'Никита', 'Николай', 'Олег',
+    'Павел', 'Роман', 'Сергей', 'Степан', 'Юрий',
+)
+
+#: Женские имена
+FEMALE_NAMES = (
+    'Алина', 'Анастасия', 'Анна', 'Валентина', 'Вера', 'Виктория', 'Дарья', 'Екатерина', 'Елена', 'Ирина',
+    'Ксения', 'Людмила', 'Марина', 'Мария', 'Наталья', 'Ольга', 'Полина', 'Светлана', 'Софья', 'Татьяна',
+    'Юлия',
+)
+
+#: Отчества (мужская и женская формы)
+PATRONYMICS = (
+    ('Александрович', 'Александровна'), ('Алексеевич', 'Алексеевна'), ('Андреевич', 'Андреевна'),
+    ('Борисович', 'Борисовна'), ('Викторович', 'Викторовна'), ('Владимирович', 'Владимировна'),
+    ('Дмитриевич', 'Дмитриевна'), ('Евгеньевич', 'Евгеньевна'), ('Иванович', 'Ивановна'),
+    ('Игоревич', 'Игоревна'), ('Михайлович', 'Михайловна'), ('Николаевич', 'Николаевна'),
+    ('Олегович', 'Олеговна'), ('Павлович', 'Павловна'), ('Петрович', 'Петровна'), ('Сергеевич', 'Сергеевна'),
+    ('Юрьевич', 'Юрьевна'),
+)
+
+#: Первая и вторая части названий команд
+TEAM_PREFIXES = (
+    'Платформа', 'Сервис', 'Центр', 'Лаборатория', 'Отдел', 'Группа', 'Направление', 'Студия', 'Служба', 'Бюро',
+)
+TEAM_AREAS = (
+    'аналитики', 'платежей', 'логистики', 'поиска', 'рекомендаций', 'безопасности', 'инфраструктуры',
+    'мобильной разработки', 'клиентского опыта', 'данных', 'интеграций', 'биллинга', 'качества', 'отчетности',
+    'маркетинга', 'закупок', 'поддержки', 'машинного обучения', 'документооборота', 'контента',
+)
+
+#: Типичные доли занятости и их веса
+FTE_VALUES = (1.0, 0.5, 0.25, 0.75, 0.2, 0.1)
+FTE_WEIGHTS = (50, 20, 12, 8, 6, 4)
+
+#: Показатель степени закона Ципфа для размеров команд (больше - сильнее перекос)
+TEAM_SIZE_SKEW = 1.1
+
+
+def staff_name(index):
+    """
+    Возвращает уникальное ФИО сотрудника по его номеру.
+
+    Номер раскладывается в комбинацию фамилии, имени и отчества; после исчерпания комбинаций
+    к ФИО добавляется номер круга.
+
+    :param index: Номер сотрудника (от 0).
+    :type index: int
+    :rtype: str
+    """
+    index, female = divmod(index, 2)
+    names = FEMALE_NAMES if female else MALE_NAMES
+    index, surname = divmod(index, len(SURNAMES))
+    index, name = divmod(index, len(names))
+    index, patronymic = divmod(index, len(PATRONYMICS))
+    full_name = f'{SURNAMES[surname][female]} {names[name]} {PATRONYMICS[patronymic][female]}'
+    return f'{full_name} {index + 1}' if index else full_name
+
+
+def team_name(index):
+    """
+    Возвращает уникальное название команды по ее номеру.
+
+    :param index: Номер команды (от 0).
+    :type index: int
+    :rtype: str
+    """
+    index, prefix = divmod(index, len(TEAM_PREFIXES))
+    index, area = divmod(index, len(TEAM_AREAS))
+    name = f'{TEAM_PREFIXES[prefix]} {TEAM_AREAS[area]}'
+    return f'{name} {index + 1}' if index else name
+
+
+def _staff_rows(rng, start, count):
+    first_day = date(2015, 1, 1)
+    days = (date.today() - first_day).days
+    for index in range(start, start + count):
+        staff_date = first_day + timedelta(days=rng.randrange(days))
+        staff_datetime = None
+        if rng.random() < 0.8:
+            staff_datetime = datetime.combine(staff_date, datetime.min.time()) + timedelta(seconds=rng.randrange(86400))
+        yield {
+            'staff_name': staff_name(index),
+            'staff_date': staff_date,
+            'staff_datetime': staff_datetime,
+            'staff_active': rng.random() < 0.9,
+        }
+
+
+def _team_rows(start, count):
+    for index in range(start, start + count):
+        yield {'team_name': team_name(index)}
+
+
+def _team_set_rows(rng, team_ids, staff_ids, count):
+    # Накопленные веса Ципфа: команда с номером k получает долю записей, пропорциональную 1 / k^s
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** TEAM_SIZE_SKEW for rank in range(len(team_ids))))
+    fte_weights = list(itertools.accumulate(FTE_WEIGHTS))
+    for _ in range(count):
+        yield {
+            'team_id': rng.choices(team_ids, cum_weights=cum_weights)[0],
+            'staff_id': rng.choice(staff_ids),
+            'fte': rng.choices(FTE_VALUES, cum_weights=fte_weights)[0],
+        }
+
+
+def _insert(engine, table, rows, batch_size, progress=None):
+    """
+    Записывает строки пакетами, каждый пакет - отдельной транзакцией.
+
+    :return: Количество записанных строк.
+    :rtype: int
+    """
+    inserted = 0
+    for batch in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+        with engine.begin() as connection:
+            connection.execute(table.insert(), batch)
+        inserted += len(batch)
+        if progress:
+            progress(table.name, inserted)
+    return inserted
+
+
+def seed_data(team_sets, staff=None, teams=None, random_seed=0, batch_size=None, progress=None):
+    """
+    Генерирует сотрудников, команды и записи составов команд.
+
+    :param team_sets: Количество записей TeamSet.
+    :type team_sets: int
+    :param staff: Количество сотрудников (по умолчанию - пятая часть записей TeamSet, не меньше 1).
+    :type staff: int
+    :param teams: Количество команд (по умолчанию - одна на 50 записей TeamSet, не меньше 1).
+    :type teams: int
+    :param random_seed: Начальное значение генератора случайных чисел.
+    :type random_seed: int
+    :param batch_size: Количество строк в одном пакете (по умолчанию IMPORT_BATCH_SIZE).
+    :type batch_size: int
+    :param progress: Функция, вызываемая после каждого пакета с именем таблицы и числом записанных строк.
+    :return: Количество добавленных сотрудников, команд и записей TeamSet.
+    :rtype: tuple
+    """
+    from app.db import db
+    from app.modules.staff.models import Staff
+    from app.modules.team.models import Team
+    from app.modules.team_set.models import TeamSet, TeamAllocationSummary, StaffAllocationSummary
+    from app.modules.team_set.summary import rebuild_allocation_summary
+    from utils.data_versions import bump_data_versions
+
+    staff = staff or max(1, team_sets // 5)
+    teams = teams or max(1, team_sets // 50)
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    rng = random.Random(random_seed)
+    engine = db.engine
+
+    with engine.connect() as connection:
+        staff_start = connection.scalar(select(func.coalesce(func.max(Staff.id), 0)))
+        team_start = connection.scalar(select(func.coalesce(func.max(Team.id), 0)))
+
+    _insert(engine, Staff.__table__, _staff_rows(rng, staff_start, staff), batch_size, progress)
+    _insert(engine, Team.__table__, _team_rows(team_start, teams), batch_size, progress)
+    bump_data_versions(Staff, Team)
+
+    with engine.connect() as connection:
+        staff_ids = list(connection.scalars(select(Staff.id).where(Staff.id > staff_start).order_by(Staff.id)))
+        team_ids = list(connection.scalars(select(Team.id).where(Team.id > team_start).order_by(Team.id)))
+    # Крупные команды разбросаны по диапазону идентификаторов, а не собраны в его начале
+    rng.shuffle(team_ids)
+
+    inserted = _insert(
+        engine, TeamSet.__table__, _team_set_rows(rng, team_ids, staff_ids, team_sets), batch_size, progress
+    )
+    with engine.begin() as connection:
+        rebuild_allocation_summary(connection)
+    bump_data_versions(TeamSet, TeamAllocationSummary, StaffAllocationSummary)
+    return len(staff_ids), len(team_ids), inserted
+
+
+@click.command('seed')
+@click.option('--team-sets', type=click.IntRange(1), default=10000, show_default=True,
+              help='Количество записей составов команд.')
+@click.option('--staff', type=click.IntRange(1), help='Количество сотрудников (по умолчанию team-sets / 5).')
+@click.option('--teams', type=click.IntRange(1), help='Количество команд (по умолчанию team-sets / 50).')
+@click.option('--random-seed', type=int, default=0, show_default=True, help='Начальное значение генератора.')
+@click.option('--batch-size', type=click.IntRange(1), help='Количество строк в одной транзакции.')
+@with_appcontext
+def seed_command(team_sets, staff, teams, random_seed, batch_size):
+    """
+    Добавляет синтетических сотрудников, команды и составы команд для нагрузочного тестирования.
+    """
+    started = time.perf_counter()
+
+    def progress(table, inserted):
+        click.echo(f'  {table}: {inserted}')
+
+    staff, teams, team_sets = seed_data(team_sets, staff, teams, random_seed, batch_size, progress)
+    click.echo(
+        f'Добавлено: сотрудников - {staff}, команд - {teams}, записей составов - {team_sets} '
+        f'за {time.perf_counter() - started:.1f} с.'
+    )
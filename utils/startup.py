@@ -0,0 +1,203 @@
+# utils/startup.py
+"""
+Модуль замеров времени запуска приложения и отложенной инициализации.
+
+- :data:`import_timer` замеряет время импортов верхнего уровня в ``app/__init__.py``
+  (каждой инструкции import вместе со всеми вложенными импортами);
+- :class:`StartupTimer` замеряет шаги ``create_app``;
+- :func:`format_startup_report` строит отчет, который выводит команда ``flask startup-report``
+  и который пишется в лог при ``STARTUP_REPORT = True``;
+- :func:`defer_until_first_request` откладывает тяжелую инициализацию (например, админку)
+  до первого запроса, так что CLI-команды, которые не обслуживают запросы (``flask db upgrade``),
+  ее не выполняют; :func:`running_cli_command` определяет, что приложение создается командой CLI;
+- :class:`LazyGroup` - группа CLI-команд, которая загружается только при обращении к ней
+  (так подключается Flask-Migrate, не нужный процессам, обслуживающим запросы).
+"""
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+class ImportTimer:
+    """
+    Замеряет время импортов верхнего уровня между вызовами :meth:`start` и :meth:`stop`.
+
+    Вложенные импорты входят во время импорта, который их вызвал, и отдельно не записываются.
+    Повторные импорты уже загруженных модулей не записываются.
+    """
+
+    def __init__(self):
+        self.timings = []
+        self._original_import = None
+        self._depth = 0
+
+    def start(self):
+        """
+        Начинает замер импортов (подменяет встроенную функцию ``__import__``).
+        """
+        if self._original_import is not None:
+            return
+        original_import = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if self._depth or level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            self._depth += 1
+            started = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.timings.append((name, time.perf_counter() - started))
+
+        builtins.__import__ = timed_import
+
+    def stop(self):
+        """
+        Заканчивает замер импортов и восстанавливает ``__import__``.
+        """
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+
+#: Замер импортов модуля app (общий для процесса: модуль импортируется один раз)
+import_timer = ImportTimer()
+
+
+class StartupTimer:
+    """
+    Замеряет шаги создания приложения: отметками :meth:`mark` между шагами или контекстным менеджером :meth:`step`.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._last_mark = time.perf_counter()
+
+    def mark(self, name):
+        """
+        Записывает шаг, длившийся с предыдущей отметки (или с создания замера).
+
+        :param name: Название шага.
+        :type name: str
+        """
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    @contextmanager
+    def step(self, name):
+        """
+        Контекстный менеджер, замеряющий время шага.
+
+        :param name: Название шага.
+        :type name: str
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+
+def format_startup_report(imports, steps, limit=15):
+    """
+    Формирует текстовый отчет о времени запуска.
+
+    :param imports: Замеры импортов: список пар (модуль, секунды).
+    :param steps: Замеры шагов create_app: список пар (шаг, секунды).
+    :param limit: Количество самых медленных импортов в отчете.
+    :type limit: int
+    :rtype: str
+    """
+    lines = [f'Импорты модуля app: {sum(seconds for _, seconds in imports) * 1000:.1f} мс']
+    for name, seconds in sorted(imports, key=lambda item: item[1], reverse=True)[:limit]:
+        lines.append(f'  {seconds * 1000:8.1f} мс  {name}')
+    lines.append(f'Шаги create_app: {sum(seconds for _, seconds in steps) * 1000:.1f} мс')
+    for name, seconds in steps:
+        lines.append(f'  {seconds * 1000:8.1f} мс  {name}')
+    return '\n'.join(lines)
+
+
+def defer_until_first_request(app, name, init):
+    """
+    Откладывает инициализацию до первого запроса к приложению.
+
+    Инициализация выполняется в WSGI-обработчике до того, как Flask начнет обработку запроса,
+    поэтому в ней можно регистрировать blueprints и маршруты. Параллельные первые запросы ждут
+    ее завершения. Время инициализации добавляется в отчет о запуске.
+
+    :param app: Приложение Flask.
+    :type app: Flask
+    :param name: Название шага для отчета.
+    :type name: str
+    :param init: Функция инициализации, принимающая приложение.
+    """
+    wsgi_app = app.wsgi_app
+    lock = threading.Lock()
+    done = False
+
+    def deferred_wsgi_app(environ, start_response):
+        nonlocal done
+        if not done:
+            with lock:
+                if not done:
+                    with app.extensions['startup_timer'].step(f'{name} (при первом запросе)'):
+                        init(app)
+                    done = True
+        return wsgi_app(environ, start_response)
+
+    app.wsgi_app = deferred_wsgi_app
+
+
+def running_cli_command():
+    """
+    Проверяет, создается ли приложение командой CLI ``flask``, а не сервером приложений:
+    CLI Flask загружает приложение внутри контекста click.
+
+    :rtype: bool
+    """
+    return click.get_current_context(silent=True) is not None
+
+
+class LazyGroup(click.Group):
+    """
+    Группа CLI-команд, настоящая реализация которой загружается при первом обращении к ее командам.
+
+    :param name: Имя группы.
+    :type name: str
+    :param load: Функция без аргументов, возвращающая настоящую группу команд.
+    :param kwargs: Дополнительные параметры click.Group (например, help).
+    """
+
+    def __init__(self, name, load, **kwargs):
+        super().__init__(name, **kwargs)
+        self._load = load
+        self._group = None
+
+    def _resolve(self):
+        if self._group is None:
+            self._group = self._load()
+        return self._group
+
+    def list_commands(self, ctx):
+        return self._resolve().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._resolve().get_command(ctx, name)
+
+
+@click.command('startup-report')
+@with_appcontext
+def startup_report_command():
+    """
+    Выводит время импортов и шагов создания приложения в текущем процессе.
+    """
+    click.echo(format_startup_report(import_timer.timings, current_app.extensions['startup_timer'].steps))
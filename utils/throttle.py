@@ -0,0 +1,202 @@
+# utils/throttle.py
+"""
+Модуль ограничения частоты запросов по алгоритму token bucket.
+
+У каждого ключа (например, IP-адреса или email) есть «ведро» на ``capacity`` жетонов, которое
+равномерно пополняется за ``period`` секунд. Каждый запрос забирает жетон; если жетонов нет,
+запрос отклоняется, а ограничитель сообщает, через сколько секунд появится следующий жетон.
+Непрерывное пополнение работает как скользящее окно: в любой интервал ``period`` проходит
+не больше ``2 * capacity`` запросов, а в среднем - ``capacity``.
+
+Хранилища состояния ведер:
+- MemoryBucketStore: LRU-словарь процесса с ограничением количества ключей;
+- SqliteBucketStore: таблица в файле SQLite, общая для всех процессов (воркеров) на сервере.
+
+Основные классы:
+- Throttle: Набор именованных ограничений над общим хранилищем.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """
+    Хранилище ведер в памяти процесса. При превышении ``max_keys`` вытесняются давно не использованные
+    ключи (вытесненное ведро при следующем обращении снова полное).
+
+    :param max_keys: Максимальное количество ключей.
+    :type max_keys: int
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """
+        Забирает жетон из ведра ключа.
+
+        :param key: Ключ ведра.
+        :type key: str
+        :param capacity: Емкость ведра.
+        :type capacity: float
+        :param rate: Скорость пополнения (жетонов в секунду).
+        :type rate: float
+        :return: 0, если жетон получен, иначе время до появления жетона (в секундах).
+        :rtype: float
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self, key):
+        """
+        Удаляет ведро ключа (оно снова становится полным).
+
+        :param key: Ключ ведра.
+        :type key: str
+        """
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SqliteBucketStore:
+    """
+    Хранилище ведер в файле SQLite, общее для процессов на одном сервере.
+
+    Жетон забирается в транзакции ``BEGIN IMMEDIATE``, поэтому параллельные процессы не теряют
+    обновления. Каждые ``prune_every`` обращений удаляются уже полные ведра (их состояние не нужно),
+    а при превышении ``max_keys`` - давно не использованные.
+
+    :param path: Путь к файлу базы (директория создается при необходимости).
+    :type path: str
+    :param max_keys: Максимальное количество ключей.
+    :type max_keys: int
+    :param prune_every: Частота очистки (в обращениях).
+    :type prune_every: int
+    """
+
+    def __init__(self, path, max_keys=100000, prune_every=1000):
+        self.path = path
+        self.max_keys = max_keys
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._calls = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_throttle_bucket_updated ON throttle_bucket (updated)')
+
+    def _connection(self):
+        # Соединение SQLite нельзя использовать из нескольких потоков, поэтому у каждого потока свое
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+    def take(self, key, capacity, rate):
+        """
+        Забирает жетон из ведра ключа (см. :meth:`MemoryBucketStore.take`).
+
+        :rtype: float
+        """
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM throttle_bucket WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else _refill(row[0], row[1], now, capacity, rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            connection.execute(
+                'INSERT OR REPLACE INTO throttle_bucket (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate)
+            )
+            self._calls += 1
+            if self._calls % self.prune_every == 0:
+                self._prune(connection, now)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+    def _prune(self, connection, now):
+        connection.execute('DELETE FROM throttle_bucket WHERE full_at <= ?', (now,))
+        connection.execute(
+            'DELETE FROM throttle_bucket WHERE key IN ('
+            'SELECT key FROM throttle_bucket ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+            (self.max_keys,)
+        )
+
+    def reset(self, key):
+        """
+        Удаляет ведро ключа (оно снова становится полным).
+
+        :param key: Ключ ведра.
+        :type key: str
+        """
+        self._connection().execute('DELETE FROM throttle_bucket WHERE key = ?', (key,))
+
+
+class Throttle:
+    """
+    Набор именованных ограничений над общим хранилищем ведер.
+
+    :param store: Хранилище ведер (MemoryBucketStore или SqliteBucketStore).
+    :param limits: Ограничения: имя - пара (емкость ведра, период полного пополнения в секундах).
+    :type limits: dict
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+        #: Количество отклоненных запросов по именам ограничений
+        self.rejected = Counter()
+
+    def hit(self, limit, key):
+        """
+        Учитывает запрос по ограничению.
+
+        :param limit: Имя ограничения.
+        :type limit: str
+        :param key: Ключ (например, IP-адрес).
+        :type key: str
+        :return: 0, если запрос разрешен, иначе время до следующего разрешенного запроса (в секундах).
+        :rtype: float
+        """
+        capacity, period = self.limits[limit]
+        wait = self.store.take(f'{limit}:{key}', capacity, capacity / period)
+        if wait:
+            self.rejected[limit] += 1
+        return wait
+
+    def reset(self, limit, key):
+        """
+        Сбрасывает ведро ключа по ограничению.
+
+        :param limit: Имя ограничения.
+        :type limit: str
+        :param key: Ключ.
+        :type key: str
+        """
+        self.store.reset(f'{limit}:{key}')